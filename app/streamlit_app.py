@@ -4,7 +4,8 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 import logging
-import time
+import subprocess
+import sys
 from pathlib import Path
 import xlwings as xw
 from openpyxl import load_workbook
@@ -23,6 +24,28 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# --- Pfade & Module aus scripts/ ------------------------------------------
+BASE = Path(__file__).resolve().parent.parent
+FILE = BASE / "outputs" / "UnternehmensplanungForecast.xlsx"
+SHEET = "KPI"
+
+sys.path.insert(0, str(BASE / "scripts"))
+import sensitivity
+import reasons
+import run_store
+import progress
+from loader import load_sheet_specs
+
+# --- Live-Fortschritt des Laufs (outputs/progress.jsonl) -------------------
+def poll_progress() -> dict:
+    """Neue Ereignisse des Runners nachlesen → aktueller Stand (progress.state)."""
+    ss = st.session_state
+    events, ss["progress_offset"] = progress.follow(ss.get("progress_offset", 0))
+    if any(e["event"] == "run_started" for e in events):
+        ss["progress_events"] = []
+    ss["progress_events"] = ss.get("progress_events", []) + events
+    return progress.state(ss["progress_events"])
+
 # --- Sidebar Steuerung & Navigation --------------------------------------
 st.sidebar.header("🔧 Steuerung")
 # Szenario-Stärke Slider (UI-only)
@@ -32,28 +55,74 @@ szenario = st.sidebar.slider(
     help="Wählen Sie hier die Stärke Ihres Forecast-Szenarios."
 )
 
-if st.sidebar.button("🚀 Simulation starten"):
-    progress = st.sidebar.progress(0)
-    for i in range(100):
-        progress.progress(i+1)
-        time.sleep(5/100)
-    progress.empty()
-    st.sidebar.success("Simulation abgeschlossen!")
+proc = st.session_state.get("run_proc")
+if st.sidebar.button("🚀 Simulation starten", disabled=proc is not None and proc.poll() is None):
+    # Runner als eigener Prozess; Fortschritt kommt über den Ereignis-Strom
+    st.session_state["run_proc"] = subprocess.Popen(
+        [sys.executable, str(BASE / "scripts" / "main.py")], cwd=BASE)
+    st.session_state["progress_announced"] = False
+
+@st.fragment(run_every=1.0)
+def live_progress() -> None:
+    state = poll_progress()
+    if state["status"] == "idle":
+        return
+    total = max(state["total"], 1)
+    eta   = "" if state["eta_s"] is None else f" · noch ≈ {state['eta_s']:.0f}s"
+    st.progress(min(state["done"] / total, 1.0),
+                text=f"{state['done']}/{state['total']} Zeilen{eta}")
+    if state["status"] == "running":
+        running = [s for s, v in state["sheets"].items() if v == "läuft"]
+        st.caption("Läuft: " + (", ".join(running) or "Vorbereitung …"))
+    elif state["status"] == "failed":
+        st.error(f"Lauf abgebrochen: {state['error']}" if state.get("error")
+                 else "Lauf abgebrochen – Details in der Konsole")
+    else:
+        st.success(f"Simulation abgeschlossen ({state['elapsed_s']:.0f}s)")
+        if not st.session_state.get("progress_announced", True):
+            st.session_state["progress_announced"] = True
+            st.cache_data.clear()                  # neue Forecast-Datei → Seiten neu laden
+            st.rerun(scope="app")
+
+with st.sidebar:
+    live_progress()
 
 st.sidebar.markdown("---")
 st.sidebar.markdown("**Seiten**")
 page = st.sidebar.radio(
     "Seite wählen",  # non-empty label für Barrierefreiheit
-    ["Übersicht", "Umsatz", "EBIT-Marge", "Cashflow", "FCF", "Kapitalrendite"],
+    ["Übersicht", "Live-Lauf", "Umsatz", "EBIT-Marge", "Cashflow", "FCF", "Kapitalrendite",
+     "Sensitivität", "Begründungen"],
     index=0,
     label_visibility="collapsed"  # versteckt das Label optisch
 )
 
-# --- Pfad zur Forecast-Datei prüfen & Recalc via xlwings -----------------
-BASE = Path(__file__).resolve().parent.parent
-FILE = BASE / "outputs" / "UnternehmensplanungForecast.xlsx"
-SHEET = "KPI"
+# --- Seite: Live-Lauf (Teilergebnisse, noch ohne Forecast-Datei) ----------
+if page == "Live-Lauf":
+    st.title("⏱️ Live-Lauf")
+    st.caption("Fertige Zeilen erscheinen hier, sobald der Runner sie meldet – "
+               "lange bevor die Forecast-Datei gespeichert ist.")
+
+    @st.fragment(run_every=2.0)
+    def live_results() -> None:
+        state = poll_progress()
+        if not state["rows"]:
+            st.info("Noch kein Lauf gestartet – links auf „Simulation starten“ klicken.")
+            return
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Zeilen", f"{state['done']}/{state['total']}")
+        c2.metric("Laufzeit", f"{state['elapsed_s']:.0f}s")
+        c3.metric("Restzeit", "–" if state["eta_s"] is None else f"{state['eta_s']:.0f}s")
+        st.dataframe(pd.DataFrame(state["sheets"].items(), columns=["Sheet", "Status"]),
+                     use_container_width=True, hide_index=True)
+        df = pd.DataFrame(state["rows"].values())
+        st.dataframe(df[["sheet", "row", "account", "t1", "t2", "t3", "source", "latency_ms"]]
+                     .iloc[::-1], use_container_width=True, hide_index=True)
+
+    live_results()
+    st.stop()
 
+# --- Pfad zur Forecast-Datei prüfen & Recalc via xlwings -----------------
 if not FILE.exists():
     st.error(f"Forecast-Datei nicht gefunden:\n{FILE}")
     st.stop()
@@ -230,3 +299,72 @@ elif page == "Kapitalrendite":
         st.altair_chart(chart, use_container_width=True)
     else:
         st.error("EK-Rendite-KPI nicht gefunden.")
+
+# --- Seite: Sensitivität (Tornado) ----------------------------------------
+elif page == "Sensitivität":
+    st.title("🌪️ KPI-Sensitivität")
+    st.caption("Jedes Forecast-Konto wird einzeln um ±x % verschoben; "
+               "alle Kennzahlen werden für alle Schocks auf einmal neu berechnet.")
+
+    @st.cache_data
+    def load_sensitivity(path: Path, shock: float, mtime: float) -> dict:
+        return sensitivity.sensitivity(path, shock)
+
+    c1, c2, c3, c4 = st.columns(4)
+    shock = c1.slider("Schock ± %", min_value=1, max_value=50, value=10) / 100
+    res   = load_sensitivity(FILE, shock, FILE.stat().st_mtime)
+    kpi   = c2.selectbox("Kennzahl", res["kpis"])
+    per   = c3.selectbox("Periode", res["periods"])
+    top   = c4.number_input("Top-Konten", min_value=3, max_value=100, value=15)
+
+    k, j  = res["kpis"].index(kpi), res["periods"].index(per)
+    rows  = sensitivity.ranking(res, k, j, int(top))
+    if not rows:
+        st.info("Keine Forecast-Konten mit Einfluss auf diese Kennzahl.")
+    else:
+        st.metric(f"{kpi} {per}", format_cell(kpi, res["base"][k, j]))
+        order = [label for label, _, _ in rows]
+        df = pd.DataFrame(
+            [(label, f"−{shock:.0%}", lo) for label, lo, _ in rows]
+            + [(label, f"+{shock:.0%}", hi) for label, _, hi in rows],
+            columns=["Konto", "Schock", "Δ"],
+        )
+        chart = (
+            alt.Chart(df)
+            .mark_bar()
+            .encode(
+                x=alt.X("Δ:Q", title=f"Änderung {kpi}"),
+                y=alt.Y("Konto:N", sort=order, title=None),
+                color=alt.Color("Schock:N", scale=alt.Scale(range=["#d62728", "#2ca02c"])),
+                tooltip=["Konto", "Schock", alt.Tooltip("Δ:Q", format=",.4g")],
+            )
+            .properties(height=max(200, 28 * len(order)))
+        )
+        st.altair_chart(chart, use_container_width=True)
+
+# --- Seite: Begründungen (auf Abruf) ---------------------------------------
+elif page == "Begründungen":
+    st.title("💬 Begründungen")
+    st.caption("Mit `reasons: lazy` liefert das LLM nur die Zahlen; die Begründung einer Zeile "
+               "entsteht erst beim Öffnen und wird im Run-Store abgelegt.")
+    if not run_store.DB_PATH.exists():
+        st.info("Noch kein Lauf im Run-Store – zuerst `python scripts/main.py` ausführen.")
+        st.stop()
+
+    sheet = st.selectbox("Sheet", list(load_sheet_specs()))
+    recs  = run_store.sheet_results(sheet)
+    if not recs:
+        st.info("Für dieses Sheet liegen keine Ergebnisse vor.")
+        st.stop()
+    st.caption(f"Lauf {recs[0]['run_id']}")
+    st.dataframe(pd.DataFrame(recs)[["row", "account", "t1", "t2", "t3", "source", "reason"]],
+                 use_container_width=True, hide_index=True)
+
+    labels = {f"{r['row']}: {r['account']}": r for r in recs}
+    rec    = labels[st.selectbox("Zeile öffnen", list(labels))]
+    if reasons.pending(rec):
+        with st.spinner("Begründung wird erzeugt …"):
+            rec = reasons.explain_reason(rec)
+    st.markdown(f"**{rec['account']}** – t1 {format_cell('', rec['t1'])}, "
+                f"t2 {format_cell('', rec['t2'])}, t3 {format_cell('', rec['t3'])} ({rec['source']})")
+    st.write(rec["reason"])
@@ -0,0 +1,281 @@
+"""
+backends.py – Pool mehrerer LLM-Endpunkte mit Lastverteilung & Failover
+=======================================================================
+Konfiguration über ENV `LLM_BACKENDS` (kommagetrennt), z.B.
+
+    LLM_BACKENDS="http://gpu1:11434|4, http://gpu2:11434|2, openai+http://vllm:8000/v1|8"
+
+- Präfix `openai+` → OpenAI-kompatibler Server (vLLM, llama.cpp, LM Studio …),
+  sonst Ollama; `|N` = maximale parallele Requests je Endpunkt (Default 2)
+- Ohne `LLM_BACKENDS` gilt wie bisher genau ein Ollama unter `OLLAMA_URL`
+- Routing: freier Endpunkt mit kleinstem (in-flight + 1) × EWMA-Latenz
+- Verbindungsfehler/Timeout → Endpunkt wird für `cooldown` Sekunden gesperrt,
+  Request geht an den nächsten; ein Health-Check-Thread holt gesperrte
+  Endpunkte zurück. Antwortet der Server mit einem Fehler (z.B. Modell nicht
+  geladen, 4xx), bleibt er verfügbar – der Request versucht nur den nächsten
+- KV-Cache-Wiederverwendung: Ollama hält das Modell per `keep_alive` geladen
+  und rechnet gemeinsame Prompt-Präfixe nicht neu, llama.cpp-Server bekommen
+  `cache_prompt`, vLLM nutzt Prefix-Caching serverseitig. `warm()` schickt den
+  festen Präfix einmal je Endpunkt vorab.
+"""
+
+from __future__ import annotations
+import json, os, threading, time, urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import metrics
+
+OLLAMA_URL       = os.getenv("OLLAMA_URL", "http://localhost:11434")
+BACKENDS_ENV     = os.getenv("LLM_BACKENDS", "")
+DEFAULT_INFLIGHT = int(os.getenv("LLM_MAX_INFLIGHT", "2"))
+HEALTH_INTERVAL  = float(os.getenv("LLM_HEALTH_INTERVAL", "15"))
+COOLDOWN         = float(os.getenv("LLM_COOLDOWN", "30"))
+KEEP_ALIVE       = os.getenv("LLM_KEEP_ALIVE", "30m")
+NUM_CTX          = int(os.getenv("LLM_NUM_CTX", "0")) or None   # fix halten → Cache bleibt gültig
+
+BACKEND_REQUESTS = metrics.REGISTRY.counter(
+    "forecast_backend_requests_total", "LLM-Requests je Endpunkt nach Ergebnis (ok/error)")
+BACKEND_INFLIGHT = metrics.REGISTRY.gauge(
+    "forecast_backend_inflight", "Aktuell laufende Requests je Endpunkt")
+BACKEND_HEALTHY  = metrics.REGISTRY.gauge(
+    "forecast_backend_healthy", "1 = Endpunkt verfügbar, 0 = gesperrt")
+PROMPT_EVAL      = metrics.REGISTRY.histogram(
+    "forecast_llm_prompt_eval_seconds", "Prompt-Verarbeitung bis zum ersten Token (Ollama)",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30))
+
+
+class NoBackendAvailable(RuntimeError):
+    pass
+
+
+def _unreachable(err: BaseException) -> bool:
+    """
+    Verbindungsfehler oder Timeout (httpx, openai, urllib, socket) – auch als
+    Ursache eines anderen Fehlers. HTTP-Fehlerantworten zählen nicht dazu.
+    """
+    seen = set()
+    while err is not None and id(err) not in seen:
+        seen.add(id(err))
+        if any("Connect" in c.__name__ or "Timeout" in c.__name__ for c in type(err).__mro__):
+            return True
+        reason = getattr(err, "reason", None)       # urllib.error.URLError
+        err    = reason if isinstance(reason, BaseException) else err.__cause__
+    return False
+
+
+# ---------------- Einzelner Endpunkt ----------------
+class Endpoint:
+    def __init__(self, url: str, kind: str = "ollama", max_inflight: int = DEFAULT_INFLIGHT):
+        self.url          = url.rstrip("/")
+        self.kind         = kind
+        self.max_inflight = max(1, max_inflight)
+        self.inflight     = 0
+        self.latency      = 1.0            # EWMA in Sekunden, optimistischer Start
+        self.down_until   = 0.0
+        self.failures     = 0
+        self._clients: Dict[Tuple[str, float, Optional[int]], object] = {}
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def score(self) -> float:
+        return (self.inflight + 1) * self.latency
+
+    # ---- Aufruf ----
+    def _client(self, model: str, temperature: float, seed: Optional[int]):
+        key = (model, temperature, seed)
+        c   = self._clients.get(key)
+        if c is None:
+            if self.kind == "openai":
+                from openai import OpenAI
+                c = OpenAI(base_url=self.url, api_key=os.getenv("OPENAI_API_KEY", "not-needed"))
+            else:
+                from langchain_ollama import OllamaLLM
+                c = OllamaLLM(model=model, base_url=self.url, temperature=temperature, seed=seed,
+                              keep_alive=KEEP_ALIVE, num_ctx=NUM_CTX)
+            self._clients[key] = c
+        return c
+
+    def generate(self, prompt: str, model: str, temperature: float,
+                 seed: Optional[int] = None) -> Tuple[str, Optional[int], Optional[int]]:
+        """→ (Rohtext, Prompt-Tokens, Completion-Tokens); Tokens None, wenn unbekannt."""
+        client = self._client(model, temperature, seed)
+        if self.kind == "openai":
+            resp  = client.chat.completions.create(
+                model=model, temperature=temperature, seed=seed,
+                messages=[{"role": "user", "content": prompt}],
+                extra_body={"cache_prompt": True})
+            usage = resp.usage
+            return (resp.choices[0].message.content or "",
+                    usage.prompt_tokens if usage else None,
+                    usage.completion_tokens if usage else None)
+        gen  = client.generate([prompt]).generations[0][0]
+        info = gen.generation_info or {}
+        if info.get("prompt_eval_duration"):
+            PROMPT_EVAL.observe(info["prompt_eval_duration"] / 1e9, endpoint=self.url, model=model)
+        return gen.text, info.get("prompt_eval_count"), info.get("eval_count")
+
+    def warm(self, prefix: str, model: str, timeout: float = 300.0) -> bool:
+        """Präfix einmal durchrechnen lassen (1 Token), damit der KV-Cache gefüllt ist."""
+        if self.kind == "openai":
+            path, body = "/completions", {"model": model, "prompt": prefix, "max_tokens": 1,
+                                          "cache_prompt": True}
+        else:
+            opts = {"num_predict": 1, **({"num_ctx": NUM_CTX} if NUM_CTX else {})}
+            path, body = "/api/generate", {"model": model, "prompt": prefix, "stream": False,
+                                           "keep_alive": KEEP_ALIVE, "options": opts}
+        req = urllib.request.Request(self.url + path, data=json.dumps(body).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as r:
+                return 200 <= r.status < 300
+        except Exception:
+            return False
+
+    def ping(self, timeout: float = 3.0) -> bool:
+        path = "/models" if self.kind == "openai" else "/api/tags"
+        try:
+            with urllib.request.urlopen(self.url + path, timeout=timeout) as r:
+                return 200 <= r.status < 300
+        except Exception:
+            return False
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.kind}:{self.url}, max={self.max_inflight})"
+
+
+def parse_backends(spec: str) -> List[Endpoint]:
+    """`[openai+]URL[|N], …` → Endpunkte."""
+    out: List[Endpoint] = []
+    for item in (s.strip() for s in spec.split(",")):
+        if not item:
+            continue
+        url, _, n = item.partition("|")
+        kind = "ollama"
+        if url.startswith("openai+"):
+            kind, url = "openai", url[len("openai+"):]
+        out.append(Endpoint(url.strip(), kind, int(n) if n.strip() else DEFAULT_INFLIGHT))
+    return out
+
+
+# ---------------- Pool ----------------
+class BackendPool:
+    def __init__(self, endpoints: List[Endpoint], cooldown: float = COOLDOWN,
+                 health_interval: float = HEALTH_INTERVAL):
+        if not endpoints:
+            raise ValueError("BackendPool braucht mindestens einen Endpunkt")
+        self.endpoints = endpoints
+        self.cooldown  = cooldown
+        self._cond     = threading.Condition()
+        for ep in endpoints:
+            BACKEND_HEALTHY.set(1, endpoint=ep.url)
+        if health_interval > 0 and len(endpoints) > 1:
+            threading.Thread(target=self._health_loop, args=(health_interval,),
+                             name="llm-health", daemon=True).start()
+
+    @property
+    def capacity(self) -> int:
+        """Summe der Parallelitäts-Limits – sinnvolle Worker-Zahl für Aufrufer."""
+        return sum(ep.max_inflight for ep in self.endpoints)
+
+    # ---- Auswahl ----
+    def _acquire(self, exclude: set, timeout: float) -> Endpoint:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                candidates = [ep for ep in self.endpoints if ep not in exclude]
+                if not candidates:
+                    raise NoBackendAvailable("alle Endpunkte fehlgeschlagen")
+                live = [ep for ep in candidates if ep.healthy] or \
+                       [min(candidates, key=lambda e: e.down_until)]   # notfalls der „früheste"
+                free = [ep for ep in live if ep.inflight < ep.max_inflight]
+                if free:
+                    ep = min(free, key=Endpoint.score)
+                    ep.inflight += 1
+                    BACKEND_INFLIGHT.set(ep.inflight, endpoint=ep.url)
+                    return ep
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise NoBackendAvailable("kein Endpunkt innerhalb des Timeouts frei")
+                self._cond.wait(min(left, 1.0))
+
+    def _release(self, ep: Endpoint, latency: Optional[float], down: bool = False) -> None:
+        """latency None = Request fehlgeschlagen; `down` = Endpunkt nicht erreichbar → sperren."""
+        with self._cond:
+            ep.inflight -= 1
+            BACKEND_INFLIGHT.set(ep.inflight, endpoint=ep.url)
+            if down:
+                ep.failures  += 1
+                ep.down_until = time.monotonic() + self.cooldown
+                BACKEND_HEALTHY.set(0, endpoint=ep.url)
+            elif latency is not None:
+                ep.failures = 0
+                ep.latency  = 0.8 * ep.latency + 0.2 * latency
+            self._cond.notify_all()
+
+    # ---- Öffentliche API ----
+    def generate(self, prompt: str, model: str, temperature: float,
+                 seed: Optional[int] = None, timeout: float = 600.0):
+        """
+        Request an den günstigsten Endpunkt; bei Fehler Failover auf den nächsten.
+        Gesperrt wird ein Endpunkt nur, wenn er nicht erreichbar war.
+        """
+        tried: set = set()
+        last_err: Exception | None = None
+        while len(tried) < len(self.endpoints):
+            ep = self._acquire(tried, timeout)
+            t0 = time.perf_counter()
+            try:
+                out = ep.generate(prompt, model, temperature, seed)
+            except Exception as e:
+                self._release(ep, None, down=_unreachable(e))
+                BACKEND_REQUESTS.inc(endpoint=ep.url, result="error")
+                tried.add(ep)
+                last_err = e
+                continue
+            self._release(ep, time.perf_counter() - t0)
+            BACKEND_REQUESTS.inc(endpoint=ep.url, result="ok")
+            return out
+        raise last_err or NoBackendAvailable("kein Endpunkt verfügbar")
+
+    def warm(self, prefix: str, models) -> Dict[str, bool]:
+        """Gemeinsamen Präfix auf allen gesunden Endpunkten parallel vorwärmen."""
+        eps = [ep for ep in self.endpoints if ep.healthy]
+        with ThreadPoolExecutor(max_workers=max(1, len(eps))) as ex:
+            futs = {ep.url: ex.submit(lambda e=ep: all(e.warm(prefix, m) for m in models))
+                    for ep in eps}
+        return {url: f.result() for url, f in futs.items()}
+
+    def check_health(self) -> Dict[str, bool]:
+        status = {}
+        for ep in self.endpoints:
+            ok = ep.ping()
+            with self._cond:
+                if ok:
+                    ep.down_until = 0.0
+                    self._cond.notify_all()
+                elif ep.healthy:
+                    ep.down_until = time.monotonic() + self.cooldown
+            BACKEND_HEALTHY.set(1 if ok else 0, endpoint=ep.url)
+            status[ep.url] = ok
+        return status
+
+    def _health_loop(self, interval: float) -> None:
+        while True:
+            time.sleep(interval)
+            self.check_health()
+
+
+# ---------------- Singleton ----------------
+_pool: BackendPool | None = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> BackendPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            eps = parse_backends(BACKENDS_ENV) or [Endpoint(OLLAMA_URL, "ollama", DEFAULT_INFLIGHT)]
+            _pool = BackendPool(eps)
+        return _pool
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+backtest.py – Rolling-Origin-Backtest der Forecast-Methoden
+===========================================================
+Verdeckt die jüngsten Ist-Werte und prognostiziert sie aus der Historie davor
+mit jeder verfügbaren Methode – auch mit dem LLM (über denselben Cache):
+
+    python scripts/backtest.py [--sheets "OPEX (2)" ...] [--no-llm] [--contexts none|cases]
+
+- Ursprünge: jeder Schnitt mit mindestens 2 Trainingswerten, Horizont bis zu
+  3 Perioden; bei t-2..t0 also genau ein Ursprung (t0 aus t-2..t-1), bei
+  längerer Historie entsprechend mehr
+- Statistische Methoden rechnen je Ursprung vektorisiert über alle Konten
+- LLM-Backtests laufen parallel (Sheets nebeneinander, Zeilen über den
+  Backend-Pool) inklusive Validierung, wie im echten Lauf
+- Sachverhalte aus cases.csv beschreiben die Zukunft nach t0 und werden im
+  Backtest deshalb standardmäßig weggelassen (`--contexts cases` schaltet sie zu)
+- Kennzahlen je Sheet × Kontotyp × Methode: MAPE, Bias (mittlerer
+  prozentualer Fehler) und Trefferquote (Richtung der Veränderung richtig)
+- Ergebnis: Scoreboard auf der Konsole und outputs/backtest_scoreboard.csv,
+  mit der Methode mit kleinstem MAPE je Sheet; die MAPE-Werte fließen als
+  Methodenfehler in die Ensemble-Gewichte (ensemble.py)
+"""
+
+from __future__ import annotations
+import argparse, csv, os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import ensemble
+import xlsx_stream
+from explanations import CONTEXT_PATH, load_contexts
+from forecast import STAT_METHODS, account_groups
+from main import SRC_XLSX, WRITERS
+from pipeline import explain_rows, sheet_jobs
+from profiling import span
+from results import matrix
+
+BASE      = Path(__file__).resolve().parent.parent
+OUT_CSV   = BASE / "outputs" / "backtest_scoreboard.csv"
+MIN_TRAIN = 2
+HORIZON   = 3
+FLAT_TOL  = float(os.getenv("FORECAST_BACKTEST_FLAT", "0.005"))   # |Δ| ≤ 0,5 % = "gleich"
+
+
+# --------------------------------------------------------------------------- #
+#  Backtest                                                                   #
+# --------------------------------------------------------------------------- #
+def origins(n_periods: int) -> List[Tuple[int, int]]:
+    """(Anzahl Trainingsperioden, Horizont) für alle Ursprünge."""
+    return [(c, min(HORIZON, n_periods - c)) for c in range(MIN_TRAIN, n_periods)]
+
+
+def _llm_forecasts(sheet: str, jobs, hist: np.ndarray, cut: int, h: int,
+                   contexts: Optional[List[str]]) -> np.ndarray:
+    bt_jobs = [(r, acc, [float(v) for v in hist[i, :cut]]) for i, (r, acc, _) in enumerate(jobs)]
+    out     = np.full((len(jobs), h), np.nan)
+    with span("backtest_llm", sheet=sheet, rows=len(jobs), cut=cut):
+        res = explain_rows(sheet, bt_jobs, contexts, use_ensemble=False, use_rules=False,
+                           use_hierarchy=False, use_monthly=False)
+    if res:
+        out[:] = matrix([res[r] for r, _, _ in bt_jobs])[:, :h]
+    return out
+
+
+def backtest_sheet(sheet: str, hist_src, use_llm: bool = True,
+                   contexts: Optional[List[str]] = None) -> List[dict]:
+    """Alle Ursprünge eines Sheets → Einzelfehler (ein Dict je Konto × Horizont × Methode)."""
+    jobs, _ = sheet_jobs(sheet, hist_src)
+    if not jobs:
+        return []
+    hist = np.array([h for _, _, h in jobs], dtype=float)           # Konten × Perioden
+    out: List[dict] = []
+    for cut, h in origins(hist.shape[1]):
+        train, actual = hist[:, :cut], hist[:, cut:cut + h]
+        types = account_groups(train, FLAT_TOL)
+        preds = {name: fn(train, h) for name, fn in STAT_METHODS.items()}
+        if use_llm:
+            preds["llm"] = _llm_forecasts(sheet, jobs, hist, cut, h, contexts)
+        last = train[:, -1:]
+        for name, fc in preds.items():
+            err = fc - actual
+            with np.errstate(divide="ignore", invalid="ignore"):
+                pe  = np.where(actual != 0, err / np.abs(actual), np.nan)
+                tol = FLAT_TOL * np.abs(last)
+            hit = np.sign(np.where(np.abs(fc - last) <= tol, 0, fc - last)) == \
+                  np.sign(np.where(np.abs(actual - last) <= tol, 0, actual - last))
+            for i, (r, acc, _) in enumerate(jobs):
+                for k in range(h):
+                    if np.isnan(fc[i, k]):
+                        continue
+                    out.append({"sheet": sheet, "row": r, "account": acc, "type": str(types[i]),
+                                "origin": cut, "horizon": k + 1, "method": name,
+                                "forecast": float(fc[i, k]), "actual": float(actual[i, k]),
+                                "pe": float(pe[i, k]), "hit": bool(hit[i, k])})
+    return out
+
+
+def scoreboard(records: Sequence[dict]) -> List[dict]:
+    """MAPE/Bias/Trefferquote je (Sheet, Kontotyp, Methode); Kontotyp "alle" = Sheet gesamt."""
+    groups: Dict[Tuple[str, str, str], List[dict]] = {}
+    for e in records:
+        for typ in ("alle", e["type"]):
+            groups.setdefault((e["sheet"], typ, e["method"]), []).append(e)
+    board = []
+    for (sheet, typ, method), es in sorted(groups.items()):
+        pe = np.array([e["pe"] for e in es], dtype=float)
+        pe = pe[~np.isnan(pe)]
+        board.append({"sheet": sheet, "type": typ, "method": method, "n": len(es),
+                      "mape": float(np.abs(pe).mean()) if len(pe) else None,
+                      "bias": float(pe.mean()) if len(pe) else None,
+                      "hit_rate": float(np.mean([e["hit"] for e in es]))})
+    return board
+
+
+def best_methods(board: Sequence[dict]) -> Dict[str, str]:
+    """Sheet → Methode mit kleinstem MAPE über alle Konten (Gleichstand: höhere Trefferquote)."""
+    best: Dict[str, dict] = {}
+    for b in board:
+        if b["type"] != "alle" or b["mape"] is None:
+            continue
+        cur = best.get(b["sheet"])
+        if cur is None or (b["mape"], -b["hit_rate"]) < (cur["mape"], -cur["hit_rate"]):
+            best[b["sheet"]] = b
+    return {s: b["method"] for s, b in best.items()}
+
+
+def run_backtest(sheets: Sequence[str], src: Path = SRC_XLSX, use_llm: bool = True,
+                 contexts: Optional[List[str]] = None, parallel: int = 4) -> List[dict]:
+    hists = xlsx_stream.preload(src)
+    with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(sheets))),
+                            thread_name_prefix="backtest") as ex:
+        parts = ex.map(lambda s: backtest_sheet(s, hists[s], use_llm, contexts), sheets)
+        return [e for part in parts for e in part]
+
+
+# --------------------------------------------------------------------------- #
+#  CLI                                                                        #
+# --------------------------------------------------------------------------- #
+def _pct(v: Optional[float], signed: bool = False) -> str:
+    return "–" if v is None else f"{v:+.1%}" if signed else f"{v:.1%}"
+
+
+def main(argv=None) -> None:
+    all_sheets = [s for s, _ in WRITERS]
+    p = argparse.ArgumentParser(description="Rolling-Origin-Backtest der Forecast-Methoden")
+    p.add_argument("--sheets", nargs="+", default=all_sheets, choices=all_sheets, metavar="SHEET")
+    p.add_argument("--no-llm", action="store_true", help="nur statistische Methoden")
+    p.add_argument("--contexts", choices=("none", "cases"), default="none",
+                   help="Sachverhalte im LLM-Prompt (Default none: keine Zukunftsinfos im Backtest)")
+    p.add_argument("--out", type=Path, default=OUT_CSV)
+    args = p.parse_args(argv)
+
+    contexts = load_contexts(CONTEXT_PATH) if args.contexts == "cases" else []
+    records  = run_backtest(args.sheets, use_llm=not args.no_llm, contexts=contexts)
+    board    = scoreboard(records)
+    best     = best_methods(board)
+
+    ensemble.update(board, ensemble.settings("")["alpha"])
+    args.out.parent.mkdir(exist_ok=True, parents=True)
+    with args.out.open("w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, ["sheet", "type", "method", "n", "mape", "bias", "hit_rate"])
+        w.writeheader()
+        w.writerows(board)
+
+    print(f"🧪 Backtest: {len(records)} Prognosen, Methoden {', '.join(sorted({e['method'] for e in records}))}")
+    print(f"{'Sheet':<12} {'Typ':<10} {'Methode':<7} {'n':>4} {'MAPE':>8} {'Bias':>8} {'Treffer':>8}")
+    for b in board:
+        mark = " ⭐" if b["type"] == "alle" and best.get(b["sheet"]) == b["method"] else ""
+        print(f"{b['sheet']:<12} {b['type']:<10} {b['method']:<7} {b['n']:>4} "
+              f"{_pct(b['mape']):>8} {_pct(b['bias'], True):>8} {b['hit_rate']:>8.0%}{mark}")
+    print("\n🏁 Empfehlung je Sheet (kleinster MAPE): "
+          + ", ".join(f"{s}: {m}" for s, m in best.items()))
+    print(f"📄 Scoreboard: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
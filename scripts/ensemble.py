@@ -0,0 +1,169 @@
+"""
+ensemble.py – LLM-Antwort und statistische Prognosen gewichtet mischen
+======================================================================
+Statt "LLM oder CAGR-Baseline" mischt `apply()` je Zeile die LLM-Antwort mit
+den statistischen Methoden aus forecast.py (naiv, CAGR, Trend, Mittelwert):
+
+- Gewichte ∝ 1 / MAPE je Methode, getrennt nach Sheet und Kontogruppe
+  (konstant/wachsend/fallend/wechselnd); ohne Messwert gilt `prior_mape`
+- Das LLM behält mindestens `llm_min_weight`, weil nur es die Sachverhalte kennt
+- Weicht die LLM-Antwort um mehr als `keep_llm_beyond` von der statistischen
+  Mischung ab (oder ist sie 0 = Wegfall), ist das ein Sachverhalts-Effekt und
+  bleibt unverändert
+- Ohne LLM-Antwort (Baseline) bleibt die CAGR-Baseline stehen, ebenso jede
+  Zeile mit t0 = 0 – ein weggefallenes Konto lebt nicht über die Statistik auf
+- Gemischte Werte behalten das Vorzeichen von t0 (kein Vorzeichenwechsel durch
+  Trend oder Mittelwert); geprüft wird erst danach (validation.py)
+- Ein Stichproben-Band (sampling.py) wird mit dem Wert mitskaliert, damit
+  Spanne und Prüfhinweis zur gemischten Zahl passen
+- Alle Zeilen eines Sheets in einer Matrix-Operation (forecast.blend),
+  ohne zusätzliche LLM-Aufrufe
+
+Die Fehler liegen in der Tabelle `method_errors` des Run-Stores. Nach jedem
+Lauf rechnet `refresh()` einen (kostenlosen) statistischen Backtest und glättet
+die Fehler der statistischen Methoden nach – das LLM-Gewicht bleibt dabei
+stehen. Den Fehler des LLM pflegen `python scripts/backtest.py` und, sobald
+Ist-Werte vorliegen, `run_store.py accuracy RUN_ID IST.xlsx --learn` (`learn()`) ein.
+Einstellungen im `ensemble:`-Block von sheets.yml.
+"""
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+import metrics
+import run_store
+from forecast import STAT_METHODS, account_groups, blend, inverse_error_weights
+from loader import load_sheet_block
+from results import ForecastResult, matrix
+
+ENSEMBLE = metrics.REGISTRY.counter(
+    "forecast_ensemble_rows_total",
+    "Zeilen nach Ensemble-Ergebnis (blended/kept_llm/kept_baseline)")
+
+DEFAULTS = {
+    "enabled":         True,
+    "methods":         ["llm", "cagr", "naiv", "trend", "mittel"],
+    "power":           1.0,    # Gewicht ∝ 1 / MAPE^power
+    "prior_mape":      0.25,   # angenommener Fehler ohne Messwert
+    "llm_min_weight":  0.5,
+    "keep_llm_beyond": 0.5,    # > 50 % Abstand zur Statistik → LLM-Zahl bleibt
+    "alpha":           0.5,    # Glättung beim Nachführen der Fehler
+}
+
+def settings(sheet: str) -> dict:
+    return {**DEFAULTS, **load_sheet_block("ensemble", sheet)}
+
+
+def weight_table(sheet: str, methods: Sequence[str], cfg: dict) -> Dict[str, np.ndarray]:
+    """Kontogruppe → Gewichte je Methode ("alle" = Sheet gesamt als Rückfall)."""
+    errors = run_store.method_errors(sheet) if run_store.DB_PATH.exists() else {}
+    groups = {g for g, _ in errors} | {"alle"}
+    table  = {}
+    for g in groups:
+        err = np.array([errors.get((g, m), errors.get(("alle", m), cfg["prior_mape"]))
+                        for m in methods], dtype=float)
+        w   = inverse_error_weights(err, cfg["power"])
+        if "llm" in methods:
+            i   = methods.index("llm")
+            low = float(cfg["llm_min_weight"])
+            if w[i] < low and w.sum() - w[i] > 0:
+                w = w * (1 - low) / (w.sum() - w[i])
+                w[i] = low
+        table[g] = w
+    return table
+
+
+def _rescaled(band: dict | None, llm: np.ndarray, mixed: np.ndarray) -> dict | None:
+    """Band der LLM-Stichproben auf den gemischten Wert übertragen (Faktor je Jahr); sonst weg."""
+    if not band:
+        return None
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f = mixed / llm
+    if not (np.isfinite(f) & (f > 0)).all():         # Wert auf 0 gekappt o.ä. → Band ohne Aussage
+        return None
+    lo, hi = np.array(band["lo"], dtype=float) * f, np.array(band["hi"], dtype=float) * f
+    return {**band, "lo": [round(float(v), 2) for v in np.minimum(lo, hi)],
+            "hi": [round(float(v), 2) for v in np.maximum(lo, hi)]}
+
+
+def apply(sheet: str, jobs: Sequence[tuple], results: List[ForecastResult],
+          cfg: dict | None = None) -> List[ForecastResult]:
+    """Ergebnisse eines Sheets → gemischte Ergebnisse (gleiche Reihenfolge)."""
+    cfg = cfg or settings(sheet)
+    if not results:
+        return results
+    methods = [m for m in cfg["methods"] if m == "llm" or m in STAT_METHODS]
+    stats   = [m for m in methods if m != "llm"]
+    hist    = np.array([h for _, _, h in jobs], dtype=float)
+
+    llm = matrix(results)
+    llm[[res.source == "baseline" for res in results]] = np.nan
+    preds = np.stack([llm if m == "llm" else STAT_METHODS[m](hist, 3) for m in methods])
+
+    table = weight_table(sheet, methods, cfg)
+    W     = np.stack([table.get(g, table["alle"]) for g in account_groups(hist)])
+    mixed = blend(preds, W)
+
+    # Statistik allein – Maßstab dafür, ob die LLM-Zahl ein Sachverhalts-Effekt ist
+    s_idx = [methods.index(m) for m in stats]
+    stat  = blend(preds[s_idx], W[:, s_idx]) if stats else np.full_like(llm, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dev = np.abs(llm - stat) / np.maximum(np.abs(stat), 1e-9)
+    has_llm = ~np.isnan(llm).any(axis=1)
+    keep    = has_llm & ((np.nan_to_num(dev, nan=np.inf).max(axis=1) > cfg["keep_llm_beyond"])
+                         | (np.abs(llm) <= 1e-9).any(axis=1))
+    keep   |= ~has_llm | np.isnan(mixed).any(axis=1) | (np.abs(np.nan_to_num(hist[:, -1])) <= 1e-9)
+
+    # Vorzeichen von t0 halten: Mischung über 0 hinaus wird bei 0 gekappt
+    sign  = np.sign(np.nan_to_num(hist[:, -1]))[:, None]
+    mixed = np.where(sign > 0, np.maximum(mixed, 0.0), np.minimum(mixed, 0.0))
+
+    out = []
+    for i, res in enumerate(results):
+        if keep[i]:
+            ENSEMBLE.inc(sheet=sheet, result="kept_llm" if has_llm[i] else "kept_baseline")
+            out.append(res)
+            continue
+        w = W[i] * ~np.isnan(preds[:, i, 0])
+        w = w / w.sum()
+        ENSEMBLE.inc(sheet=sheet, result="blended")
+        vals = np.round(mixed[i], 2)
+        out.append(res.replace(**{f"t{k + 1}": float(vals[k]) for k in range(3)},
+                               band=_rescaled(res.band, llm[i], vals),
+                               weights={m: round(float(x), 3) for m, x in zip(methods, w) if x > 0}))
+    return out
+
+
+def update(board: Sequence[dict], alpha: float = DEFAULTS["alpha"]) -> int:
+    """Scoreboard aus backtest.scoreboard() als Methodenfehler übernehmen."""
+    return run_store.update_method_errors(
+        [(b["sheet"], b["type"], b["method"], b["mape"], b["n"])
+         for b in board if b["mape"] is not None], alpha)
+
+
+def learn(records: Sequence[dict], alpha: float = DEFAULTS["alpha"]) -> int:
+    """Vergleiche aus run_store.accuracy() → Fehler der rohen LLM-Antworten je Sheet × Kontogruppe."""
+    recs = [r for r in records if r["llm"] is not None and r["actual"]]
+    if not recs:
+        return 0
+    groups: Dict[tuple, List[float]] = {}
+    types = account_groups(np.array([r["history"] for r in recs], dtype=float))
+    for r, typ in zip(recs, types):
+        ape = abs(r["llm"] - r["actual"]) / abs(r["actual"])
+        for g in ("alle", str(typ)):
+            groups.setdefault((r["sheet"], g), []).append(ape)
+    return run_store.update_method_errors(
+        [(s, g, "llm", float(np.mean(v)), len(v)) for (s, g), v in sorted(groups.items())], alpha)
+
+
+def refresh(src: Path, sheets: Sequence[str]) -> int:
+    """Statistischen Backtest (ohne LLM) rechnen und die Fehler der Statistik nachführen."""
+    from backtest import backtest_sheet, scoreboard
+    from xlsx_stream import preload
+    hists   = preload(src)
+    records = [e for s in sheets if settings(s)["enabled"]
+               for e in backtest_sheet(s, hists[s], use_llm=False)]
+    return update(scoreboard(records), settings("")["alpha"])
@@ -1,16 +1,33 @@
 """
-explanations.py – Llama-3-8B via langchain-ollama & JSON-Output
-==============================================================
-Lieferte bislang bei fehlerhaftem LLM-Output einen Crash, wenn `forecast=[]`.
-Jetzt: robuster Fallback und optionale Übergabe von `forecast`.
+explanations.py – LLM-Prognosen je Konto (Ollama/vLLM über backends.py)
+=======================================================================
+- `explain()` fragt t1–t3 und Begründung einer Zeile ab und liefert ein
+  ForecastResult (Quelle llm/cache/baseline); `explain_monthly()` den
+  Monatshorizont eines Kontos in einem Aufruf als MonthlyResult
+- Prompt = fester Präfix (System + Sachverhalte + Anweisung) + kurzer
+  Konto-Suffix, damit die Backends den Präfix wiederverwenden
+- Antwort-Cache je Prompt-Hash im Prozess und über den Run-Store (frühere Läufe)
+- Modell-Kaskade (`tiers`) mit Prüfung der Antwort; unbrauchbare Antworten
+  und Backend-Fehler → CAGR-Baseline statt Abbruch
+- `ruled()`/`fallback()`/`replay()` erzeugen Ergebnisse ohne LLM-Aufruf,
+  `record()` schreibt den Endstand einer Zeile in Journal, Run-Store und Fortschritt
 """
 
 from __future__ import annotations
-import os, csv, json, warnings, re
+import os, csv, json, warnings, re, hashlib, threading, time
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from langchain_ollama import OllamaLLM
+import journal
+import metrics
+import progress
+import run_store
+import sampling
+from backends import get_pool
+from loader import load_llm_spec
+from profiling import span
+from results import ForecastResult, MonthlyResult
 
 # ---------------- Paths & ENV ----------------
 BASE         = Path(__file__).resolve().parent.parent
@@ -18,8 +35,9 @@ CONTEXT_PATH = BASE / "data" / "cases.csv"
 LLM_LOG_PATH = BASE / "outputs" / "llm_debug.txt"
 
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3:8b")
-OLLAMA_URL   = os.getenv("OLLAMA_URL",   "http://localhost:11434")
 TEMPERATURE  = float(os.getenv("OLLAMA_TEMP", "0.4"))
+CACHE_ON     = os.getenv("FORECAST_CACHE", "1") != "0"
+REASONS_MODE = os.getenv("FORECAST_REASONS", "")      # eager | lazy, überschreibt sheets.yml
 
 # ---------------- Kontexte laden ----------------
 def load_contexts(path: Path) -> List[str]:
@@ -30,17 +48,41 @@ def load_contexts(path: Path) -> List[str]:
 
 _contexts = load_contexts(CONTEXT_PATH)
 
-# ---------------- LLM-Client (Singleton) ----------------
-_llm: OllamaLLM | None = None
-def _get_llm() -> OllamaLLM:
-    global _llm
-    if _llm is None:
-        _llm = OllamaLLM(
-            model       = OLLAMA_MODEL,
-            base_url    = OLLAMA_URL,
-            temperature = TEMPERATURE,
-        )
-    return _llm
+def reload_contexts() -> None:
+    """cases.csv neu einlesen – in place, weil pipeline, rules und impact dieselbe Liste halten."""
+    _contexts[:] = load_contexts(CONTEXT_PATH)
+
+# ---------------- Antwort-Cache (Prompt-Hash → Ergebnis) ----------------
+_cache: Dict[str, ForecastResult] = {}
+_monthly_cache: Dict[str, MonthlyResult] = {}      # Monatshorizont (explain_monthly)
+_cache_lock = threading.Lock()
+# Prompts, die gerade beim LLM sind: gleicher Prompt parallel (z.B. aus einem
+# anderen Szenario des Sweeps) wartet auf das Ergebnis statt erneut zu fragen
+_inflight: Dict[str, threading.Event] = {}
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+def estimate_tokens(text: str) -> int:
+    """Grobe Schätzung (~4 Zeichen/Token), falls das Backend nichts meldet."""
+    return max(1, len(text) // 4)
+
+def _invoke(prompt: str, model: str = OLLAMA_MODEL, seed: Optional[int] = None) -> Tuple[str, int, int]:
+    """LLM-Aufruf über den Backend-Pool → (Rohtext, Prompt-Tokens, Completion-Tokens)."""
+    raw, p_tok, c_tok = get_pool().generate(prompt, model, TEMPERATURE, seed)
+    raw = raw.strip()
+    return (raw,
+            int(p_tok or estimate_tokens(prompt)),
+            int(c_tok or estimate_tokens(raw)))
+
+_log_lock = threading.Lock()
+
+def _log(text: str) -> None:
+    """Debug-Log threadsicher anhängen (explain() läuft parallel)."""
+    with _log_lock:
+        LLM_LOG_PATH.parent.mkdir(exist_ok=True, parents=True)
+        with LLM_LOG_PATH.open("a", encoding="utf-8") as lf:
+            lf.write(text)
 
 # ---------------- Prompt-Templates ----------------
 _SYSTEM_PROMPT = (
@@ -53,23 +95,64 @@ _SYSTEM_PROMPT = (
     "`t1`, `t2`, `t3`, `reason`."
 )
 
-_HUMAN_TEMPLATE = """\
+# Prompt = fester Präfix (System + Sachverhalte + Anweisung) + kurzer Suffix je
+# Konto. Der Präfix ist für alle Aufrufe byte-identisch, damit das Backend den
+# KV-Cache wiederverwenden kann und pro Zeile nur der Suffix gerechnet wird.
+_CONTEXT_BLOCK = """\
 Hier die allgemeinen externen Sachverhalte:
 {contexts}
 
+"""
+
+_YEARLY_INSTRUCTIONS = """\
+Für die unten genannte Bilanzposition liefere bitte:
+1) Prognosewerte für t1, t2, t3 (nur Zahlen)
+2) Eine kurze **account-spezifische** Begründung (`reason`, max. 20 Wörter).
+
+Antworte in diesem JSON-Format:
+{"t1": <Zahl>, "t2": <Zahl>, "t3": <Zahl>, "reason": "<Kurztext>"}
+
+"""
+
+# Nur Zahlen (`reasons: lazy`): kurze Antwort, die Begründung folgt auf Abruf
+# (reasons.py) mit demselben Prompt als Präfix
+_NUMERIC_INSTRUCTIONS = """\
+Für die unten genannte Bilanzposition liefere bitte nur die Prognosewerte
+für t1, t2, t3 (nur Zahlen).
+
+Antworte in diesem JSON-Format:
+{"t1": <Zahl>, "t2": <Zahl>, "t3": <Zahl>}
+
+"""
+
+PENDING_REASON = "Begründung auf Abruf (python scripts/reasons.py)"
+
+_HUMAN_TEMPLATE = """\
 Bilanzposition: **{account}**
 Historische Werte:
 - t-2: {t2:.2f}
 - t-1: {t1:.2f}
 - t0 : {t0:.2f}
+"""
 
-Bitte liefere:
-1) Prognosewerte für t1, t2, t3 (nur Zahlen)  
-2) Eine kurze **account-spezifische** Begründung (`reason`, max. 20 Wörter).
+@lru_cache(maxsize=128)
+def _context_prefix(contexts: Tuple[str, ...]) -> str:
+    """System-Prompt + Sachverhalte – gemeinsamer Präfix aller Prompt-Arten."""
+    return (_SYSTEM_PROMPT + "\n\n"
+            + _CONTEXT_BLOCK.format(contexts="\n".join(f"- {c}" for c in contexts)))
 
-Antworte in diesem JSON-Format:
-{{"t1": <Zahl>, "t2": <Zahl>, "t3": <Zahl>, "reason": "<Kurztext>"}}
-"""
+def shared_prefix(contexts: Optional[List[str]] = None, numeric: bool = False) -> str:
+    """Fester Präfix der Jahres-Prompts (für Warm-up und Token-Schätzung)."""
+    return (_context_prefix(tuple(_contexts if contexts is None else contexts))
+            + (_NUMERIC_INSTRUCTIONS if numeric else _YEARLY_INSTRUCTIONS))
+
+def lazy_reasons(sheet: str = "") -> bool:
+    """Begründungen erst auf Abruf? (`reasons:` im llm-Block, FORECAST_REASONS, --lazy-reasons)"""
+    return (REASONS_MODE or str(load_llm_spec(sheet).get("reasons", "eager"))).lower() == "lazy"
+
+def set_reason_mode(mode: str) -> None:
+    global REASONS_MODE
+    REASONS_MODE = mode
 
 _JSON_CLEAN_RE = re.compile(r".*?(\{.*\})", re.DOTALL)
 
@@ -88,67 +171,327 @@ def _baseline_from_history(history: List[float]) -> List[float]:
     t0_val = history[-1] if history else 0.0
     return [round(t0_val * (1 + growth) ** i, 2) for i in range(1, 4)]
 
+# ---------------- Kaskade: Tiers & Prüfungen ---------------------------------
+def model_tiers(spec: dict) -> List[str]:
+    """Modelle der Kaskade; "$OLLAMA_MODEL" = Modell aus der Umgebung."""
+    tiers = [str(t).replace("$OLLAMA_MODEL", OLLAMA_MODEL) for t in spec.get("tiers") or []]
+    return tiers or [OLLAMA_MODEL]
+
+def check_answer(obj: dict, baseline: List[float], checks: dict) -> Optional[str]:
+    """
+    Prüft eine LLM-Antwort gegen die Baseline. None = ok, sonst Grund.
+    - t1..t3 müssen Zahlen sein
+    - |Prognose − Baseline| ≤ max_deviation × |Baseline| (je Jahr)
+    - Begründung mit mindestens min_reason_words Wörtern
+    """
+    vals = [obj.get(k) for k in ("t1", "t2", "t3")]
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in vals):
+        return "t1–t3 nicht numerisch"
+    max_dev = checks.get("max_deviation")
+    if max_dev is not None:
+        for k, (v, b) in enumerate(zip(vals, baseline), start=1):
+            if abs(v - b) > float(max_dev) * max(abs(b), 1e-9):
+                return f"t{k}={v:.2f} weicht > {float(max_dev):.0%} von Baseline {b:.2f} ab"
+    min_words = int(checks.get("min_reason_words", 1))
+    if len(str(obj.get("reason", "")).split()) < min_words:
+        return f"Begründung kürzer als {min_words} Wörter"
+    return None
+
+def warm_backends(contexts: Optional[List[str]] = None) -> Dict[str, bool]:
+    """Festen Präfix mit dem ersten Kaskaden-Tier auf allen Endpunkten vorrechnen."""
+    return get_pool().warm(shared_prefix(contexts, lazy_reasons()), model_tiers(load_llm_spec(""))[:1])
+
 # ---------------- Öffentliche Funktion --------------------------------------
 def explain(account: str,
             history: List[float],
-            forecast: Optional[List[float]] = None) -> str:
+            forecast: Optional[List[float]] = None,
+            *,
+            sheet: str = "",
+            row: int | None = None,
+            hint: str = "",
+            contexts: Optional[List[str]] = None) -> ForecastResult:
     """
-    Holt Forecast & Reason vom LLM.  Auf Fehler → eigenes JSON mit Baseline-Forecast.
+    Holt Forecast & Reason vom LLM.  Auf Fehler → Ergebnis mit Baseline-Forecast.
+    `sheet`/`row` dienen nur der Zuordnung in Profiling & Logs; `hint` wird bei
+    erneuten Anfragen (Validierung) an den Prompt angehängt; `contexts` ersetzt
+    die Sachverhalte aus cases.csv (Szenario-Sweep).
     """
-    t2, t1, t0 = history
-    contexts_str = "\n".join(f"- {c}" for c in _contexts)
+    t_start = time.perf_counter()
+    with span("explain", sheet=sheet, row=row, account=account):
+        res, key = _explain(account, history, forecast, sheet, hint, contexts)
+    latency = time.perf_counter() - t_start
+    res.latency_ms  = latency * 1000
+    res.prompt_hash = key
+    metrics.EXPLAIN_LATENCY.observe(latency, sheet=sheet, source=res.source)
+    metrics.ROWS.inc(sheet=sheet, source=res.source)
+    progress.answered(sheet, row)
+    return res
 
-    prompt = _SYSTEM_PROMPT + "\n\n" + _HUMAN_TEMPLATE.format(
-        contexts = contexts_str,
-        account  = account,
-        t2       = t2,
-        t1       = t1,
-        t0       = t0,
-    )
 
-    # ---- Debug-Log ----------------------------------------------------------
-    LLM_LOG_PATH.parent.mkdir(exist_ok=True, parents=True)
-    with LLM_LOG_PATH.open("a", encoding="utf-8") as lf:
-        lf.write("\n" + "=" * 60 + "\n")
-        lf.write(f"ACCOUNT: {account}\nPROMPT:\n{prompt}\n")
+def record(sheet: str, row: int | None, account: str, history: List[float],
+           res: ForecastResult) -> None:
+    """
+    Endstand einer Zeile (nach Validierung & Ensemble) ins Journal (crash-sicher),
+    in den Run-Store und den Fortschritts-Strom – damit `--resume`, die
+    Begründungen und die Live-Ansicht dieselben Werte sehen wie das Planwerk.
+    """
+    journal.append(sheet, row, account, history, res.to_json(), res.source, res.latency_ms,
+                   res.prompt_hash)
+    run_store.record(sheet, row, account, history, res, res.prompt_hash)
+    progress.row_done(sheet, row, account, res)
 
-    # ---- Aufruf & Parsing ---------------------------------------------------
+
+def replay(entry: dict, *, sheet: str = "", row: int | None = None) -> ForecastResult:
+    """Zeile aus dem Journal eines unterbrochenen Laufs übernehmen (kein LLM-Aufruf, schon final)."""
+    metrics.ROWS.inc(sheet=sheet, source="journal")
+    res = ForecastResult.from_json(entry["json"], entry["source"],
+                                   latency_ms=entry.get("latency_ms", 0.0),
+                                   prompt_hash=entry.get("hash", ""))
+    run_store.record(sheet, row, entry["account"], entry["history"], res, entry.get("hash", ""))
+    progress.row_done(sheet, row, entry["account"], res)
+    return res
+
+
+def fallback(account: str, history: List[float], note: str = "") -> ForecastResult:
+    """Baseline für eine verworfene LLM-Antwort."""
+    return ForecastResult.of(_baseline_from_history(history),
+                             f"CAGR-Baseline für {account}" + (f" ({note})" if note else ""), "baseline")
+
+
+def ruled(values: List[float], reason: str, *, sheet: str = "",
+          source: str = "rule") -> ForecastResult:
+    """Deterministisches Ergebnis (Regel aus rules.py, Roll-up aus hierarchy.py) – ohne LLM-Aufruf."""
+    metrics.ROWS.inc(sheet=sheet, source=source)
+    return ForecastResult.of(values, reason, source)
+
+
+def build_prompt(account: str, history: List[float], hint: str = "",
+                 contexts: Optional[List[str]] = None, numeric: bool = False) -> str:
+    """
+    Vollständiger Jahres-Prompt: fester Präfix + Konto-Suffix (+ optionaler Hinweis).
+    Andere Historienlängen als t-2..t0 (z.B. Backtest ab t-1) werden relativ zum
+    letzten Wert (= t0) beschriftet.
+    """
+    if len(history) == 3:
+        t2, t1, t0 = history
+        suffix = _HUMAN_TEMPLATE.format(account=account, t2=t2, t1=t1, t0=t0)
+    else:
+        n      = len(history)
+        suffix = f"Bilanzposition: **{account}**\nHistorische Werte:\n" + "".join(
+            f"- {f't-{n - 1 - i}' if i < n - 1 else 't0 '}: {v:.2f}\n" for i, v in enumerate(history))
+    return shared_prefix(contexts, numeric) + suffix + (f"\n{hint}\n" if hint else "")
+
+
+def _explain(account: str,
+             history: List[float],
+             forecast: Optional[List[float]],
+             sheet: str,
+             hint: str = "",
+             contexts: Optional[List[str]] = None) -> Tuple[ForecastResult, str]:
+    """Liefert (Ergebnis, Prompt-Hash) mit Quelle ∈ {llm, cache, baseline}."""
+    with span("prompt"):
+        prompt = build_prompt(account, history, hint, contexts, numeric=lazy_reasons(sheet))
+
+    # ---- Cache (Stichproben-Antworten getrennt von Einzel-Antworten) --------
+    k     = sampling.samples(sheet)
+    key   = prompt_key(prompt if k == 1 else f"{prompt}\n[samples={k}]")
+    owner = False
+    if CACHE_ON:
+        cached = _cached(key)
+        if cached is None:
+            with _cache_lock:
+                waiter = _inflight.get(key)
+                if waiter is None:
+                    _inflight[key] = threading.Event()
+                    owner = True
+            if waiter is not None:              # gleicher Prompt läuft schon → abwarten
+                waiter.wait()
+                cached = _cached(key)
+        metrics.CACHE_REQUESTS.inc(result="hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached.replace(source="cache"), key
     try:
-        raw = _get_llm().invoke(prompt).strip()
+        return _ask(account, history, forecast, sheet, prompt, key)
+    finally:
+        if owner:
+            with _cache_lock:
+                _inflight.pop(key).set()
 
-        # Log:
-        with LLM_LOG_PATH.open("a", encoding="utf-8") as lf:
-            lf.write("\nRAW_RESPONSE:\n" + raw + "\n")
 
-        # JSON herausfiltern
-        m = _JSON_CLEAN_RE.match(raw)
-        if not m:
-            raise ValueError("Kein JSON-Block gefunden")
+def _cached(key: str) -> Optional[ForecastResult]:
+    """Antwort aus dem Prozess-Cache, sonst aus früheren Läufen im Run-Store."""
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is None:
+        cached = run_store.lookup_cached(key)
+        if cached is not None:
+            with _cache_lock:
+                _cache[key] = cached
+    return cached
+
+
+def _parse_answer(raw: str) -> dict:
+    """JSON-Block aus der Rohantwort herausfiltern."""
+    m = _JSON_CLEAN_RE.match(raw)
+    if not m:
+        raise ValueError("Kein JSON-Block gefunden")
+    with span("json_parse"):
+        obj = json.loads(m.group(1))
+    if not isinstance(obj, dict):
+        raise ValueError("JSON ist kein Objekt")
+    return obj
+
+
+def _ask(account: str, history: List[float], forecast: Optional[List[float]],
+         sheet: str, prompt: str, key: str) -> Tuple[ForecastResult, str]:
+    """Kaskade über die Modell-Tiers; bei Fehlern Baseline."""
+    # ---- Debug-Log ----------------------------------------------------------
+    _log("\n" + "=" * 60 + "\n" + f"ACCOUNT: {account}\nPROMPT:\n{prompt}\n")
+
+    # ---- Kaskade: kleines Modell zuerst, Eskalation nur bei Prüf-Fehler -----
+    baseline = forecast if forecast and len(forecast) >= 3 else _baseline_from_history(history)
+    spec     = load_llm_spec(sheet)
+    checks   = spec.get("checks") or {}
+    numeric  = lazy_reasons(sheet)
+    if numeric:                                     # Begründung kommt später
+        checks = {**checks, "min_reason_words": 0}
+    tiers    = model_tiers(spec)
+    s_cfg    = sampling.settings(sheet)
+    k        = sampling.samples(sheet)
+    last_err: Exception | None = None
+    tokens   = [0, 0]                               # Prompt/Completion über alle Tiers
+    for tier, model in enumerate(tiers, start=1):
+        final = tier == len(tiers)
+        try:
+            # K > 1: Stichproben mit verschiedenen Seeds gleichzeitig (sampling.py)
+            with span("llm", model=model, tier=tier, samples=k):
+                answers = (sampling.draw(_invoke, prompt, model, k, int(s_cfg["seed"])) if k > 1
+                           else [_invoke(prompt, model)])
+            got = [a for a in answers if not isinstance(a, Exception)]
+            if not got:
+                raise answers[0]
+            p_tok, c_tok = sum(a[1] for a in got), sum(a[2] for a in got)
+            metrics.PROMPT_TOKENS.inc(p_tok, sheet=sheet)
+            metrics.COMPLETION_TOKENS.inc(c_tok, sheet=sheet)
+            tokens[0] += p_tok
+            tokens[1] += c_tok
+
+            objs, errs = [], []
+            for raw, _, _ in got:
+                _log(f"\nRAW_RESPONSE ({model}):\n" + raw + "\n")
+                try:
+                    objs.append(_parse_answer(raw))
+                except ValueError as e:
+                    errs.append(e)
+            if not objs:
+                raise errs[0]
+            obj = objs[0]
+            if len(objs) > 1:
+                obj, band = sampling.combine(objs, s_cfg["quantiles"])
+                obj = {**obj, "band": band} if band else obj
+            problem = check_answer(obj, baseline, checks)
+        except Exception as e:
+            last_err, problem = e, f"{e!s}"
+            obj = None
 
-        json_text = m.group(1)
-        json.loads(json_text)           # Validierungs-Probe
-        return json_text
+        if obj is not None and (problem is None or final):
+            if problem:
+                _log(f"\nCHECK ({model}, letzter Tier – übernommen): {problem}\n")
+            metrics.CASCADE.inc(sheet=sheet, tier=tier, model=model, result="accepted")
+            res = ForecastResult.from_obj(obj, "llm", prompt_tokens=tokens[0],
+                                          completion_tokens=tokens[1])
+            if numeric:
+                res.reason = PENDING_REASON
+                run_store.remember_prompt(key, prompt, model)
+            run_store.remember_answer(key, res)
+            if CACHE_ON:
+                with _cache_lock:
+                    _cache[key] = res.replace(prompt_tokens=0, completion_tokens=0)
+            return res, key
+
+        metrics.CASCADE.inc(sheet=sheet, tier=tier, model=model,
+                            result="error" if final else "escalated")
+        _log(f"\n{'ERROR during explain()' if final else f'ESKALATION ({model})'}: {problem}\n")
 
     # ---- Fallback -----------------------------------------------------------
-    except Exception as e:
-        with LLM_LOG_PATH.open("a", encoding="utf-8") as lf:
-            lf.write(f"\nERROR during explain(): {e}\n")
-
-        warnings.warn(
-            f"Ollama/LangChain Fehler: {e!s} – liefere Fallback-Forecast",
-            stacklevel=2,
-        )
-
-        # Baseline bestimmen
-        baseline = forecast if forecast and len(forecast) >= 3 else _baseline_from_history(history)
-        f1, f2, f3 = baseline[:3]
-
-        return json.dumps(
-            {
-                "t1": f1,
-                "t2": f2,
-                "t3": f3,
-                "reason": f"CAGR-Baseline für {account}",
-            },
-            ensure_ascii=False,
-        )
+    warnings.warn(
+        f"Ollama/LangChain Fehler: {last_err or problem!s} – liefere Fallback-Forecast",
+        stacklevel=4,
+    )
+    return ForecastResult.of(baseline[:3], f"CAGR-Baseline für {account}", "baseline",
+                             prompt_tokens=tokens[0], completion_tokens=tokens[1]), key
+
+
+# ---------------- Monatshorizont: alle Monate eines Kontos in einem Aufruf ----
+_MONTHLY_TEMPLATE = """\
+Bilanzposition: **{account}**
+Monatswerte der Historie (ältester zuerst):
+{history}
+
+Statistische Basis-Prognose für die nächsten {periods} Monate:
+{baseline}
+
+Bitte liefere in **einer** Antwort alle {periods} Monatswerte (t1 Monat 1 … t3 Monat 12)
+und eine kurze **account-spezifische** Begründung (`reason`, max. 20 Wörter).
+
+Antworte in diesem JSON-Format:
+{{"months": [<{periods} Zahlen>], "reason": "<Kurztext>"}}
+"""
+
+def explain_monthly(account: str,
+                    monthly_history: List[float],
+                    baseline: List[float],
+                    *,
+                    sheet: str = "",
+                    row: int | None = None,
+                    contexts: Optional[List[str]] = None) -> MonthlyResult:
+    """
+    Ein LLM-Aufruf pro Konto für den gesamten Monatshorizont → MonthlyResult;
+    bei Fehlern oder falscher Länge die übergebene (vektorisierte) Baseline.
+    `contexts` ersetzt die Sachverhalte aus cases.csv (Szenario-Sweep).
+    """
+    periods = len(baseline)
+    prompt  = _context_prefix(tuple(_contexts if contexts is None else contexts)) + _MONTHLY_TEMPLATE.format(
+        account  = account,
+        history  = ", ".join(f"{v:.2f}" for v in monthly_history),
+        baseline = ", ".join(f"{v:.2f}" for v in baseline),
+        periods  = periods,
+    )
+    key     = prompt_key(prompt)
+    t_start = time.perf_counter()
+
+    with span("explain_monthly", sheet=sheet, row=row, account=account):
+        with _cache_lock:
+            res = _monthly_cache.get(key) if CACHE_ON else None
+        if CACHE_ON:
+            metrics.CACHE_REQUESTS.inc(result="hit" if res else "miss")
+        if res is not None:
+            res = res.replace(source="cache")
+        else:
+            try:
+                with span("llm"):
+                    raw, p_tok, c_tok = _invoke(prompt)
+                metrics.PROMPT_TOKENS.inc(p_tok, sheet=sheet)
+                metrics.COMPLETION_TOKENS.inc(c_tok, sheet=sheet)
+                m = _JSON_CLEAN_RE.match(raw)
+                if not m:
+                    raise ValueError("Kein JSON-Block gefunden")
+                obj = json.loads(m.group(1))
+                months = obj.get("months")
+                if (not isinstance(months, list) or len(months) != periods
+                        or not all(isinstance(v, (int, float)) for v in months)):
+                    raise ValueError(f"'months' hat nicht {periods} Zahlen")
+                res = MonthlyResult(months, str(obj.get("reason", "")), "llm")
+                if CACHE_ON:
+                    with _cache_lock:
+                        _monthly_cache[key] = res.replace()
+            except Exception as e:
+                _log(f"\nERROR during explain_monthly({account}): {e}\n")
+                res = MonthlyResult([round(v, 2) for v in baseline],
+                                    f"Saisonale Monats-Baseline für {account}", "baseline")
+
+    latency = time.perf_counter() - t_start
+    res.latency_ms = latency * 1000
+    metrics.EXPLAIN_LATENCY.observe(latency, sheet=sheet, source=res.source)
+    metrics.ROWS.inc(sheet=sheet, source=res.source)
+    return res
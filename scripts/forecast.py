@@ -12,3 +12,74 @@ def cagr(start: float, end: float, years: int) -> float:
 
 def project(end_val: float, growth: float, horizon: int = 3) -> List[float]:
     return [end_val * (1 + growth) ** i for i in range(1, horizon + 1)]
+
+def cagr_baseline(hist: np.ndarray, horizon: int = 3) -> np.ndarray:
+    """
+    Vektorisierte CAGR-Baseline für alle Konten: hist = Konten × [t-2, t-1, t0].
+    Wachstum t-2→t0 (0, wenn t-2 = 0 oder Vorzeichenwechsel), Ergebnis Konten × horizon.
+    """
+    hist = np.asarray(hist, dtype=float)
+    t2, t0 = hist[:, 0], hist[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        g = np.where((np.abs(t2) > 1e-12) & (t0 / t2 > 0),
+                     np.power(t0 / t2, 1 / (hist.shape[1] - 1)) - 1, 0.0)
+    g = np.nan_to_num(g)
+    steps = np.arange(1, horizon + 1)
+    return np.nan_to_num(t0)[:, None] * np.power(1 + g[:, None], steps[None, :])
+
+# ---------------- Statistische Methoden (vektorisiert, Konten × Perioden) ----
+def naive_forecast(hist: np.ndarray, horizon: int = 3) -> np.ndarray:
+    """Letzter Wert fortgeschrieben."""
+    hist = np.nan_to_num(np.asarray(hist, dtype=float))
+    return np.repeat(hist[:, -1:], horizon, axis=1)
+
+def mean_forecast(hist: np.ndarray, horizon: int = 3) -> np.ndarray:
+    """Mittelwert der Historie."""
+    hist = np.nan_to_num(np.asarray(hist, dtype=float))
+    return np.repeat(hist.mean(axis=1, keepdims=True), horizon, axis=1)
+
+def trend_forecast(hist: np.ndarray, horizon: int = 3) -> np.ndarray:
+    """Lineare Regression über die Historie, fortgeschrieben."""
+    hist = np.nan_to_num(np.asarray(hist, dtype=float))
+    m    = hist.shape[1]
+    x    = np.arange(m) - (m - 1) / 2
+    b    = (hist * x).sum(axis=1) / max((x ** 2).sum(), 1e-12)
+    a    = hist.mean(axis=1)
+    return a[:, None] + b[:, None] * (x[-1] + np.arange(1, horizon + 1))[None, :]
+
+STAT_METHODS = {
+    "naiv":   naive_forecast,
+    "cagr":   cagr_baseline,
+    "trend":  trend_forecast,
+    "mittel": mean_forecast,
+}
+
+def account_groups(hist: np.ndarray, flat_tol: float = 0.005) -> np.ndarray:
+    """Kontogruppe aus dem Verlauf der Historie: konstant/wachsend/fallend/wechselnd."""
+    hist = np.nan_to_num(np.asarray(hist, dtype=float))
+    first, last = hist[:, 0], hist[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel = (last - first) / np.abs(first)
+    flip = (np.sign(hist) != np.sign(hist[:, :1])).any(axis=1) | (first == 0)
+    return np.select([flip, np.abs(np.nan_to_num(rel)) <= flat_tol * (hist.shape[1] - 1), rel > 0],
+                     ["wechselnd", "konstant", "wachsend"], "fallend")
+
+# ---------------- Ensemble ---------------------------------------------------
+def inverse_error_weights(errors: np.ndarray, power: float = 1.0, eps: float = 1e-3) -> np.ndarray:
+    """Fehler (…, Methoden) → Gewichte ∝ 1/(Fehler + eps)^power, Summe 1; NaN → Gewicht 0."""
+    errors = np.asarray(errors, dtype=float)
+    w   = np.where(np.isnan(errors), 0.0, 1.0 / np.power(np.abs(errors) + eps, power))
+    tot = w.sum(axis=-1, keepdims=True)
+    return np.divide(w, tot, out=np.zeros_like(w), where=tot > 0)
+
+def blend(preds: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    preds: Methoden × Konten × Horizont (NaN = Methode fehlt für die Zeile),
+    weights: Konten × Methoden. Fehlende Methoden werden je Zeile
+    herausgerechnet und die übrigen Gewichte neu normiert.
+    """
+    preds = np.asarray(preds, dtype=float)
+    w     = np.asarray(weights, dtype=float).T[:, :, None] * ~np.isnan(preds)
+    tot   = w.sum(axis=0)
+    num   = np.einsum("mnh,mnh->nh", np.nan_to_num(preds), w)
+    return np.divide(num, tot, out=np.full(tot.shape, np.nan), where=tot > 0)
@@ -0,0 +1,172 @@
+"""
+hierarchy.py – Summenkonten bottom-up aus ihren Einzelkonten
+============================================================
+Summenzeilen wie "Umsatzerlöse" oder "Materialaufwand" in PnL (2) sind die
+Summe von Einzelkonten in REV_sbE (2)/COGS (2). Statt sie zusätzlich (und
+unabhängig) vom LLM schätzen zu lassen, definiert der `hierarchy:`-Block in
+sheets.yml Eltern ← Kinder (auch über Sheets hinweg):
+
+- Eltern-Zeilen gehen nie ans LLM: Wert = C @ Kinder-Prognosen, eine
+  Matrix-Operation je Sheet (C = Vorzeichen, Eltern × Kinder)
+- Kinder-Prognosen kommen aus dem laufenden Lauf (pipeline.explain_rows merkt
+  sie sich); fehlen sie, weil das Kinder-Sheet noch nicht dran war, werden sie
+  hier über explain_rows() geholt und vom Kinder-Sheet einmal übernommen –
+  nur bei unveränderter Historie
+- Der Speicher gilt für einen Lauf: `reset()` zu Beginn jedes Laufs bzw. Jobs
+  (main.run_writers, service, sweep); `with scope():` gibt einem Block einen
+  eigenen Speicher (Zeilen-Jobs des Dienstes neben einem laufenden Planwerk)
+- Kinder ohne Prognose (keine Forecast-Zeile, Historie fehlt) zählen wie leere
+  Excel-Zellen als 0; Eltern können selbst wieder Kinder sein (ohne Zyklen)
+- Der Sheet-Scheduler (scheduler.py) lässt Kinder-Sheets vor ihren Eltern laufen
+"""
+
+from __future__ import annotations
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import xlsx_stream
+from explanations import ruled
+from loader import load_config, parse_ref
+from results import ForecastResult, matrix
+
+Key = Tuple[str, int]                              # (Sheet, Zeile)
+
+
+class _Scope:
+    """Roll-up-Speicher eines Laufs bzw. Jobs."""
+    __slots__ = ("lock", "store", "pulled")
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.store: Dict[tuple, ForecastResult] = {}                # (Sachverhalte, Sheet, Zeile) → Ergebnis
+        self.pulled: Dict[tuple, Tuple[tuple, ForecastResult]] = {}  # für ein Roll-up vorgezogen → (Historie, Ergebnis)
+
+
+_run   = _Scope()                                  # Standard: der laufende Lauf (auch in Sheet-Threads)
+_scope: ContextVar[_Scope] = ContextVar("hierarchy_scope", default=_run)
+
+
+@contextmanager
+def scope():
+    """Eigener Roll-up-Speicher für den Block (im aufrufenden Thread)."""
+    token = _scope.set(_Scope())
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def load_hierarchy() -> Dict[Key, List[Tuple[float, Key]]]:
+    """Eltern → [(Vorzeichen, Kind)] aus sheets.yml; Zyklen sind ein Konfigurationsfehler."""
+    tree: Dict[Key, List[Tuple[float, Key]]] = {}
+    for parent, children in (load_config().get("hierarchy") or {}).items():
+        _, p_sheet, p_rows = parse_ref(parent)
+        kids = [(sign, (sheet, r)) for ref in children or []
+                for sign, sheet, rows in [parse_ref(ref)] for r in rows]
+        for r in p_rows:
+            tree[(p_sheet, r)] = kids
+
+    def visit(key: Key, path: Tuple[Key, ...]) -> None:
+        if key in path:
+            raise ValueError(f"Hierarchie-Zyklus: {' → '.join(f'{s}!{r}' for s, r in path + (key,))}")
+        for _, kid in tree.get(key, []):
+            visit(kid, path + (key,))
+    for key in tree:
+        visit(key, ())
+    return tree
+
+
+def parents(sheet: str) -> set:
+    """Zeilen eines Sheets, die per Roll-up entstehen."""
+    return {r for s, r in load_hierarchy() if s == sheet}
+
+
+def _ctx(contexts: Optional[Sequence[str]]) -> Optional[tuple]:
+    return None if contexts is None else tuple(contexts)
+
+
+def remember(sheet: str, results: Dict[int, ForecastResult],
+             contexts: Optional[Sequence[str]] = None) -> None:
+    sc = _scope.get()
+    with sc.lock:
+        for r, res in results.items():
+            sc.store[(_ctx(contexts), sheet, r)] = res
+
+
+def known(sheet: str, jobs: Sequence[tuple],
+          contexts: Optional[Sequence[str]] = None) -> Dict[int, ForecastResult]:
+    """
+    Für ein Roll-up im selben Lauf vorgezogene Kinder-Zeilen – werden nicht
+    erneut angefragt. Nur bei gleicher Historie und nur einmal (danach gilt
+    wieder der normale Weg über das LLM).
+    """
+    out = {}
+    sc  = _scope.get()
+    with sc.lock:
+        for r, _, hist in jobs:
+            k = (_ctx(contexts), sheet, r)
+            if k in sc.pulled and sc.pulled[k][0] == tuple(hist):
+                out[r] = sc.pulled.pop(k)[1]
+    return out
+
+
+def values(keys: Sequence[Key], contexts: Optional[Sequence[str]] = None) -> np.ndarray:
+    """Prognosen t1..t3 beliebiger Konten (Konten × 3); fehlende Sheets werden nachgerechnet."""
+    from pipeline import explain_rows, sheet_jobs
+    sc  = _scope.get()
+    ctx = _ctx(contexts)
+    with sc.lock:
+        missing: Dict[str, List[int]] = {}
+        for s, r in keys:
+            if (ctx, s, r) not in sc.store:
+                missing.setdefault(s, []).append(r)
+    # Nachrechnen ohne Sperre: LLM-Aufrufe blockieren keine anderen Sheets
+    hists  = xlsx_stream.preload() if missing else {}
+    pulled = {}
+    for s, rows in missing.items():
+        jobs, _ = sheet_jobs(s, hists[s], rows)
+        got     = explain_rows(s, jobs, list(contexts) if contexts is not None else None)
+        pulled.update({(ctx, s, r): (tuple(hist), got[r]) for r, _, hist in jobs if r in got})
+    empty = ForecastResult(None, None, None)
+    with sc.lock:
+        for k, v in pulled.items():
+            sc.pulled.setdefault(k, v)
+        found = [sc.store.get((ctx, s, r), empty) for s, r in keys]
+    return np.nan_to_num(matrix(found))
+
+
+def apply(sheet: str, jobs: Sequence[tuple],
+          contexts: Optional[Sequence[str]] = None) -> Dict[int, ForecastResult]:
+    """Eltern-Zeilen eines Sheets per Roll-up → {Zeile: Ergebnis}."""
+    tree = load_hierarchy()
+    mine = [(r, acc, hist) for r, acc, hist in jobs if (sheet, r) in tree]
+    if not mine:
+        return {}
+    keys  = sorted({kid for r, _, _ in mine for _, kid in tree[(sheet, r)]})
+    index = {k: i for i, k in enumerate(keys)}
+    C     = np.zeros((len(mine), len(keys)))
+    for j, (r, _, _) in enumerate(mine):
+        for sign, kid in tree[(sheet, r)]:
+            C[j, index[kid]] += sign
+    plan = np.round(C @ values(keys, contexts), 2)
+    return {r: ruled([float(v) for v in plan[j]], _describe(tree[(sheet, r)]),
+                     sheet=sheet, source="rollup")
+            for j, (r, _, _) in enumerate(mine)}
+
+
+def _describe(kids: Sequence[Tuple[float, Key]]) -> str:
+    by_sheet: Dict[str, List[str]] = {}
+    for sign, (s, r) in kids:
+        by_sheet.setdefault(s, []).append(f"{'−' if sign < 0 else ''}{r}")
+    return "Summe der Einzelkonten: " + "; ".join(f"{s} Zeilen {', '.join(rs)}" for s, rs in by_sheet.items())
+
+
+def reset() -> None:
+    sc = _scope.get()
+    with sc.lock:
+        sc.store.clear()
+        sc.pulled.clear()
@@ -0,0 +1,197 @@
+"""
+impact.py – Wirkungsmatrix Sachverhalt × Konto
+==============================================
+Bisher bekommt jeder explain()-Aufruf alle Sachverhalte aus cases.csv und das
+LLM entscheidet je Konto neu, welche davon greifen (Konten × Sachverhalte).
+Ein Vorlauf fragt das LLM stattdessen **einmal je Sachverhalt**, welche Konten
+er betrifft:
+
+- Ergebnis: dünn besetzte Matrix {Sachverhalt: {(Sheet, Zeile)}}
+- Jahres-Prompts enthalten danach nur die passenden Sachverhalte (Reihenfolge
+  wie in cases.csv); Konten mit gleichem Treffer-Set teilen ihren Präfix
+- Cache: outputs/impact_matrix.json, Schlüssel je Sachverhalt = Hash aus Text,
+  Kontenkatalog, sheets.yml und Modell → geänderte Sachverhalte werden neu
+  angefragt, jede Änderung an sheets.yml verwirft alle Einträge
+- Schlägt eine Anfrage fehl, gilt der Sachverhalt für alle Konten (wie bisher)
+  und wird beim nächsten Lauf erneut angefragt
+
+Einstellungen im `impact:`-Block von sheets.yml.
+"""
+
+from __future__ import annotations
+import hashlib, json, threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import metrics
+from backends import get_pool
+from explanations import _JSON_CLEAN_RE, _contexts, _invoke, _log, model_tiers, warm_backends
+from loader import CFG_FILE, load_llm_spec, load_sheet_block, load_sheet_specs
+
+BASE        = Path(__file__).resolve().parent.parent
+MATRIX_PATH = BASE / "outputs" / "impact_matrix.json"
+
+DEFAULTS = {"enabled": True, "warm_top": 8}
+
+Account = Tuple[str, int]                           # (Sheet, Zeile)
+
+_lock = threading.Lock()
+_mem:  Dict[Tuple[str, ...], Dict[str, Optional[FrozenSet[Account]]]] = {}
+
+_PROMPT = """\
+Du bist ein deutschsprachiger Finanzcontroller. Unten stehen ein externer
+Sachverhalt und eine nummerierte Liste von Planungspositionen (Sheet: Konto).
+Welche Positionen werden durch den Sachverhalt in ihren Planwerten t1–t3
+direkt oder über naheliegende Folgewirkungen beeinflusst?
+
+Antworte **nur** im JSON-Format: {{"accounts": [<Nummern>]}}
+
+Sachverhalt:
+{case}
+
+Positionen:
+{catalog}
+"""
+
+
+def settings() -> dict:
+    return {**DEFAULTS, **load_sheet_block("impact", "")}
+
+
+def catalog() -> List[Tuple[str, int, str]]:
+    """Alle Forecast-Konten aller Sheets als (Sheet, Zeile, Kontotext)."""
+    from pipeline import account_map
+    return [(sheet, row, text) for sheet in load_sheet_specs()
+            for row, (text, cat) in sorted(account_map(sheet).items()) if cat == "forecast"]
+
+
+def _model() -> str:
+    return model_tiers(load_llm_spec(""))[-1]        # großes Modell: nur wenige Aufrufe
+
+
+def _key(case: str, stamp: str) -> str:
+    return hashlib.sha256(f"{stamp}\n{case}".encode("utf-8")).hexdigest()
+
+
+def _stamp(cat: Sequence[Tuple[str, int, str]]) -> str:
+    h = hashlib.sha256(CFG_FILE.read_bytes())
+    h.update(json.dumps(list(cat), ensure_ascii=False).encode("utf-8"))
+    h.update(_model().encode("utf-8"))
+    return h.hexdigest()
+
+
+def _load(path: Path = MATRIX_PATH) -> Dict[str, dict]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))["entries"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def _save(entries: Dict[str, dict], path: Path = MATRIX_PATH) -> None:
+    path.parent.mkdir(exist_ok=True, parents=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"entries": entries}, ensure_ascii=False, indent=1), encoding="utf-8")
+    tmp.replace(path)
+
+
+def _ask(case: str, cat: Sequence[Tuple[str, int, str]]) -> Optional[List[int]]:
+    """Ein LLM-Aufruf je Sachverhalt → Indizes der betroffenen Konten (None = Fehler)."""
+    prompt = _PROMPT.format(case=case, catalog="\n".join(
+        f"{i}. {sheet}: {text}" for i, (sheet, _, text) in enumerate(cat, start=1)))
+    try:
+        raw, p_tok, c_tok = _invoke(prompt, _model())
+        metrics.PROMPT_TOKENS.inc(p_tok, sheet="impact")
+        metrics.COMPLETION_TOKENS.inc(c_tok, sheet="impact")
+        m = _JSON_CLEAN_RE.match(raw)
+        if not m:
+            raise ValueError("Kein JSON-Block gefunden")
+        nums = json.loads(m.group(1)).get("accounts")
+        if not isinstance(nums, list):
+            raise ValueError("'accounts' fehlt")
+        return sorted({int(n) - 1 for n in nums if str(n).isdigit() and 1 <= int(n) <= len(cat)})
+    except Exception as e:
+        _log(f"\nERROR during impact({case[:60]}…): {e}\n")
+        return None
+
+
+def matrix(contexts: Optional[Sequence[str]] = None,
+           build: bool = True) -> Dict[str, Optional[FrozenSet[Account]]]:
+    """
+    Sachverhalt → betroffene Konten (None = alle). Aus Speicher oder Datei;
+    fehlende Sachverhalte werden mit `build` parallel beim LLM angefragt.
+    """
+    ctx = tuple(_contexts if contexts is None else contexts)
+    with _lock:
+        if ctx in _mem:
+            return _mem[ctx]
+        cat     = catalog()
+        stamp   = _stamp(cat)
+        entries = _load()
+        keys    = {case: _key(case, stamp) for case in ctx}
+        todo    = [case for case in ctx if keys[case] not in entries]
+        if todo and build:
+            n = max(1, min(get_pool().capacity, len(todo)))
+            with ThreadPoolExecutor(max_workers=n, thread_name_prefix="impact") as ex:
+                answers = list(ex.map(lambda c: _ask(c, cat), todo))
+            for case, idx in zip(todo, answers):
+                if idx is not None:
+                    entries[keys[case]] = {"case": case, "accounts": [list(cat[i]) for i in idx]}
+            # nur Einträge mit aktuellem Stempel behalten (alte sheets.yml/Modelle fallen weg)
+            current = {_key(e["case"], stamp) for e in entries.values()}
+            _save({k: v for k, v in entries.items() if k in current})
+            hits = sum(len(e["accounts"]) for k, e in entries.items() if k in keys.values())
+            print(f"🧭 Wirkungsmatrix: {len(ctx)} Sachverhalte × {len(cat)} Konten, "
+                  f"{hits} Treffer, {len(todo)} angefragt, "
+                  f"{sum(a is None for a in answers)} ohne Antwort (→ alle Konten)")
+        out = {case: (frozenset((s, r) for s, r, _ in entries[keys[case]]["accounts"])
+                      if keys[case] in entries else None)
+               for case in ctx}
+        if build:
+            _mem[ctx] = out
+        return out
+
+
+def select(sheet: str, row: int, contexts: Optional[Sequence[str]] = None,
+           build: bool = True) -> List[str]:
+    """Nur die Sachverhalte, die dieses Konto betreffen (Reihenfolge wie in cases.csv)."""
+    ctx = list(_contexts if contexts is None else contexts)
+    if not ctx or not settings().get("enabled", True):
+        return ctx
+    return [case for case, hit in matrix(ctx, build).items() if hit is None or (sheet, row) in hit]
+
+
+def contexts_for(sheet: str, jobs: Sequence[tuple],
+                 contexts: Optional[Sequence[str]] = None) -> List[Optional[List[str]]]:
+    """Sachverhalte je Job; None = unverändert (Wirkungsmatrix abgeschaltet)."""
+    if not settings().get("enabled", True):
+        return [None if contexts is None else list(contexts)] * len(jobs)
+    return [select(sheet, r, contexts) for r, _, _ in jobs]
+
+
+def subsets(contexts: Optional[Sequence[str]] = None) -> List[Tuple[List[str], int]]:
+    """Verschiedene Sachverhalts-Kombinationen über alle Konten, häufigste zuerst."""
+    ctx    = list(_contexts if contexts is None else contexts)
+    counts: Dict[Tuple[str, ...], int] = {}
+    for sheet, row, _ in catalog():
+        key = tuple(select(sheet, row, ctx))
+        counts[key] = counts.get(key, 0) + 1
+    return [(list(k), n) for k, n in sorted(counts.items(), key=lambda kv: -kv[1])]
+
+
+def warm(contexts: Optional[Sequence[str]] = None) -> Dict[str, bool]:
+    """Präfixe der häufigsten Kombinationen vorwärmen (statt eines festen Präfixes)."""
+    cfg = settings()
+    if not cfg.get("enabled", True):
+        return warm_backends(None if contexts is None else list(contexts))
+    status: Dict[str, bool] = {}
+    for subset, _ in subsets(contexts)[:int(cfg["warm_top"])]:
+        for url, ok in warm_backends(subset).items():
+            status[url] = status.get(url, True) and ok
+    return status
+
+
+def reset() -> None:
+    """Speicher-Cache leeren (z.B. nach Reload von sheets.yml im Dienst)."""
+    with _lock:
+        _mem.clear()
@@ -0,0 +1,218 @@
+"""
+ingest.py – Historie aus ERP-Exporten (CSV, Parquet, SQLite)
+============================================================
+Die Ist-Werte kommen in der Praxis als ERP-Export, nicht als Excel. Statt sie
+erst in die Vorlage zu kopieren, liest `read_history()` sie direkt in die
+`SheetHistory`-Struktur (Konto × t-2/t-1/t0), mit der alle Writer arbeiten:
+
+- Quelle und Spalten-Mapping je Sheet im `ingest:`-Block von sheets.yml
+  (global `source: excel` = wie bisher aus der Vorlage)
+- Nur die benötigten Spalten werden gelesen – spaltenweise über pyarrow
+  (Parquet immer, CSV wenn installiert), sonst csv-Modul bzw. sqlite3
+- Breites Format (eine Spalte je Periode) oder langes Format
+  (`period` + `value`, eine Zeile je Konto × Periode); mehrere Buchungen
+  desselben Kontos werden summiert (np.unique + np.add.at)
+- Zuordnung zur Excel-Zeile über die Spalte `row` oder über den Kontotext
+  (config/<sheet>_accounts.csv); mehrdeutige Texte bleiben leer → Warnung
+- Die Vorlage liefert nur noch das Layout (Header, Spalten) für die Ausgabe
+"""
+
+from __future__ import annotations
+import csv, sqlite3, warnings
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from loader import load_sheet_block
+from xlsx_stream import SRC_XLSX, SheetHistory, read_layout
+
+BASE    = Path(__file__).resolve().parent.parent
+PERIODS = ("t-2", "t-1", "t0")
+
+DEFAULTS = {
+    "source":  "excel",
+    "sep":     ",",
+    "decimal": ".",
+    "encoding": "utf-8",
+}
+
+
+def settings(sheet: str) -> dict:
+    return {**DEFAULTS, **load_sheet_block("ingest", sheet)}
+
+
+def configured(sheet: str) -> bool:
+    """True, wenn das Sheet nicht aus der Excel-Vorlage gelesen wird."""
+    return str(settings(sheet).get("source") or "excel").lower() != "excel"
+
+
+def _source(cfg: dict) -> Path:
+    path = Path(cfg["source"])
+    return path if path.is_absolute() else BASE / path
+
+
+def _wanted(cfg: dict) -> List[str]:
+    """Benötigte Spalten der Quelle (Schlüssel, Perioden bzw. Periode + Wert, Filter)."""
+    keys = [cfg[k] for k in ("row", "account") if cfg.get(k)]
+    if not keys:
+        raise ValueError("ingest: `row` oder `account` muss eine Spalte angeben")
+    vals = [cfg["period"], cfg["value"]] if cfg.get("value") else list((cfg.get("periods") or {}).values())
+    return list(dict.fromkeys(keys + vals + list(cfg.get("filter") or {})))
+
+
+# --------------------------------------------------------------------------- #
+#  Reader: Quelle → {Spalte: Werte}                                           #
+# --------------------------------------------------------------------------- #
+def _read_csv(path: Path, cols: List[str], cfg: dict) -> Dict[str, list]:
+    try:
+        from pyarrow import csv as pa_csv
+    except ImportError:
+        pa_csv = None
+    if pa_csv is not None:
+        keys  = [cfg[k] for k in ("row", "account", "period") if cfg.get(k)]
+        table = pa_csv.read_csv(
+            path,
+            read_options=pa_csv.ReadOptions(encoding=cfg["encoding"]),
+            parse_options=pa_csv.ParseOptions(delimiter=cfg["sep"]),
+            convert_options=pa_csv.ConvertOptions(include_columns=cols,
+                                                  column_types={c: "string" for c in keys},
+                                                  decimal_point=cfg["decimal"]),
+        )
+        return table.to_pydict()
+    with path.open(encoding=cfg["encoding"], newline="") as f:
+        reader = csv.DictReader(f, delimiter=cfg["sep"])
+        missing = [c for c in cols if c not in (reader.fieldnames or [])]
+        if missing:
+            raise KeyError(f"Spalten {missing} fehlen in {path.name}")
+        out: Dict[str, list] = {c: [] for c in cols}
+        for rec in reader:
+            for c in cols:
+                out[c].append(rec[c])
+    return out
+
+
+def _read_parquet(path: Path, cols: List[str], cfg: dict) -> Dict[str, list]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet-Ingestion braucht pyarrow (pip install pyarrow)") from e
+    return pq.read_table(path, columns=cols).to_pydict()
+
+
+def _read_sqlite(path: Path, cols: List[str], cfg: dict) -> Dict[str, list]:
+    if not cfg.get("table"):
+        raise ValueError("ingest: SQLite-Quelle braucht `table`")
+    sql = "SELECT {} FROM \"{}\"".format(", ".join(f'"{c}"' for c in cols), cfg["table"])
+    with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as conn:
+        rows = conn.execute(sql).fetchall()
+    return {c: [r[i] for r in rows] for i, c in enumerate(cols)}
+
+
+READERS = {
+    ".csv": _read_csv, ".txt": _read_csv,
+    ".parquet": _read_parquet, ".pq": _read_parquet,
+    ".sqlite": _read_sqlite, ".db": _read_sqlite, ".sqlite3": _read_sqlite,
+}
+
+
+def read_columns(cfg: dict) -> Dict[str, list]:
+    path   = _source(cfg)
+    reader = READERS.get(path.suffix.lower())
+    if reader is None:
+        raise ValueError(f"ingest: unbekanntes Format '{path.suffix}' ({path.name})")
+    return reader(path, _wanted(cfg), cfg)
+
+
+def _numbers(values: list, cfg: dict) -> np.ndarray:
+    """Spalte → float64 (leer/Text → NaN); Dezimalkomma laut `decimal`."""
+    if cfg["decimal"] == ",":                      # 1.234,5 → 1234.5
+        values = [v.replace(".", "").replace(",", ".") if isinstance(v, str) else v for v in values]
+    try:
+        return np.asarray(values, dtype=float)     # schneller Weg: alles numerisch / None
+    except (TypeError, ValueError):
+        pass
+    out = np.full(len(values), np.nan)
+    for i, v in enumerate(values):
+        try:
+            out[i] = float(str(v).replace(" ", "")) if v is not None and str(v).strip() else np.nan
+        except ValueError:
+            pass
+    return out
+
+
+# --------------------------------------------------------------------------- #
+#  Spalten → Konto × Periode                                                  #
+# --------------------------------------------------------------------------- #
+def _pivot(data: Dict[str, list], cfg: dict) -> tuple:
+    """Spalten → (Schlüssel, Matrix Schlüssel × t-2/t-1/t0); Buchungen je Schlüssel summiert."""
+    n    = len(next(iter(data.values()), []))
+    keep = np.ones(n, dtype=bool)
+    for col, want in (cfg.get("filter") or {}).items():
+        keep &= np.array([str(v) for v in data[col]]) == str(want)
+    key_col = cfg.get("row") or cfg["account"]
+    keys    = np.array([str(v).strip() if v is not None else "" for v in data[key_col]], dtype=object)
+
+    if cfg.get("value"):                           # langes Format: Periode + Wert
+        labels = {str(v): t for t, v in (cfg.get("periods") or {}).items()}
+        slot   = np.array([PERIODS.index(labels[str(p)]) if str(p) in labels else -1
+                           for p in data[cfg["period"]]])
+        vals   = _numbers(data[cfg["value"]], cfg)
+        keep  &= slot >= 0
+        uniq, inv = np.unique(keys[keep], return_inverse=True)
+        out    = np.zeros((len(uniq), len(PERIODS)))
+        seen   = np.zeros_like(out, dtype=bool)
+        np.add.at(out, (inv, slot[keep]), np.nan_to_num(vals[keep]))
+        np.logical_or.at(seen, (inv, slot[keep]), ~np.isnan(vals[keep]))
+        return uniq, np.where(seen, out, np.nan)
+
+    cols = cfg.get("periods") or {}                # breites Format: eine Spalte je Periode
+    vals = np.column_stack([_numbers(data[cols[t]], cfg) if t in cols else np.full(n, np.nan)
+                            for t in PERIODS])[keep]
+    uniq, inv = np.unique(keys[keep], return_inverse=True)
+    out  = np.zeros((len(uniq), len(PERIODS)))
+    np.add.at(out, inv, np.nan_to_num(vals))
+    seen = np.zeros_like(out, dtype=int)
+    np.add.at(seen, inv, ~np.isnan(vals))
+    return uniq, np.where(seen > 0, out, np.nan)
+
+
+def read_history(sheet: str, spec: Optional[dict] = None, layout: Optional[Path] = None) -> SheetHistory:
+    """ERP-Export eines Sheets → SheetHistory (Layout der Ausgabe aus der Excel-Vorlage)."""
+    from discover_accounts import norm
+    from pipeline import account_map
+
+    spec = spec or {}
+    cfg  = settings(sheet)
+    hist = read_layout(layout or SRC_XLSX, sheet, spec.get("header_aliases", ["t0"]),
+                       spec.get("account_column"))
+    keys, vals = _pivot(read_columns(cfg), cfg)
+    mapping    = account_map(sheet)
+
+    if cfg.get("row"):
+        target = {}
+        for i, k in enumerate(keys):
+            try:
+                target[int(float(k))] = i
+            except ValueError:
+                continue
+    else:
+        by_text: Dict[str, List[int]] = {}
+        for r, (text, _) in mapping.items():
+            by_text.setdefault(norm(text), []).append(r)
+        index  = {norm(k): i for i, k in enumerate(keys)}
+        target, ambiguous = {}, []
+        for t, rows in by_text.items():
+            if t in index and len(rows) > 1:
+                ambiguous.append(mapping[rows[0]][0])
+            elif t in index:
+                target[rows[0]] = index[t]
+        if ambiguous:
+            warnings.warn(f"ingest {sheet}: Kontotext mehrfach in der Vorlage, bitte `row` verwenden: "
+                          + ", ".join(sorted(ambiguous)), stacklevel=2)
+
+    for r in sorted(target):
+        i = target[r]
+        text = mapping.get(r, ("", ""))[0] or (keys[i] if not cfg.get("row") else "")
+        hist._append(r, text, *(float(v) for v in vals[i]))
+    return hist
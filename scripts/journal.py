@@ -0,0 +1,138 @@
+"""
+journal.py – Write-Ahead-Journal fertiger Forecast-Zeilen
+=========================================================
+- Jede fertige Zeile (Sheet, Zeile, Werte, Begründung, Quelle) wird sofort
+  als JSON-Zeile an outputs/forecast_journal.jsonl angehängt und per fsync
+  auf die Platte gebracht – auch wenn später ein Writer abstürzt
+- `python scripts/main.py --resume` spielt das Journal ein: bereits fertige
+  Zeilen kommen aus dem Journal, nur der Rest geht an das LLM
+- Spätere Einträge derselben Zeile gewinnen (z.B. Baseline nach Validierung)
+- Nach erfolgreichem `wb.save()` wird das Journal entfernt
+"""
+
+from __future__ import annotations
+import json, os, threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+BASE         = Path(__file__).resolve().parent.parent
+JOURNAL_PATH = BASE / "outputs" / "forecast_journal.jsonl"
+
+_lock                 = threading.Lock()
+_fh                   = None
+_header: dict         = {}
+_replay: Dict[Tuple[str, int], dict] = {}
+
+
+def _source_stamp(source: Path) -> dict:
+    st = Path(source).stat()
+    return {"source": str(source), "mtime": st.st_mtime, "size": st.st_size}
+
+
+def _load(path: Path) -> Tuple[Optional[dict], Dict[Tuple[str, int], dict]]:
+    header, rows = None, {}
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                e = json.loads(line)
+            except json.JSONDecodeError:          # halb geschriebene Zeile eines Absturzes
+                continue
+            if "header" in e:
+                header = e["header"]
+            else:
+                rows[(e["sheet"], int(e["row"]))] = e
+    return header, rows
+
+
+def _cut_torn_tail(path: Path) -> None:
+    """Halb geschriebene letzte Zeile abschneiden, damit neue Einträge auf einer eigenen Zeile beginnen."""
+    with path.open("rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def peek(source: Path, path: Path = JOURNAL_PATH) -> Optional[str]:
+    """Journal nur lesen (z.B. für --plan); Rückgabe = run_id des unterbrochenen Laufs."""
+    _replay.clear()
+    if not path.exists():
+        return None
+    header, rows = _load(path)
+    if not header or {k: header.get(k) for k in ("source", "mtime", "size")} != _source_stamp(source):
+        return None
+    _replay.update(rows)
+    return header.get("run_id")
+
+
+def start(source: Path, resume: bool = False, path: Path = JOURNAL_PATH) -> Optional[str]:
+    """
+    Journal öffnen. Mit `resume` werden vorhandene Einträge übernommen, sofern
+    die Quelldatei unverändert ist; Rückgabe = run_id des unterbrochenen Laufs.
+    """
+    global _fh
+    prev_run = peek(source, path) if resume else None
+    if resume and not _replay:
+        print("ℹ️  Kein passendes Journal gefunden – Lauf startet neu")
+    elif _replay:
+        print(f"♻️  Journal: {len(_replay)} fertige Zeilen aus Lauf {prev_run or '–'} werden übernommen")
+
+    path.parent.mkdir(exist_ok=True, parents=True)
+    _header.clear()
+    _header.update(_source_stamp(source), started=datetime.now().isoformat(timespec="seconds"))
+    with _lock:
+        if _replay:
+            _cut_torn_tail(path)
+        _fh = path.open("a" if _replay else "w", encoding="utf-8")
+    if not _replay:
+        _append({"header": dict(_header)})
+    return prev_run
+
+
+def set_run(run_id: Optional[str]) -> None:
+    """run_id im Journal vermerken (für --resume in denselben Run-Store-Lauf)."""
+    if run_id and _fh is not None:
+        _header["run_id"] = run_id
+        _append({"header": dict(_header)})
+
+
+def active() -> bool:
+    return _fh is not None
+
+
+def _append(entry: dict) -> None:
+    with _lock:
+        if _fh is None:
+            return
+        _fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        _fh.flush()
+        os.fsync(_fh.fileno())
+
+
+def append(sheet: str, row: Optional[int], account: str, history, json_text: str,
+           source: str, latency_ms: float = 0.0, prompt_hash: str = "") -> None:
+    """Fertige Zeile sofort dauerhaft festhalten (no-op ohne aktives Journal)."""
+    if row is None or _fh is None:
+        return
+    _append({"sheet": sheet, "row": int(row), "account": account, "history": list(history),
+             "json": json_text, "source": source, "latency_ms": latency_ms, "hash": prompt_hash})
+
+
+def lookup(sheet: str, row: int, account: str) -> Optional[dict]:
+    """Eintrag aus dem eingespielten Journal, falls Zeile & Konto übereinstimmen."""
+    e = _replay.get((sheet, int(row)))
+    if e is None or e.get("account") != account:
+        return None
+    return e
+
+
+def finish(success: bool = True, path: Path = JOURNAL_PATH) -> None:
+    """Journal schließen; nach erfolgreichem Speichern wird es gelöscht."""
+    global _fh
+    with _lock:
+        if _fh is not None:
+            _fh.close()
+            _fh = None
+    _replay.clear()
+    if success and path.exists():
+        path.unlink()
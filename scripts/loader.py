@@ -1,9 +1,14 @@
 from __future__ import annotations
 import re
-from typing import Dict, List
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import yaml
 from openpyxl.worksheet.worksheet import Worksheet
 
 PERIOD_RE = re.compile(r"^t-?\d+$")   # t-2 … t3
+REF_RE    = re.compile(r"^(-?)\s*(.+)!(\d+)(?::(\d+))?$")   # [-]Sheet!Zeile[:bis]
 
 def find_header_row(ws: Worksheet, aliases: List[str] = ["t0"]) -> int | None:
     """
@@ -24,3 +29,39 @@ def col_map(ws: Worksheet, header_row: int) -> Dict[str, int]:
         for c in ws[header_row]
         if isinstance(c.value, str) and PERIOD_RE.fullmatch(c.value)
     }
+
+# ---------------- sheets.yml ----------------
+CFG_FILE = Path(__file__).resolve().parent.parent / "config" / "sheets.yml"
+
+@lru_cache(maxsize=None)
+def load_config(path: Path = CFG_FILE) -> dict:
+    """Komplette sheets.yml (einmal pro Prozess geparst)."""
+    return yaml.safe_load(path.read_text(encoding="utf-8"))
+
+def load_sheet_specs(path: Path = CFG_FILE) -> Dict[str, dict]:
+    """Sheet-Name → Spezifikation aus config/sheets.yml."""
+    return load_config(path)["sheets"]
+
+def _merge(base: dict, over: dict) -> dict:
+    out = dict(base)
+    for k, v in (over or {}).items():
+        out[k] = _merge(out[k], v) if isinstance(v, dict) and isinstance(out.get(k), dict) else v
+    return out
+
+@lru_cache(maxsize=None)
+def load_sheet_block(block: str, sheet: str, path: Path = CFG_FILE) -> dict:
+    """Globaler Block (z.B. `llm:`), überlagert vom gleichnamigen Block des Sheets."""
+    cfg = load_config(path)
+    return _merge(cfg.get(block) or {}, (cfg["sheets"].get(sheet) or {}).get(block) or {})
+
+def load_llm_spec(sheet: str, path: Path = CFG_FILE) -> dict:
+    """LLM-Einstellungen eines Sheets (Kaskade, Prüfungen)."""
+    return load_sheet_block("llm", sheet, path)
+
+def parse_ref(ref: str) -> Tuple[float, str, range]:
+    """Bezug "[-]Sheet!Zeile" bzw. "[-]Sheet!von:bis" → (Vorzeichen, Sheet, Zeilen)."""
+    m = REF_RE.match(str(ref).strip())
+    if not m:
+        raise ValueError(f"Bezug {ref!r} ist nicht 'Sheet!Zeile' oder 'Sheet!von:bis'")
+    sign, sheet, a, b = m.groups()
+    return (-1.0 if sign else 1.0), sheet.strip(), range(int(a), int(b or a) + 1)
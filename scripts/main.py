@@ -1,7 +1,25 @@
 from pathlib import Path
+import argparse
 import shutil
+import time
 from openpyxl import load_workbook
 
+import ensemble
+import hierarchy
+import impact
+import journal
+import metrics
+import monthly
+import planner
+import profiling
+import progress
+import run_store
+import sampling
+import scheduler
+import xlsx_stream
+from explanations import OLLAMA_MODEL, set_reason_mode
+from profiling import span
+
 from writers.writer_bs       import write_bs_forecast
 from writers.writer_pnl      import write_pnl_forecast
 from writers.writer_cfr      import write_cfr_forecast
@@ -12,31 +30,160 @@ from writers.writer_capex    import write_capex_forecast
 from writers.writer_staff    import write_staff_forecast
 
 # Basis-Pfad (KiAgent/scripts)
-BASE     = Path(__file__).resolve().parent.parent
-SRC_XLSX = BASE / "data"    / "UnternehmensplanungExcel.xlsx"
-DST_XLSX = BASE / "outputs" / "UnternehmensplanungForecast.xlsx"
-
-def main() -> None:
-    # 1) Excel ein einziges Mal kopieren
-    DST_XLSX.parent.mkdir(exist_ok=True, parents=True)
-    shutil.copy(SRC_XLSX, DST_XLSX)
-
-    # 2) Workbook öffnen (write-enabled)
-    wb = load_workbook(DST_XLSX, data_only=False)
-
-    # 3) Nacheinander alle Forecast-Writer aufrufen
-    write_bs_forecast(wb)
-    write_pnl_forecast(wb)
-    write_cfr_forecast(wb)
-    write_rev_sbe_forecast(wb)
-    write_cogs_forecast(wb)
-    write_opex_forecast(wb)
-    write_capex_forecast(wb)
-    write_staff_forecast(wb)
-
-    # 4) Alles in die Forecast-Datei speichern
-    wb.save(DST_XLSX)
+BASE       = Path(__file__).resolve().parent.parent
+SRC_XLSX   = BASE / "data"    / "UnternehmensplanungExcel.xlsx"
+DST_XLSX   = BASE / "outputs" / "UnternehmensplanungForecast.xlsx"
+TRACE_JSON = BASE / "outputs" / "profile_trace.json"
+
+WRITERS = [
+    ("BS (2)",      write_bs_forecast),
+    ("PnL (2)",     write_pnl_forecast),
+    ("CFR (2)",     write_cfr_forecast),
+    ("REV_sbE (2)", write_rev_sbe_forecast),
+    ("COGS (2)",    write_cogs_forecast),
+    ("OPEX (2)",    write_opex_forecast),
+    ("CAPEX (2)",   write_capex_forecast),
+    ("STAFF (2)",   write_staff_forecast),
+]
+
+def run_writers(wb, sheets=None) -> None:
+    """
+    Writer (alle oder nur `sheets`) auf wb anwenden – als Abhängigkeitsgraph,
+    unabhängige Sheets gleichzeitig (scheduler.py) –, danach die Monatsblätter.
+    """
+    writers  = dict(WRITERS)
+    selected = [s for s, _ in WRITERS if sheets is None or s in sheets]
+    hierarchy.reset()               # Roll-up-Speicher gilt nur für diesen Lauf
+    monthly.reset()                 # ebenso die Monatswerte für die Monatsblätter
+
+    def run_one(sheet: str) -> None:
+        rows_before = metrics.ROWS.total(sheet=sheet)
+        t_sheet = time.perf_counter()
+        progress.sheet_started(sheet)
+        with span("sheet", sheet=sheet):
+            writers[sheet](wb)
+        rows = metrics.ROWS.total(sheet=sheet) - rows_before
+        metrics.observe_writer(sheet, time.perf_counter() - t_sheet, rows)
+        progress.sheet_done(sheet, time.perf_counter() - t_sheet, int(rows))
+
+    # Geschätzte Dauer je Sheet (Trockenlauf) → kritischer Pfad zuerst
+    plan = planner.build_plan(SRC_XLSX, selected)
+    cost = {p["sheet"]: max(p["seconds"], 1e-3 * p["mapped"]) for p in plan}
+    progress.expect(plan, scheduler.critical_path(scheduler.dependencies(selected), cost)[0])
+    t_all     = time.perf_counter()
+    durations = scheduler.run_dag(selected, run_one, cost)
+    print(scheduler.summary(selected, durations, time.perf_counter() - t_all))
+
+    # Monatsblätter (nur Sheets mit monthly.enabled; t1..t3 haben die Writer geschrieben)
+    monthly.write_monthly_forecasts(wb, sheets)
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Forecast-Lauf über alle Sheets")
+    p.add_argument("--plan", action="store_true",
+                   help="Trockenlauf: Zeilen, LLM-Aufrufe, Tokens & Dauer schätzen, nichts schreiben")
+    p.add_argument("--profile", action="store_true",
+                   help="Timing-Spans + tracemalloc aufzeichnen, Chrome-Trace exportieren")
+    p.add_argument("--profile-top", type=int, default=20, metavar="N",
+                   help="Anzahl Zeilen in der Profil-Übersicht (Default 20)")
+    p.add_argument("--metrics-port", type=int, default=None, metavar="PORT",
+                   help="Prometheus-Metriken während des Laufs unter http://127.0.0.1:PORT/metrics")
+    p.add_argument("--no-warmup", action="store_true",
+                   help="Gemeinsamen Prompt-Präfix vorab nicht an die Backends schicken")
+    p.add_argument("--resume", action="store_true",
+                   help="Unterbrochenen Lauf fortsetzen: fertige Zeilen aus dem Journal übernehmen")
+    p.add_argument("--no-store", action="store_true",
+                   help="Lauf nicht im Run-Store (outputs/forecast_runs.sqlite) ablegen")
+    p.add_argument("--lazy-reasons", action="store_true",
+                   help="Nur Zahlen vom LLM; Begründungen später per scripts/reasons.py bzw. Streamlit")
+    p.add_argument("--samples", type=int, default=None, metavar="K",
+                   help="K Stichproben je Zeile → Median + Unsicherheitsband (sampling.py)")
+    return p.parse_args(argv)
+
+def main(argv=None) -> None:
+    args = _parse_args(argv)
+    if args.lazy_reasons:
+        set_reason_mode("lazy")
+    if args.samples:
+        sampling.set_samples(args.samples)
+    if args.profile:
+        profiling.enable(trace_memory=True)
+    if args.metrics_port:
+        metrics.start_http_server(args.metrics_port)
+        print(f"📊 Metriken unter http://127.0.0.1:{args.metrics_port}/metrics")
+
+    if args.plan:
+        if args.resume:
+            journal.peek(SRC_XLSX)
+        planner.print_plan(planner.build_plan(SRC_XLSX, [sheet for sheet, _ in WRITERS]))
+        return
+
+    # Write-Ahead-Journal; mit --resume fertige Zeilen des letzten Laufs übernehmen
+    prev_run = journal.start(SRC_XLSX, resume=args.resume)
+    if args.no_store:
+        run_id = None
+    elif prev_run and run_store.resume_run(prev_run):
+        run_id = prev_run
+    else:
+        run_id = run_store.begin_run(OLLAMA_MODEL, str(SRC_XLSX))
+    journal.set_run(run_id)
+    progress.start(run_id)          # Ereignis-Strom für Streamlit (outputs/progress.jsonl)
+
+    t_run = time.perf_counter()
+    try:
+        with span("run"):
+            # 1) Excel ein einziges Mal kopieren
+            with span("copy_workbook"):
+                DST_XLSX.parent.mkdir(exist_ok=True, parents=True)
+                shutil.copy(SRC_XLSX, DST_XLSX)
+
+            # 2) Historie aller Sheets parallel streamen (Writer lesen aus dem Cache)
+            with span("load_history", mode="stream"):
+                xlsx_stream.preload(SRC_XLSX)
+
+            # 2b) Wirkungsmatrix Sachverhalt × Konto (einmal je Lauf, sonst aus dem Cache)
+            with span("impact"):
+                impact.matrix()
+
+            # 2c) Prompt-Präfixe der häufigsten Sachverhalts-Kombinationen vorwärmen (KV-Cache)
+            if not args.no_warmup:
+                with span("warm_prefix"):
+                    impact.warm()
+
+            # 3) Workbook öffnen (write-enabled)
+            with span("load_workbook", mode="write"):
+                wb = load_workbook(DST_XLSX, data_only=False)
+
+            # 4) Forecast-Writer + optionaler Monatshorizont
+            run_writers(wb)
+
+            # 5) Alles in die Forecast-Datei speichern
+            with span("wb.save"):
+                wb.save(DST_XLSX)
+    except BaseException as e:
+        # Journal bleibt für --resume liegen, Fortschritt meldet den Abbruch
+        journal.finish(success=False)
+        if run_id:
+            run_store.flush()
+        progress.fail(error=f"{type(e).__name__}: {e}", seconds=round(time.perf_counter() - t_run, 1))
+        raise
+    journal.finish(success=True)
+    progress.finish(seconds=round(time.perf_counter() - t_run, 1), out=str(DST_XLSX))
     print(f"✅ Alle Forecasts geschrieben in: {DST_XLSX}")
+    if run_id:
+        run_store.finish_run()
+        print(f"🗄️  Lauf {run_id} gespeichert in {run_store.DB_PATH}")
+        # Methodenfehler für die Ensemble-Gewichte nachführen (statistischer Backtest)
+        with span("ensemble_refresh"):
+            ensemble.refresh(SRC_XLSX, [sheet for sheet, _ in WRITERS])
+
+    metrics.observe_run(time.perf_counter() - t_run)
+    print(f"📊 {metrics.summary()}")
+    print(f"📊 Prometheus-Textfile: {metrics.write_textfile()}")
+
+    if args.profile:
+        profiling.export_chrome_trace(TRACE_JSON)
+        print("\n" + profiling.summary(args.profile_top))
+        print(f"\n📈 Chrome-Trace: {TRACE_JSON}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,241 @@
+"""
+metrics.py – Minimal-Registry für Counter, Gauges & Histogramme
+===============================================================
+- Prometheus-Text-Exposition (Format 0.0.4) ohne Zusatz-Abhängigkeit
+- `write_textfile()` nach jedem Lauf → outputs/metrics.prom
+  (z.B. für den node_exporter textfile-Collector)
+- `start_http_server(port)` liefert dieselben Daten unter /metrics aus
+- Histogramme halten zusätzlich ein begrenztes Sample-Fenster für
+  p50/p95 in der Konsolen-Zusammenfassung
+"""
+
+from __future__ import annotations
+import math, threading, time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Deque, Dict, List, Tuple
+
+BASE     = Path(__file__).resolve().parent.parent
+PROM_OUT = BASE / "outputs" / "metrics.prom"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+_LabelKey = Tuple[Tuple[str, str], ...]
+
+def _key(labels: Dict[str, object]) -> _LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _fmt_labels(key: _LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = key + extra
+    if not items:
+        return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+def _fmt_num(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v))
+
+
+# ---------------- Metrik-Typen ----------------
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str):
+        self.name, self.doc = name, doc
+        self._values: Dict[_LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        k = _key(labels)
+        with self._lock:
+            self._values[k] = self._values.get(k, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_key(labels), 0.0)
+
+    def total(self, **match) -> float:
+        """Summe über alle Label-Kombinationen, die `match` enthalten."""
+        want = set(_key(match))
+        return sum(v for k, v in list(self._values.items()) if want <= set(k))
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_fmt_labels(k)} {_fmt_num(v)}"
+                for k, v in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_key(labels)] = float(value)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, buckets=LATENCY_BUCKETS, window: int = 10_000):
+        self.name, self.doc = name, doc
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts:  Dict[_LabelKey, List[int]] = {}
+        self._sums:    Dict[_LabelKey, float] = {}
+        self._samples: Dict[_LabelKey, Deque[float]] = {}
+        self._window = window
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        k = _key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(k, [0] * len(self.buckets))
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    counts[i] += 1
+            self._sums[k] = self._sums.get(k, 0.0) + value
+            self._samples.setdefault(k, deque(maxlen=self._window)).append(value)
+
+    def quantile(self, q: float, **match) -> float:
+        """Quantil über das Sample-Fenster aller passenden Label-Kombinationen."""
+        want = set(_key(match))
+        with self._lock:
+            vals = sorted(v for k, d in self._samples.items() if want <= set(k) for v in d)
+        if not vals:
+            return float("nan")
+        return vals[max(0, math.ceil(q * len(vals)) - 1)]     # Nearest-Rank
+
+    def count(self, **match) -> int:
+        want = set(_key(match))
+        return sum(c[-1] for k, c in list(self._counts.items()) if want <= set(k))
+
+    def render(self) -> List[str]:
+        out: List[str] = []
+        with self._lock:
+            for k in sorted(self._counts):
+                counts = self._counts[k]
+                for b, c in zip(self.buckets, counts):
+                    out.append(f"{self.name}_bucket{_fmt_labels(k, (('le', _fmt_num(b)),))} {c}")
+                out.append(f"{self.name}_sum{_fmt_labels(k)} {_fmt_num(self._sums[k])}")
+                out.append(f"{self.name}_count{_fmt_labels(k)} {counts[-1]}")
+        return out
+
+
+# ---------------- Registry ----------------
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, doc: str, **kw):
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, doc, **kw)
+            return m
+
+    def counter(self, name: str, doc: str) -> Counter:
+        return self._get(Counter, name, doc)
+
+    def gauge(self, name: str, doc: str) -> Gauge:
+        return self._get(Gauge, name, doc)
+
+    def histogram(self, name: str, doc: str, buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, doc, buckets=buckets)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            m = self._metrics[name]
+            lines.append(f"# HELP {name} {m.doc}")
+            lines.append(f"# TYPE {name} {m.kind}")
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ---------------- Standard-Metriken des Forecast-Laufs ----------------
+EXPLAIN_LATENCY = REGISTRY.histogram(
+    "forecast_explain_latency_seconds", "Dauer eines explain()-Aufrufs")
+PROMPT_TOKENS = REGISTRY.counter(
+    "forecast_llm_prompt_tokens_total", "Prompt-Tokens an das LLM")
+COMPLETION_TOKENS = REGISTRY.counter(
+    "forecast_llm_completion_tokens_total", "Completion-Tokens vom LLM")
+CACHE_REQUESTS = REGISTRY.counter(
+    "forecast_cache_requests_total", "Antwort-Cache-Abfragen nach Ergebnis (hit/miss)")
+CASCADE = REGISTRY.counter(
+    "forecast_cascade_answers_total", "Antworten je Kaskaden-Tier (accepted/escalated/error)")
+ROWS = REGISTRY.counter(
+    "forecast_rows_total", "Prognostizierte Zeilen nach Sheet und Quelle (llm/cache/baseline)")
+WRITER_SECONDS = REGISTRY.gauge(
+    "forecast_writer_duration_seconds", "Laufzeit des Writers im letzten Lauf")
+WRITER_RPS = REGISTRY.gauge(
+    "forecast_writer_rows_per_second", "Durchsatz des Writers im letzten Lauf")
+RUN_SECONDS = REGISTRY.gauge(
+    "forecast_run_duration_seconds", "Gesamtlaufzeit des letzten Laufs")
+RUN_TIMESTAMP = REGISTRY.gauge(
+    "forecast_run_timestamp_seconds", "Unix-Zeit des letzten abgeschlossenen Laufs")
+
+
+def observe_writer(sheet: str, seconds: float, rows: float) -> None:
+    WRITER_SECONDS.set(seconds, sheet=sheet)
+    WRITER_RPS.set(rows / seconds if seconds > 0 else 0.0, sheet=sheet)
+
+
+def observe_run(seconds: float) -> None:
+    RUN_SECONDS.set(seconds)
+    RUN_TIMESTAMP.set(time.time())
+
+
+def summary() -> str:
+    """Kurzübersicht für die Konsole: Latenz-Quantile, Tokens, Cache, Regeln/Summen & Fallback (ohne diese)."""
+    lookups = CACHE_REQUESTS.total()
+    hits    = CACHE_REQUESTS.total(result="hit")
+    rows    = ROWS.total()
+    fb      = ROWS.total(source="baseline")
+    ruled   = ROWS.total(source="rule") + ROWS.total(source="rollup")
+    acc     = CASCADE.total(result="accepted")
+    tier1   = CASCADE.total(tier="1", result="accepted")
+    return (
+        f"explain(): n={EXPLAIN_LATENCY.count()} "
+        f"p50={EXPLAIN_LATENCY.quantile(0.5):.2f}s p95={EXPLAIN_LATENCY.quantile(0.95):.2f}s | "
+        f"Tokens prompt={PROMPT_TOKENS.total():.0f} completion={COMPLETION_TOKENS.total():.0f} | "
+        f"Cache-Hit={hits / lookups if lookups else 0:.1%} | "
+        f"Tier-1={tier1 / acc if acc else 0:.1%} | "
+        f"Regel/Σ={ruled:.0f} | "
+        f"Fallback={fb / (rows - ruled) if rows > ruled else 0:.1%}"
+    )
+
+
+# ---------------- Exposition ----------------
+def write_textfile(path: Path = PROM_OUT) -> Path:
+    """Atomar schreiben, damit ein Scraper nie eine halbe Datei sieht."""
+    path.parent.mkdir(exist_ok=True, parents=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(REGISTRY.render(), encoding="utf-8")
+    tmp.replace(path)
+    return path
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):      # keine Konsolen-Flut pro Scrape
+        pass
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Startet /metrics in einem Daemon-Thread und gibt den Server zurück."""
+    srv = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=srv.serve_forever, name="metrics-http", daemon=True).start()
+    return srv
@@ -0,0 +1,215 @@
+"""
+monthly.py – Optionaler Monatshorizont (36 Perioden) je Sheet
+=============================================================
+Aktivierung pro Sheet in config/sheets.yml:
+
+    monthly:
+      enabled: true
+      history_columns: ["C", "D", ...]   # Monatsspalten, ältester Monat zuerst
+      periods: 36                        # 3 Jahre × 12 Monate
+      aggregate: "sum"                   # sum | mean | last  → t1..t3
+      output_sheet: "REV_sbE (2) Monate" # Ziel für die Monatswerte
+
+- Baseline: vektorisiert über alle Konten (Konten × Monate als Matrix),
+  Trend aus der Monats-Historie bzw. CAGR t-2→t0, Saisonfaktoren aus
+  vollen Historie-Jahren
+- LLM: genau **ein** Aufruf pro Konto für alle Monate (explain_monthly)
+- `apply()` ist eine Stufe von `pipeline.explain_rows()` wie Regeln und
+  Roll-ups: Zeilen eines Monats-Sheets gehen nicht zusätzlich in den
+  Jahres-Aufruf, t1..t3 werden aus den Monatswerten aggregiert und wie jede
+  andere Zeile über `record()` festgehalten
+- `write_monthly_forecasts()` schreibt danach nur noch die Monatsblätter
+"""
+
+from __future__ import annotations
+import threading, warnings
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import journal
+from explanations import explain_monthly
+from loader import load_sheet_specs
+from profiling import span
+from results import ForecastResult, MonthlyResult
+from xlsx_stream import SRC_XLSX, read_columns
+
+BASE     = Path(__file__).resolve().parent.parent
+LOG_FILE = BASE / "outputs" / "monthly_debug.txt"
+
+LOG: List[str] = []
+def log(msg: str) -> None:
+    LOG.append(msg)
+
+Job = Tuple[int, str, List[float]]                 # wie pipeline.Job
+
+_lock   = threading.Lock()
+_months: Dict[Tuple[str, int], Tuple[str, np.ndarray, np.ndarray]] = {}   # (Sheet, Zeile) → (Konto, Monate, Jahre)
+
+
+# --------------------------------------------------------------------------- #
+#  Vektorisierte Monats-Baseline                                              #
+# --------------------------------------------------------------------------- #
+def seasonal_index(hist: np.ndarray) -> np.ndarray:
+    """
+    Saisonfaktoren (Konten × 12) aus allen vollen Jahren am Ende der Historie.
+    Mittelwert je Konto = 1; ohne volles Jahr, bei Lücken oder Nullsummen → flach.
+    """
+    n, m  = hist.shape
+    years = m // 12
+    if years == 0:
+        return np.ones((n, 12))
+    full = hist[:, m - years * 12:].reshape(n, years, 12)
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)       # Konten ganz ohne Werte
+        prof = np.nanmean(full, axis=1)                       # (n, 12)
+        mean = np.nanmean(prof, axis=1, keepdims=True)
+        idx  = prof / mean
+    return np.where(np.isfinite(idx) & (np.abs(mean) > 1e-12), idx, 1.0)
+
+
+def monthly_baseline(hist: np.ndarray, yearly_growth: np.ndarray, periods: int = 36) -> np.ndarray:
+    """
+    hist: Konten × Monate (NaN = fehlt), yearly_growth: Fallback-Wachstum je Konto.
+    Ergebnis: Konten × periods.
+    """
+    n, m   = hist.shape
+    season = seasonal_index(hist)
+    valid  = ~np.isnan(hist)
+
+    # Trend: bei ≥ 24 Monaten Jahr-über-Jahr aus der Historie, sonst Fallback (CAGR)
+    growth = np.nan_to_num(np.asarray(yearly_growth, dtype=float)).copy()
+    if m >= 24:
+        last, prev = np.nansum(hist[:, -12:], axis=1), np.nansum(hist[:, -24:-12], axis=1)
+        ok = ((np.abs(prev) > 1e-12) & valid[:, -12:].all(axis=1) & valid[:, -24:-12].all(axis=1))
+        growth[ok] = last[ok] / prev[ok] - 1
+    g_month = np.power(1 + np.clip(growth, -0.99, None), 1 / 12) - 1
+
+    # Niveau: saisonbereinigter Mittelwert der letzten 12 vorhandenen Monate.
+    # Die Historie endet mit Monat 12 von t0 → letzte Spalte = Dezember.
+    pos_hist = (np.arange(m) - m) % 12
+    deseason = hist / season[:, pos_hist]
+    rank     = np.cumsum(valid[:, ::-1], axis=1)[:, ::-1]      # 1 = jüngster Wert
+    recent   = valid & (rank <= 12)
+    cnt      = recent.sum(axis=1)
+    level    = np.where(cnt > 0, np.where(recent, deseason, 0.0).sum(axis=1) / np.maximum(cnt, 1), 0.0)
+
+    steps    = np.arange(1, periods + 1)
+    trend    = np.power(1 + g_month[:, None], steps[None, :])
+    pos      = (steps - 1) % 12                                # t1 beginnt im Januar
+    return level[:, None] * trend * season[:, pos]
+
+
+def aggregate_years(months: np.ndarray, how: str = "sum") -> np.ndarray:
+    """Konten × 36 → Konten × 3 (t1..t3)."""
+    n, p   = months.shape
+    blocks = months[:, : (p // 12) * 12].reshape(n, p // 12, 12)
+    if how == "mean":
+        return blocks.mean(axis=2)
+    if how == "last":
+        return blocks[:, :, -1]
+    return blocks.sum(axis=2)
+
+
+def _cagr_vec(t2: np.ndarray, t0: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        g = np.where((np.abs(t2) > 1e-12) & (t0 / t2 > 0), np.power(t0 / t2, 0.5) - 1, 0.0)
+    return np.nan_to_num(g)
+
+
+# --------------------------------------------------------------------------- #
+#  Stufe in explain_rows() & Monatsblatt                                      #
+# --------------------------------------------------------------------------- #
+def settings(sheet: str) -> dict:
+    """`monthly:`-Block eines Sheets; leer, wenn der Monatshorizont aus ist."""
+    cfg = load_sheet_specs().get(sheet, {}).get("monthly") or {}
+    return cfg if cfg.get("enabled") else {}
+
+
+def apply(sheet: str, jobs: Sequence[Job],
+          contexts: Optional[List[str]] = None) -> Dict[int, ForecastResult]:
+    """
+    Monatshorizont für die Jobs eines Sheets mit `monthly.enabled` → {Zeile: t1..t3}
+    als Aggregat der Monatswerte. Zeilen aus dem Journal (--resume) bleiben
+    außen vor und werden von der Pipeline übernommen.
+    """
+    cfg  = settings(sheet)
+    jobs = [job for job in jobs if journal.lookup(sheet, job[0], job[1]) is None] if cfg else []
+    if not jobs:
+        return {}
+    periods = int(cfg.get("periods", 36))
+    how     = cfg.get("aggregate", "sum")
+
+    # 1) Monatsspalten; t-2/t0 der Jobs für den CAGR-Fallback
+    with span("load_history", sheet=sheet, mode="monthly"):
+        hist_rows, hist_vals = read_columns(SRC_XLSX, sheet, cfg["history_columns"])
+    by_row = dict(zip(hist_rows, hist_vals))
+    n_hist = len(cfg["history_columns"])
+    H      = np.array([by_row.get(r, [np.nan] * n_hist) for r, _, _ in jobs], dtype=float)
+    Y      = np.array([hist for _, _, hist in jobs], dtype=float).reshape(len(jobs), 3)
+
+    # 2) Vektorisierte Baseline für alle Konten auf einmal
+    with span("monthly_baseline", sheet=sheet, accounts=len(jobs)):
+        base = monthly_baseline(H, _cagr_vec(Y[:, 0], Y[:, 2]), periods)
+
+    # 3) Ein LLM-Aufruf pro Konto für den ganzen Horizont, t1..t3 aggregiert
+    months = base.copy()
+    found: Dict[int, MonthlyResult] = {}
+    for i, (r, account, _) in enumerate(jobs):
+        res = explain_monthly(account, [v for v in H[i] if v == v], list(base[i]),
+                              sheet=sheet, row=r, contexts=contexts)
+        months[i] = np.asarray(res.months, dtype=float)
+        found[r]  = res
+        log(f"{sheet} row {r}: {account} → {res.reason}")
+    totals = aggregate_years(months, how)
+
+    out: Dict[int, ForecastResult] = {}
+    with _lock:
+        for i, (r, account, _) in enumerate(jobs):
+            _months[(sheet, r)] = (account, months[i], totals[i])
+            res    = found[r]
+            out[r] = ForecastResult.of([round(float(v), 2) for v in totals[i]], res.reason,
+                                       res.source, latency_ms=res.latency_ms)
+    return out
+
+
+def reset() -> None:
+    with _lock:
+        _months.clear()
+
+
+def write_monthly_sheet(wb, sheet: str, spec: dict) -> int:
+    """Monatswerte der in diesem Lauf prognostizierten Zeilen in ein eigenes Blatt."""
+    cfg      = spec["monthly"]
+    periods  = int(cfg.get("periods", 36))
+    out_name = cfg.get("output_sheet", f"{sheet} Monate")
+    with _lock:
+        rows = sorted(((r, v) for (s, r), v in _months.items() if s == sheet), key=lambda x: x[0])
+    if not rows:
+        log(f"{sheet}: keine Monatswerte – Mapping fehlt oder alle Zeilen aus Regel/Journal?")
+        return 0
+
+    if out_name in wb.sheetnames:
+        del wb[out_name]
+    out = wb.create_sheet(out_name)
+    out.append(["Zeile", "Konto"] + [f"t{1 + k // 12} M{k % 12 + 1}" for k in range(periods)]
+               + ["t1", "t2", "t3"])
+    for r, (account, months, totals) in rows:
+        out.append([r, account] + [round(float(v), 2) for v in months]
+                   + [round(float(v), 2) for v in totals])
+    return len(rows)
+
+
+def write_monthly_forecasts(wb, sheets=None) -> None:
+    """Monatsblätter aller (bzw. der angegebenen) Sheets mit `monthly.enabled: true`."""
+    total = 0
+    for sheet, spec in load_sheet_specs().items():
+        if not settings(sheet) or sheet not in wb.sheetnames or (sheets and sheet not in sheets):
+            continue
+        with span("monthly", sheet=sheet):
+            total += write_monthly_sheet(wb, sheet, spec)
+    if total:
+        log(f"TOTAL Monats-Konten = {total}")
+        LOG_FILE.parent.mkdir(exist_ok=True, parents=True)
+        LOG_FILE.write_text("\n".join(LOG), encoding="utf-8")
@@ -0,0 +1,236 @@
+"""
+pipeline.py – Nebenläufige Abarbeitung der Forecast-Zeilen eines Sheets
+=======================================================================
+Writer sammeln zuerst alle Forecast-Zeilen als Jobs `(row, account, history)`
+und übergeben sie gesammelt an `explain_rows()`. Die Aufrufe laufen parallel
+über so viele Threads, wie der Backend-Pool gleichzeitig bedienen kann –
+mit mehr Inferenz-Knoten wächst der Durchsatz entsprechend mit.
+
+Danach mischt `ensemble` die Antworten mit statistischen Prognosen, und
+`validation` bewertet die gemischten Werte in einem Durchgang; nur Ausreißer
+werden (mit Hinweis, im Rahmen des Retry-Budgets) erneut angefragt und wieder
+gemischt, was dann noch unplausibel ist, fällt auf die Baseline zurück.
+
+Erst dieser Endstand – genau die Werte, die ins Planwerk gehen – landet im
+Journal (journal.py), im Run-Store und im Fortschritts-Strom (`record`); bei
+`--resume` kommen fertige Zeilen aus dem Journal und werden weder erneut
+angefragt noch erneut gemischt.
+
+Summenzeilen (hierarchy.py) und Zeilen mit einer Szenario-Regel (rules.py)
+werden vorab deterministisch berechnet und erreichen das LLM nicht; Zeilen
+eines Sheets mit Monatshorizont (monthly.py) bekommen statt des Jahres-Aufrufs
+einen Monats-Aufruf, dessen Jahressummen als t1..t3 zählen. Jede übrige
+Zeile bekommt nur die Sachverhalte, die sie laut Wirkungsmatrix (impact.py)
+betreffen, dazu die fertigen Prognosen vorgelagerter Sheets (`drivers`,
+scheduler.py).
+"""
+
+from __future__ import annotations
+import os
+from concurrent.futures import ThreadPoolExecutor
+from csv import DictReader
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import ensemble
+import hierarchy
+import impact
+import monthly
+import rules
+import scheduler
+import validation
+from backends import get_pool
+import journal
+from explanations import _contexts, explain, fallback, record, replay
+from profiling import span
+from results import ForecastResult
+
+Job = Tuple[int, str, List[float]]                 # (Zeile, Kontotext, [t-2, t-1, t0])
+
+MAX_WORKERS = int(os.getenv("FORECAST_WORKERS", "0"))   # 0 = Kapazität des Pools
+
+CFG_DIR  = Path(__file__).resolve().parent.parent / "config"
+
+# Writer von BS/PnL überspringen Zeilen ohne t-2, die übrigen nur ohne t0 (Lücken → 0)
+NEEDS_T2 = {"BS (2)", "PnL (2)"}
+
+
+def account_map(sheet: str) -> Dict[int, Tuple[str, str]]:
+    """Zeile → (Kontotext, Kategorie) aus config/<sheet>_accounts.csv."""
+    from discover_accounts import norm
+    path = CFG_DIR / f"{norm(sheet)}_accounts.csv"
+    if not path.exists():
+        return {}
+    with path.open(encoding="utf-8") as f:
+        return {int(r["row"]): (r["text"], r["category"].strip().lower()) for r in DictReader(f)}
+
+
+def sheet_jobs(sheet: str, hist, rows: Optional[Iterable[int]] = None
+               ) -> Tuple[List[Job], Dict[int, str]]:
+    """
+    Jobs eines Sheets ohne Workbook (aus Mapping + Streaming-Historie), nach den
+    Regeln der Writer. Liefert (Jobs, {Zeile: Grund} der übersprungenen Zeilen).
+    """
+    mapping = account_map(sheet)
+    wanted  = sorted(mapping) if rows is None else sorted(int(r) for r in rows)
+    jobs: List[Job] = []
+    skipped: Dict[int, str] = {}
+    for r in wanted:
+        text, cat = mapping.get(r, ("", ""))
+        if cat != "forecast":
+            skipped[r] = f"category={cat or 'unbekannt'}"
+            continue
+        t2, t1, t0 = hist.values(r)
+        history = [t2, t1, t0] if sheet in NEEDS_T2 else [t2 or 0, t1 or 0, t0]
+        if any(v is None for v in history):
+            skipped[r] = "Historie unvollständig"
+            continue
+        jobs.append((r, hist.account(r) or text, history))
+    return jobs, skipped
+
+
+def workers() -> int:
+    return MAX_WORKERS or get_pool().capacity
+
+
+def _dispatch(sheet: str, jobs: Sequence[Job], hints: Sequence[str] = (),
+              contexts: Sequence[Optional[List[str]]] = ()) -> List[ForecastResult]:
+    """explain() für alle Jobs parallel → Ergebnisse in Job-Reihenfolge (Sachverhalte je Job)."""
+    hints    = list(hints) or [""] * len(jobs)
+    contexts = list(contexts) or [None] * len(jobs)
+    n        = min(workers(), len(jobs))
+    if n <= 1:
+        return [explain(acc, hist, [], sheet=sheet, row=r, hint=h, contexts=c)
+                for (r, acc, hist), h, c in zip(jobs, hints, contexts)]
+    with ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"explain-{sheet}") as ex:
+        futs = [ex.submit(explain, acc, hist, [], sheet=sheet, row=r, hint=h, contexts=c)
+                for (r, acc, hist), h, c in zip(jobs, hints, contexts)]
+        return [f.result() for f in futs]
+
+
+def explain_rows(sheet: str, jobs: Sequence[Job],
+                 contexts: Optional[List[str]] = None,
+                 use_ensemble: bool = True,
+                 use_rules: bool = True,
+                 use_hierarchy: bool = True,
+                 use_monthly: bool = True) -> Dict[int, ForecastResult]:
+    """
+    Alle Jobs eines Sheets parallel erklären, validieren und mit den
+    statistischen Prognosen mischen → {row: ForecastResult}. `contexts` ersetzt die
+    Sachverhalte aus cases.csv (Szenario-Sweep); mit `use_ensemble`, `use_rules`,
+    `use_hierarchy` und `use_monthly` = False gibt es die reinen Jahres-Antworten des
+    LLM (Backtest).
+    """
+    if not jobs:
+        return {}
+    fixed: Dict[int, ForecastResult] = {}
+    pulled: set = set()                            # schon beim Roll-up erklärt und festgehalten
+    if use_hierarchy:
+        fixed  = hierarchy.known(sheet, jobs, contexts)
+        pulled = set(fixed)
+        with span("rollup", sheet=sheet, rows=len(jobs)):
+            fixed.update(hierarchy.apply(sheet, [job for job in jobs if job[0] not in fixed], contexts))
+    if use_rules:
+        with span("rules", sheet=sheet, rows=len(jobs)):
+            fixed.update(rules.apply(sheet, [job for job in jobs if job[0] not in fixed], contexts))
+    if use_monthly:
+        with span("monthly", sheet=sheet, rows=len(jobs)):
+            fixed.update(monthly.apply(sheet, [job for job in jobs if job[0] not in fixed], contexts))
+    for r, acc, hist in jobs:                      # Vorab berechnet = schon Endstand
+        if r in fixed and r not in pulled:
+            record(sheet, r, acc, hist, fixed[r])
+    rest = [job for job in jobs if job[0] not in fixed]
+    out  = {**fixed, **_llm_rows(sheet, rest, contexts, use_ensemble, drivers=use_hierarchy)}
+    if use_hierarchy:
+        hierarchy.remember(sheet, out, contexts)
+    return out
+
+
+def _job_contexts(sheet: str, jobs: Sequence[Job], contexts: Optional[List[str]],
+                  drivers: bool) -> List[Optional[List[str]]]:
+    """Sachverhalte je Job (Wirkungsmatrix) plus Treiber-Zeile aus vorgelagerten Sheets."""
+    with span("impact", sheet=sheet, rows=len(jobs)):
+        ctx = impact.contexts_for(sheet, jobs, contexts)
+    extra = scheduler.driver_lines(sheet, contexts) if drivers else []
+    if not extra:
+        return ctx
+    base = list(_contexts if contexts is None else contexts)
+    return [(base if c is None else c) + extra for c in ctx]
+
+
+def _llm_rows(sheet: str, jobs: Sequence[Job], contexts: Optional[List[str]],
+              use_ensemble: bool, drivers: bool = True) -> Dict[int, ForecastResult]:
+    if not jobs:
+        return {}
+    # Bei --resume: fertige Zeilen aus dem Journal, nur der Rest geht ans LLM
+    done    = {i: e for i, (r, acc, _) in enumerate(jobs) if (e := journal.lookup(sheet, r, acc))}
+    open_   = [i for i in range(len(jobs)) if i not in done]
+    out     = {jobs[i][0]: replay(e, sheet=sheet, row=jobs[i][0]) for i, e in done.items()}
+    if not open_:
+        return out
+    todo    = [jobs[i] for i in open_]
+    ctx     = _job_contexts(sheet, todo, contexts, drivers)
+    with span("explain_rows", sheet=sheet, rows=len(todo), replayed=len(done),
+              workers=min(workers(), len(todo))):
+        results = _dispatch(sheet, todo, contexts=ctx)
+
+    mix   = ensemble.settings(sheet)
+    blend = use_ensemble and mix.get("enabled", True)
+
+    def mixed(jobs: Sequence[Job], results: List[ForecastResult]) -> List[ForecastResult]:
+        if not blend:
+            return results
+        with span("ensemble", sheet=sheet, rows=len(jobs)):
+            return ensemble.apply(sheet, jobs, results, mix)
+
+    results = mixed(todo, results)
+
+    cfg = validation.settings(sheet)
+    if cfg.get("enabled", True):
+        with span("validate", sheet=sheet, rows=len(todo)):
+            results = _review(sheet, todo, results, cfg, ctx, mixed)
+
+    for (r, acc, hist), res in zip(todo, results):
+        record(sheet, r, acc, hist, res)
+        out[r] = res
+    return {r: out[r] for r, _, _ in jobs}
+
+
+def _review(sheet: str, jobs: List[Job], results: List[ForecastResult], cfg: dict,
+            contexts: Sequence[Optional[List[str]]] = (),
+            mixed: Optional[Callable[[Sequence[Job], List[ForecastResult]], List[ForecastResult]]] = None
+            ) -> List[ForecastResult]:
+    """
+    Ausreißer gezielt neu anfragen; Budget je Sheet und Versuche je Zeile begrenzt.
+    `mixed` mischt neue Antworten wie die ersten, bevor sie erneut geprüft werden.
+    """
+    hists  = [hist for _, _, hist in jobs]
+    bad    = validation.outliers(sheet, hists, results, cfg)
+    budget = int(cfg["retry_budget"])
+    validation.VALIDATION.inc(len(jobs) - len(bad), sheet=sheet, result="ok")
+
+    for _ in range(int(cfg["attempts"])):
+        todo = sorted(bad)[:budget]
+        if not todo:
+            break
+        budget -= len(todo)
+        validation.VALIDATION.inc(len(todo), sheet=sheet, result="requeried")
+        with span("requery", sheet=sheet, rows=len(todo)):
+            fresh = _dispatch(sheet, [jobs[i] for i in todo],
+                              [validation.hint(*bad[i]) for i in todo],
+                              [contexts[i] for i in todo] if contexts else ())
+            if mixed is not None:
+                fresh = mixed([jobs[i] for i in todo], fresh)
+        for i, res in zip(todo, fresh):
+            results[i] = res
+        still = validation.outliers(sheet, [hists[i] for i in todo], fresh, cfg)
+        validation.VALIDATION.inc(len(todo) - len(still), sheet=sheet, result="fixed")
+        bad = {**{i: v for i, v in bad.items() if i not in todo},
+               **{todo[j]: v for j, v in still.items()}}
+
+    # Was übrig bleibt, nicht ins Planwerk schreiben → Baseline
+    for i, (_, code) in bad.items():
+        _, acc, hist = jobs[i]
+        results[i] = fallback(acc, hist, f"LLM-Antwort verworfen: {validation.REASONS.get(code, '')}")
+    validation.VALIDATION.inc(len(bad), sheet=sheet, result="rejected")
+    return results
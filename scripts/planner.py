@@ -0,0 +1,114 @@
+"""
+planner.py – Trockenlauf: LLM-Aufrufe, Tokens und Laufzeit vorab schätzen
+=========================================================================
+`python scripts/main.py --plan` löst alle Mapping-CSVs und sheets.yml-Einträge
+auf und listet je Sheet, welche Zeilen prognostiziert, übersprungen oder aus
+Regel/Summe/Cache/Journal bedient würden. Es wird kein Workbook geschrieben und kein LLM
+aufgerufen.
+
+- Tokens: Prompt exakt aufgebaut und geschätzt (~4 Zeichen/Token); mit
+  Präfix-Cache zählt pro Zeile effektiv nur der Konto-Suffix
+- Laufzeit: mittlere LLM-Latenz je Sheet aus den letzten Läufen im Run-Store
+  (sonst `FORECAST_PLAN_LATENCY`), geteilt durch die Parallelität des Pools
+"""
+
+from __future__ import annotations
+import math, os
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import hierarchy
+import impact
+import journal
+import rules
+import run_store
+from backends import get_pool
+from explanations import (CACHE_ON, build_prompt, estimate_tokens, lazy_reasons, model_tiers,
+                          prompt_key, shared_prefix)
+from loader import load_llm_spec, load_sheet_specs
+from pipeline import account_map, sheet_jobs
+from xlsx_stream import preload
+
+DEFAULT_LATENCY_S = float(os.getenv("FORECAST_PLAN_LATENCY", "8"))   # ohne Messwerte
+COMPLETION_TOKENS = int(os.getenv("FORECAST_PLAN_COMPLETION", "60"))  # JSON + 20 Wörter
+NUMERIC_TOKENS    = int(os.getenv("FORECAST_PLAN_COMPLETION_NUMERIC", "25"))  # nur t1–t3
+ESCALATION_GUESS  = float(os.getenv("FORECAST_PLAN_ESCALATION", "0.2"))
+
+
+def plan_sheet(sheet: str, hist, pool_workers: int, lat: Dict[str, tuple]) -> dict:
+    mapping = account_map(sheet)
+    out     = {"sheet": sheet, "mapped": len(mapping), "skip": 0, "bad": 0, "cache": 0,
+               "journal": 0, "rule": 0, "llm": 0, "prompt_tok": 0, "suffix_tok": 0, "compl_tok": 0,
+               "latency_s": DEFAULT_LATENCY_S, "measured": False, "seconds": 0.0}
+    if not mapping:
+        out["note"] = "Mapping-CSV fehlt"
+        return out
+    have_store = run_store.DB_PATH.exists()
+
+    jobs, skipped = sheet_jobs(sheet, hist)
+    fixed         = rules.covered(sheet) | hierarchy.parents(sheet)
+    numeric       = lazy_reasons(sheet)
+    out["skip"] = sum(1 for why in skipped.values() if why.startswith("category="))
+    out["bad"]  = len(skipped) - out["skip"]
+    for row, account, history in jobs:
+        if journal.lookup(sheet, row, account):
+            out["journal"] += 1
+            continue
+        if row in fixed:
+            out["rule"] += 1
+            continue
+        ctx    = impact.select(sheet, row, build=False)   # nur gecachte Wirkungsmatrix
+        prompt = build_prompt(account, history, contexts=ctx, numeric=numeric)
+        if CACHE_ON and have_store and run_store.lookup_cached(prompt_key(prompt)):
+            out["cache"] += 1
+            continue
+        out["llm"]        += 1
+        out["prompt_tok"] += estimate_tokens(prompt)
+        out["suffix_tok"] += max(1, estimate_tokens(prompt) - estimate_tokens(shared_prefix(ctx, numeric)))
+
+    calls = out["llm"] * (1 + ESCALATION_GUESS * (len(model_tiers(load_llm_spec(sheet))) > 1))
+    out["calls"]     = calls
+    out["compl_tok"] = int(calls * (NUMERIC_TOKENS if numeric else COMPLETION_TOKENS))
+    if sheet in lat and lat[sheet][0]:
+        out["latency_s"], out["measured"] = lat[sheet][1] / 1000, True
+    out["seconds"] = math.ceil(calls / max(1, pool_workers)) * out["latency_s"]
+    return out
+
+
+def build_plan(src: Path, sheets: Sequence[str]) -> List[dict]:
+    specs   = load_sheet_specs()
+    hists   = preload(src, {s: specs.get(s, {}) for s in sheets})
+    lat     = run_store.latency_stats() if run_store.DB_PATH.exists() else {}
+    workers = get_pool().capacity
+    return [plan_sheet(s, hists[s], workers, lat) for s in sheets]
+
+
+def print_plan(plan: List[dict]) -> None:
+    workers = get_pool().capacity
+    print(f"🧮 Trockenlauf – {len(get_pool().endpoints)} Endpunkt(e), Parallelität {workers}")
+    head = ("Sheet", "gemappt", "skip", "ohne Daten", "Journal", "Regel/Σ", "Cache", "LLM",
+            "Aufrufe", "Prompt-Tok", "davon Suffix", "Compl-Tok", "Ø s/Aufruf", "≈ Dauer")
+    rows = []
+    for p in plan:
+        rows.append((p["sheet"], p["mapped"], p["skip"], p["bad"], p["journal"], p["rule"], p["cache"],
+                     p["llm"], f"{p.get('calls', 0):.0f}", p["prompt_tok"], p["suffix_tok"],
+                     p["compl_tok"], f"{p['latency_s']:.1f}{'' if p['measured'] else '*'}",
+                     _fmt_secs(p["seconds"])))
+    tot = lambda k: sum(p.get(k, 0) for p in plan)
+    rows.append(("SUMME", tot("mapped"), tot("skip"), tot("bad"), tot("journal"), tot("rule"), tot("cache"),
+                 tot("llm"), f"{tot('calls'):.0f}", tot("prompt_tok"), tot("suffix_tok"),
+                 tot("compl_tok"), "", _fmt_secs(tot("seconds"))))
+    widths = [max(len(str(r[i])) for r in rows + [head]) for i in range(len(head))]
+    for r in [head] + rows:
+        print("  ".join(str(v).rjust(w) if i else str(v).ljust(w)
+                        for i, (v, w) in enumerate(zip(r, widths))))
+    for p in plan:
+        if p.get("note"):
+            print(f"⚠️  {p['sheet']}: {p['note']}")
+    print(f"* = Schätzwert ohne Messung ({DEFAULT_LATENCY_S:.0f} s); Eskalationsquote "
+          f"{ESCALATION_GUESS:.0%} bei mehrstufiger Kaskade angenommen")
+
+
+def _fmt_secs(s: float) -> str:
+    m, s = divmod(int(round(s)), 60)
+    return f"{m // 60}h{m % 60:02d}m" if m >= 60 else f"{m}m{s:02d}s"
@@ -0,0 +1,150 @@
+"""
+profiling.py – Verschachtelte Timing-Spans für den Forecast-Lauf
+================================================================
+- `span(name, **args)` misst Dauer (perf_counter_ns) und – optional –
+  das Speicher-Delta über tracemalloc
+- Spans sind pro Thread verschachtelt (Sheet → Zeile → Stufe)
+- Export als Chrome-Trace / Perfetto-JSON (`chrome://tracing`, ui.perfetto.dev)
+- `summary()` liefert eine Top-N-Tabelle nach Gesamtzeit
+
+Ist das Profiling deaktiviert (Standard), liefert `span()` ein gemeinsames
+No-op-Objekt zurück – im Hot-Path bleibt nur ein einzelner Bool-Check.
+"""
+
+from __future__ import annotations
+import json, os, threading, time, tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+# ---------------- Zustand ----------------
+_enabled     = False
+_trace_mem   = False
+_events: List[dict] = []
+_events_lock = threading.Lock()
+_local       = threading.local()
+_t_origin    = time.perf_counter_ns()
+
+
+class _NullSpan:
+    """Wird bei deaktiviertem Profiling zurückgegeben – tut nichts."""
+    __slots__ = ()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "args", "t0", "m0")
+
+    def __init__(self, name: str, args: dict):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self.name)
+        self.m0 = tracemalloc.get_traced_memory()[0] if _trace_mem else 0
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        t1 = time.perf_counter_ns()
+        mem = (tracemalloc.get_traced_memory()[0] - self.m0) if _trace_mem else 0
+        stack = _local.stack
+        stack.pop()
+        ev = {
+            "name": self.name,
+            "ph":   "X",
+            "ts":   (self.t0 - _t_origin) / 1000.0,      # µs
+            "dur":  (t1 - self.t0) / 1000.0,             # µs
+            "pid":  os.getpid(),
+            "tid":  threading.get_ident(),
+            "args": {**self.args, "mem_delta_bytes": mem, "depth": len(stack)},
+        }
+        with _events_lock:
+            _events.append(ev)
+        return False
+
+
+# ---------------- Öffentliche API ----------------
+def enable(trace_memory: bool = True) -> None:
+    """Profiling einschalten (optional mit tracemalloc-Speicher-Deltas)."""
+    global _enabled, _trace_mem
+    _enabled   = True
+    _trace_mem = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable() -> None:
+    global _enabled, _trace_mem
+    _enabled = False
+    if _trace_mem and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _trace_mem = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def span(name: str, **args):
+    """Kontextmanager für einen Timing-Span. Bei deaktiviertem Profiling no-op."""
+    if not _enabled:
+        return _NULL
+    return _Span(name, args)
+
+
+def events() -> List[dict]:
+    with _events_lock:
+        return list(_events)
+
+
+def reset() -> None:
+    with _events_lock:
+        _events.clear()
+
+
+def export_chrome_trace(path: Path) -> Path:
+    """Schreibt alle Spans im Chrome-Trace-Format (auch von Perfetto lesbar)."""
+    path.parent.mkdir(exist_ok=True, parents=True)
+    evs = events()
+    meta = [
+        {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+         "args": {"name": f"worker-{i}"}}
+        for i, tid in enumerate(sorted({e["tid"] for e in evs}))
+    ]
+    path.write_text(
+        json.dumps({"traceEvents": meta + evs, "displayTimeUnit": "ms"},
+                   ensure_ascii=False),
+        encoding="utf-8",
+    )
+    return path
+
+
+def summary(top_n: int = 20) -> str:
+    """Top-N-Tabelle: Aufrufe, Summe, Mittel, Max und Speicher-Delta je Span-Name."""
+    agg: Dict[str, List[float]] = {}
+    for e in events():
+        a = agg.setdefault(e["name"], [0, 0.0, 0.0, 0.0])
+        a[0] += 1
+        a[1] += e["dur"]
+        a[2]  = max(a[2], e["dur"])
+        a[3] += e["args"].get("mem_delta_bytes", 0)
+
+    rows = sorted(agg.items(), key=lambda kv: kv[1][1], reverse=True)[:top_n]
+    lines = [
+        f"{'Span':<28} {'Calls':>7} {'Total ms':>11} {'Mean ms':>9} {'Max ms':>9} {'Mem KiB':>10}",
+        "-" * 79,
+    ]
+    for name, (n, total, mx, mem) in rows:
+        lines.append(
+            f"{name[:28]:<28} {n:>7d} {total/1000:>11.1f} {total/n/1000:>9.2f} "
+            f"{mx/1000:>9.2f} {mem/1024:>10.1f}"
+        )
+    return "\n".join(lines)
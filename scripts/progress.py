@@ -0,0 +1,189 @@
+"""
+progress.py – Fortschritt eines Laufs als Ereignis-Strom
+========================================================
+`main.py` meldet sich sonst erst am Ende. Während eines Laufs schreibt es
+strukturierte Ereignisse als JSON-Zeilen nach outputs/progress.jsonl (je
+Ereignis eine Zeile, sofort geflusht):
+
+- `run_started`  – run_id, PID
+- `plan`         – erwartete Zeilen je Sheet und geschätzte Dauer (Trockenlauf)
+- `sheet_started` / `sheet_done` – Sheet, Zeilen, Dauer
+- `answer`       – LLM-Antwort einer Zeile eingetroffen: erledigt/gesamt, ETA
+- `row`          – Endstand einer Zeile nach Validierung & Ensemble: Sheet, Zeile,
+                   Konto, t1..t3, Quelle, Latenz, erledigt/gesamt, ETA
+- `run_done`     – Dauer, Ausgabedatei
+- `run_failed`   – Fehlertext, wenn ein Writer o.ä. scheitert (ohne Text, wenn der
+                   Prozess vorher endet)
+
+Leser (Streamlit) holen mit `follow(offset)` nur die neuen Zeilen seit dem
+letzten Aufruf – ein Datei-Tail statt Socket, funktioniert auch unter Windows
+und überlebt Neustarts der App. Ohne `start()` (Sweep, Backtest, Dienst) sind
+alle Aufrufe wirkungslos.
+"""
+
+from __future__ import annotations
+import atexit, json, os, threading, time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from results import ForecastResult
+
+BASE          = Path(__file__).resolve().parent.parent
+PROGRESS_PATH = BASE / "outputs" / "progress.jsonl"
+
+_lock               = threading.Lock()
+_fh                 = None
+_t0                 = 0.0
+_planned_s          = 0.0
+_t_rows             = 0.0                          # Start der Zeilen-Phase (nach dem Trockenlauf)
+_total: Dict[str, int] = {}                        # Sheet → erwartete Zeilen
+_done:  set         = set()                        # (Sheet, Zeile) – Nachfragen zählen nicht doppelt
+
+
+def _emit(event: str, **data) -> None:
+    """Ereignis anhängen (nur während eines Laufs)."""
+    with _lock:
+        if _fh is None:
+            return
+        rec = {"event": event, "ts": round(time.time(), 3),
+               "elapsed_s": round(time.perf_counter() - _t0, 2), **data}
+        _fh.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        _fh.flush()
+
+
+def start(run_id: Optional[str], path: Path = PROGRESS_PATH) -> None:
+    """Ereignis-Strom für einen Lauf öffnen (ersetzt den des vorigen Laufs)."""
+    global _fh, _t0, _planned_s, _t_rows
+    path.parent.mkdir(exist_ok=True, parents=True)
+    with _lock:
+        _fh, _t0 = path.open("w", encoding="utf-8"), time.perf_counter()
+        _planned_s = _t_rows = 0.0
+        _total.clear()
+        _done.clear()
+    atexit.register(_abort)
+    _emit("run_started", run_id=run_id, pid=os.getpid())
+
+
+def expect(plan: Sequence[dict], planned_s: float) -> None:
+    """Erwartete Zeilen je Sheet aus dem Trockenlauf (planner.build_plan) melden."""
+    global _planned_s, _t_rows
+    rows = {p["sheet"]: p["journal"] + p["rule"] + p["cache"] + p["llm"] for p in plan}
+    with _lock:
+        _total.update(rows)
+        _planned_s, _t_rows = planned_s, time.perf_counter()
+    _emit("plan", rows=rows, total=sum(rows.values()), planned_s=round(planned_s, 1))
+
+
+def sheet_started(sheet: str) -> None:
+    _emit("sheet_started", sheet=sheet, rows=_total.get(sheet, 0))
+
+
+def sheet_done(sheet: str, seconds: float, rows: int) -> None:
+    _emit("sheet_done", sheet=sheet, seconds=round(seconds, 2), rows=rows)
+
+
+def _count(sheet: str, row: int) -> dict:
+    """Zeile als erledigt zählen → erledigt/gesamt und ETA aus dem bisherigen Durchsatz (vorher: Plan)."""
+    with _lock:
+        _done.add((sheet, int(row)))
+        done, total = len(_done), max(sum(_total.values()), len(_done))
+    elapsed = time.perf_counter() - (_t_rows or _t0)
+    eta     = elapsed / done * (total - done) if done else _planned_s
+    return {"done": done, "total": total, "eta_s": round(eta, 1)}
+
+
+def answered(sheet: str, row: Optional[int]) -> None:
+    """LLM-Antwort eingetroffen – zählt für Fortschritt & ETA, die Werte folgen mit `row_done`."""
+    if _fh is None or row is None:
+        return
+    _emit("answer", sheet=sheet, row=int(row), **_count(sheet, row))
+
+
+def row_done(sheet: str, row: Optional[int], account: str, res: ForecastResult) -> None:
+    """Endstand einer Zeile melden (nach Validierung & Ensemble, so wie er ins Planwerk geht)."""
+    if _fh is None or row is None:
+        return
+    _emit("row", sheet=sheet, row=int(row), account=account or "",
+          t1=res.t1, t2=res.t2, t3=res.t3, source=res.source,
+          latency_ms=round(res.latency_ms, 1), **_count(sheet, row))
+
+
+def finish(**data) -> None:
+    """Lauf erfolgreich beendet → `run_done`, Strom schließen."""
+    _emit("run_done", **data)
+    _close()
+
+
+def fail(error: str = "", **data) -> None:
+    """Lauf mit Fehler beendet → `run_failed`, Strom schließen."""
+    _emit("run_failed", error=error, **data)
+    _close()
+
+
+def _close() -> None:
+    global _fh
+    with _lock:
+        if _fh is not None:
+            _fh.close()
+            _fh = None
+
+
+def _abort() -> None:
+    if _fh is not None:                            # Prozess endet ohne finish() (Fehler, Abbruch)
+        _emit("run_failed")
+        _close()
+
+
+# --------------------------------------------------------------------------- #
+#  Lesen (Streamlit)                                                           #
+# --------------------------------------------------------------------------- #
+def follow(offset: int = 0, path: Path = PROGRESS_PATH) -> Tuple[List[dict], int]:
+    """Neue Ereignisse ab Byte-Offset → (Ereignisse, neuer Offset); halbe letzte Zeile bleibt liegen."""
+    if not path.exists():
+        return [], 0
+    with path.open("rb") as f:
+        if f.seek(0, os.SEEK_END) < offset:        # neuer Lauf hat die Datei ersetzt
+            offset = 0
+        f.seek(offset)
+        chunk = f.read()
+    events, used = [], 0
+    for line in chunk.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            break
+        used += len(line)
+        try:
+            events.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return events, offset + used
+
+
+def state(events: Sequence[dict]) -> dict:
+    """Ereignisse → Stand des jüngsten Laufs: Status, erledigt/gesamt, ETA, Sheets, Ergebnisse je Zeile."""
+    fresh = lambda: {"status": "idle", "run_id": None, "done": 0, "total": 0, "eta_s": None,
+                     "elapsed_s": 0.0, "sheets": {}, "rows": {}}
+    st = fresh()
+    for e in events:
+        kind = e.get("event")
+        if kind == "run_started":                  # neuer Lauf ersetzt den Stand
+            st = fresh()
+            st.update(status="running", run_id=e.get("run_id"), pid=e.get("pid"))
+        st["elapsed_s"] = e.get("elapsed_s", st["elapsed_s"])
+        if kind == "plan":
+            st["total"] = e["total"]
+            st["eta_s"] = e["planned_s"]
+            st["sheets"].update({s: "wartet" for s in e["rows"]})
+        elif kind == "sheet_started":
+            st["sheets"][e["sheet"]] = "läuft"
+        elif kind == "sheet_done":
+            st["sheets"][e["sheet"]] = f"fertig ({e['seconds']:.1f}s)"
+        elif kind in ("answer", "row"):
+            if e["done"] >= st["done"]:            # Threads melden nicht streng der Reihe nach
+                st.update(done=e["done"], total=e["total"], eta_s=e["eta_s"])
+            if kind == "row":
+                st["rows"][(e["sheet"], e["row"])] = e
+        elif kind == "run_done":
+            st.update(status="done", eta_s=0.0)
+        elif kind == "run_failed":
+            st.update(status="failed", error=e.get("error", ""))
+    return st
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+reasons.py – Begründungen erst auf Abruf erzeugen
+=================================================
+Mit `reasons: lazy` (llm-Block in sheets.yml, `FORECAST_REASONS=lazy` oder
+`main.py --lazy-reasons`) fragt explain() nur die Zahlen ab – kurze Antwort,
+kaum Completion-Tokens. Die Spalte "reason" enthält dann einen Platzhalter;
+regel-, summen- und baseline-basierte Zeilen behalten ihren festen Text.
+
+Eine Begründung entsteht erst, wenn jemand sie sehen will (Streamlit-Seite
+"Begründungen" oder diese CLI):
+
+- Prompt der Zahlen-Antwort kommt aus dem Run-Store (Tabelle `reasons`),
+  ergänzt um die abgegebene Prognose → gleicher Präfix, KV-Cache greift
+- Gefragt wird das Modell, das die Zahlen geliefert hat (auch nach einer
+  Eskalation in der Kaskade); ältere Einträge ohne Modell → erster Tier
+- Ergebnis wird im Run-Store abgelegt und in alle Zeilen mit demselben Prompt
+  übernommen (auch als Antwort-Cache für spätere Läufe)
+
+    python scripts/reasons.py "PnL (2)!10" "OPEX (2)!3:8" [--run RUN_ID]
+"""
+
+from __future__ import annotations
+import argparse, json
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+import metrics
+import run_store
+from backends import get_pool
+from explanations import PENDING_REASON, _JSON_CLEAN_RE, _invoke, _log, model_tiers
+from loader import load_llm_spec, parse_ref
+
+REASONS = metrics.REGISTRY.counter(
+    "forecast_lazy_reasons_total",
+    "Begründungen auf Abruf nach Ergebnis (generated/cached/failed)")
+
+_TEMPLATE = """\
+Deine Prognose: {{"t1": {t1}, "t2": {t2}, "t3": {t3}}}
+
+Begründe sie jetzt kurz und **account-spezifisch** (max. 20 Wörter): welche
+der Sachverhalte wirken wie auf diese Position?
+
+Antworte in diesem JSON-Format:
+{{"reason": "<Kurztext>"}}
+"""
+
+
+def pending(rec: dict) -> bool:
+    return rec.get("reason") == PENDING_REASON
+
+
+def _generate(rec: dict, prompt: str, model: Optional[str] = None) -> Optional[str]:
+    """Ein LLM-Aufruf (Modell der Zahlen-Antwort) → Begründung, None bei Fehlern."""
+    model = model or model_tiers(load_llm_spec(rec["sheet"]))[0]
+    try:
+        raw, p_tok, c_tok = _invoke(prompt + _TEMPLATE.format(t1=rec["t1"], t2=rec["t2"], t3=rec["t3"]),
+                                    model)
+        metrics.PROMPT_TOKENS.inc(p_tok, sheet=rec["sheet"])
+        metrics.COMPLETION_TOKENS.inc(c_tok, sheet=rec["sheet"])
+        m = _JSON_CLEAN_RE.match(raw)
+        reason = str(json.loads(m.group(1)).get("reason", "")).strip() if m else ""
+        if not reason:
+            raise ValueError("keine Begründung in der Antwort")
+        return reason
+    except Exception as e:
+        _log(f"\nERROR during reason({rec['sheet']}!{rec['row']}): {e}\n")
+        return None
+
+
+def explain_reason(rec: dict) -> dict:
+    """Ergebniszeile aus dem Run-Store → mit Begründung (erzeugt nur, wenn ausstehend)."""
+    if not pending(rec):
+        return rec
+    stored = run_store.lazy_prompt(rec["prompt_hash"])
+    if stored is None:                             # Prompt unbekannt (Lauf ohne Run-Store)
+        REASONS.inc(result="failed")
+        return rec
+    prompt, reason, model = stored
+    if reason:
+        REASONS.inc(result="cached")
+    else:
+        reason = _generate(rec, prompt, model)
+        REASONS.inc(result="generated" if reason else "failed")
+        if reason:
+            run_store.store_reason(rec["prompt_hash"], reason)
+    return {**rec, "reason": reason or rec["reason"]}
+
+
+def explain_refs(refs: Sequence[str], run_id: Optional[str] = None) -> List[dict]:
+    """Bezüge "Sheet!Zeile[:bis]" → Ergebniszeilen mit Begründung (parallel über den Pool)."""
+    recs = []
+    for ref in refs:
+        _, sheet, rows = parse_ref(ref)
+        wanted = set(rows)
+        recs += [r for r in run_store.sheet_results(sheet, run_id) if r["row"] in wanted]
+    n = max(1, min(get_pool().capacity, len(recs)))
+    with ThreadPoolExecutor(max_workers=n, thread_name_prefix="reason") as ex:
+        return list(ex.map(explain_reason, recs))
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Begründungen für einzelne Forecast-Zeilen erzeugen")
+    p.add_argument("refs", nargs="+", metavar="SHEET!ZEILE", help='z.B. "PnL (2)!10" oder "OPEX (2)!3:8"')
+    p.add_argument("--run", default=None, help="run_id (Default: jüngster Lauf je Sheet)")
+    args = p.parse_args(argv)
+    if not run_store.DB_PATH.exists():
+        raise SystemExit(f"❌ Kein Run-Store unter {run_store.DB_PATH}")
+    recs = explain_refs(args.refs, args.run)
+    for r in recs:
+        vals = "/".join("–" if r[k] is None else f"{r[k]:.2f}" for k in ("t1", "t2", "t3"))
+        print(f"  {r['sheet']:<12} {r['row']:>3}  {(r['account'] or '')[:40]:<40} {vals:<30} "
+              f"[{r['source']}] {r['reason']}")
+    print(f"💬 {len(recs)} Zeilen, {REASONS.total(result='generated'):.0f} Begründungen erzeugt, "
+          f"{REASONS.total(result='cached'):.0f} aus dem Run-Store")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+results.py – Typisierte Forecast-Ergebnisse statt JSON-Texten
+=============================================================
+`explain()` & Co. liefern bislang JSON-Texte, die jeder Abnehmer (Writer,
+Validierung, Ensemble, Run-Store, Roll-up) erneut mit `json.loads` parst und
+Feld für Feld mit `isinstance` prüft. Stattdessen:
+
+- `ForecastResult`: kompakter Datensatz (`__slots__`) mit t1..t3 (float oder
+  None), Begründung, Quelle, Latenz und Token-Zahlen, optional dem
+  Unsicherheitsband aus mehreren Stichproben (sampling.py); Zahlen werden
+  genau einmal beim Einlesen der LLM-Antwort geprüft
+- `MonthlyResult`: Monatshorizont eines Kontos aus einem Aufruf (monthly.py)
+- `ResultTable`: spaltenweise Tabelle aller Ergebnisse eines Laufs (Werte als
+  NumPy-Matrix Zeilen × 3) – Run-Store und Auswertungen lesen sie gesammelt
+- JSON nur noch an den Grenzen: Journal, HTTP-Dienst
+"""
+
+from __future__ import annotations
+import json, threading
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+HORIZON = ("t1", "t2", "t3")
+
+
+def _num(v) -> Optional[float]:
+    return float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else None
+
+
+class ForecastResult:
+    """Ergebnis einer Forecast-Zeile (t1..t3, Begründung, Herkunft, Kosten)."""
+
+    __slots__ = ("t1", "t2", "t3", "reason", "source", "latency_ms",
+                 "prompt_tokens", "completion_tokens", "weights", "band", "prompt_hash")
+
+    def __init__(self, t1: Optional[float], t2: Optional[float], t3: Optional[float],
+                 reason: str = "", source: str = "llm", latency_ms: float = 0.0,
+                 prompt_tokens: int = 0, completion_tokens: int = 0,
+                 weights: Optional[Dict[str, float]] = None,
+                 band: Optional[dict] = None,
+                 prompt_hash: str = "") -> None:
+        self.t1, self.t2, self.t3 = t1, t2, t3
+        self.reason            = reason
+        self.source            = source
+        self.latency_ms        = latency_ms
+        self.prompt_tokens     = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.weights           = weights           # Ensemble-Gewichte je Methode
+        self.band              = band              # {"lo": [..], "hi": [..], "n": K} aus Stichproben
+        self.prompt_hash       = prompt_hash       # Schlüssel der LLM-Antwort (Cache, Journal, Begründung)
+
+    @classmethod
+    def of(cls, values: Sequence[Optional[float]], reason: str, source: str, **kw) -> "ForecastResult":
+        t1, t2, t3 = (list(values) + [None] * 3)[:3]
+        return cls(_num(t1), _num(t2), _num(t3), reason, source, **kw)
+
+    @classmethod
+    def from_obj(cls, obj: dict, source: str, **kw) -> "ForecastResult":
+        """Geparste LLM-/Cache-Antwort übernehmen; nicht-numerische Werte → None."""
+        return cls.of([obj.get(k) for k in HORIZON], str(obj.get("reason", "")), source,
+                      weights=obj.get("ensemble"), band=obj.get("band"), **kw)
+
+    @classmethod
+    def from_json(cls, text: str, source: str, **kw) -> "ForecastResult":
+        try:
+            obj = json.loads(text)
+        except (TypeError, ValueError):
+            obj = {}
+        return cls.from_obj(obj if isinstance(obj, dict) else {}, source, **kw)
+
+    @property
+    def values(self) -> List[Optional[float]]:
+        return [self.t1, self.t2, self.t3]
+
+    def replace(self, **kw) -> "ForecastResult":
+        """Kopie mit geänderten Feldern (Ergebnisse werden zwischen Threads geteilt)."""
+        return ForecastResult(**{**{k: getattr(self, k) for k in self.__slots__}, **kw})
+
+    def to_dict(self) -> dict:
+        obj = {"t1": self.t1, "t2": self.t2, "t3": self.t3, "reason": self.reason}
+        if self.weights:
+            obj["ensemble"] = self.weights
+        if self.band:
+            obj["band"] = self.band
+        return obj
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    def __repr__(self) -> str:
+        shown = ", ".join("–" if v is None else f"{v:.2f}" for v in self.values)
+        return f"ForecastResult({shown}; {self.source}; {self.reason!r})"
+
+
+class MonthlyResult:
+    """Monatswerte eines Kontos für den ganzen Horizont (ein LLM-Aufruf, monthly.py)."""
+
+    __slots__ = ("months", "reason", "source", "latency_ms")
+
+    def __init__(self, months: Sequence[float], reason: str = "", source: str = "llm",
+                 latency_ms: float = 0.0) -> None:
+        self.months     = [float(v) for v in months]
+        self.reason     = reason
+        self.source     = source
+        self.latency_ms = latency_ms
+
+    def replace(self, **kw) -> "MonthlyResult":
+        return MonthlyResult(**{**{k: getattr(self, k) for k in self.__slots__}, **kw})
+
+    def to_dict(self) -> dict:
+        return {"months": self.months, "reason": self.reason}
+
+    def __repr__(self) -> str:
+        return f"MonthlyResult({len(self.months)} Monate; {self.source}; {self.reason!r})"
+
+
+def matrix(results: Sequence[ForecastResult]) -> np.ndarray:
+    """Ergebnisse → Matrix Zeilen × 3 (NaN für fehlende Werte)."""
+    return np.array([r.values for r in results], dtype=float).reshape(len(results), len(HORIZON))
+
+
+class ResultTable:
+    """
+    Spaltenweise Ergebnisse eines Laufs (eine Zeile je Sheet-Zeile, spätere
+    Einträge derselben Zeile – z.B. Baseline nach Validierung – bleiben als
+    weitere Zeile erhalten; `latest()` liefert je Zeile den letzten Stand).
+    """
+
+    COLUMNS = ("sheet", "row", "account", "history", "reason", "source", "prompt_hash")
+
+    def __init__(self) -> None:
+        self._lock  = threading.Lock()
+        self._cols: Dict[str, list] = {c: [] for c in self.COLUMNS}
+        self._vals: List[List[Optional[float]]] = []
+        self._num:  List[tuple] = []                  # (Latenz ms, Prompt-, Completion-Tokens)
+
+    def add(self, sheet: str, row: int, account: str, history: Sequence[float],
+            res: ForecastResult, prompt_hash: str = "") -> None:
+        with self._lock:
+            for c, v in zip(self.COLUMNS, (sheet, int(row), account, list(history),
+                                            res.reason, res.source, prompt_hash)):
+                self._cols[c].append(v)
+            self._vals.append(res.values)
+            self._num.append((res.latency_ms, res.prompt_tokens, res.completion_tokens))
+
+    def __len__(self) -> int:
+        return len(self._vals)
+
+    def column(self, name: str, start: int = 0) -> list:
+        with self._lock:
+            return list(self._cols[name][start:])
+
+    def values(self, start: int = 0) -> np.ndarray:
+        """t1..t3 aller Einträge ab `start` als Matrix (NaN = fehlt)."""
+        with self._lock:
+            vals = self._vals[start:]
+        return np.array(vals, dtype=float).reshape(len(vals), len(HORIZON))
+
+    def costs(self, start: int = 0) -> np.ndarray:
+        """Latenz (ms), Prompt- und Completion-Tokens je Eintrag als Matrix."""
+        with self._lock:
+            num = self._num[start:]
+        return np.array(num, dtype=float).reshape(len(num), 3)
+
+    def records(self, start: int = 0) -> Iterator[tuple]:
+        """Einträge ab `start` zeilenweise (für executemany in den Run-Store)."""
+        with self._lock:
+            cols = [self._cols[c][start:] for c in self.COLUMNS]
+            vals, num = self._vals[start:], self._num[start:]
+        for (sheet, row, account, hist, reason, source, key), v, n in zip(zip(*cols), vals, num):
+            yield sheet, row, account, hist, v, reason, source, n[0], key
+
+    def latest(self) -> Dict[tuple, int]:
+        """(Sheet, Zeile) → Index des jüngsten Eintrags."""
+        with self._lock:
+            return {k: i for i, k in enumerate(zip(self._cols["sheet"], self._cols["row"]))}
+
+    def clear(self) -> None:
+        with self._lock:
+            for col in self._cols.values():
+                col.clear()
+            self._vals.clear()
+            self._num.clear()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+rules.py – Deterministische Szenario-Regeln (vektorisiert)
+=========================================================
+Die meisten Sachverhalte sind schlichte Rechenregeln ("Russland = 0 ab t1",
+"+20 % p.a.", "Reisekosten = 2 % des Umsatzes"). config/rules.yml beschreibt
+sie deklarativ; `evaluate()` wendet alle Regeln in einem Durchgang auf die
+komplette Historienmatrix (alle Forecast-Konten aller Sheets × t-2..t0) an:
+
+- Regeln → Arrays: Art der Basis (t0 / fester Wert / Bezugskonten),
+  Faktoren (Konto × Periode), Bezugsmatrix R (Konto × Konto), Grenzen
+- Ergebnis = Basis ⊙ Faktor, Bezugs-Konten als R @ Plan (mehrstufig,
+  bis sich nichts mehr ändert), danach clip(floor, cap)
+- Konten mit Regel gehen nicht ans LLM (pipeline.explain_rows), der
+  regelgedeckte Teil des Plans steht in Millisekunden fest
+
+    python scripts/rules.py            # Regel-Ergebnisse auf der Konsole
+"""
+
+from __future__ import annotations
+import argparse, json, re, threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import yaml
+
+import xlsx_stream
+from explanations import _contexts, ruled
+from forecast import STAT_METHODS
+from loader import load_sheet_specs
+from results import ForecastResult
+
+BASE      = Path(__file__).resolve().parent.parent
+RULES_CFG = BASE / "config" / "rules.yml"
+HORIZON   = 3
+BASE_OPS  = {"set": "fester Wert", "factor": "Vielfaches von t0", "growth": "Wachstum ab t0",
+             "ratio": "Anteil an Bezugskonten"}
+
+Key = Tuple[str, int]                              # (Sheet, Zeile)
+
+_lock = threading.Lock()
+_mem:  Dict[tuple, Dict[Key, Tuple[List[float], str]]] = {}
+
+
+# --------------------------------------------------------------------------- #
+#  Regeln laden & prüfen                                                      #
+# --------------------------------------------------------------------------- #
+def load_rules(path: Path = RULES_CFG) -> List[dict]:
+    if not path.exists():
+        return []
+    rules = (yaml.safe_load(path.read_text(encoding="utf-8")) or {}).get("rules") or []
+    for rule in rules:
+        ops = [op for op in BASE_OPS if op in rule]
+        if len(ops) != 1:
+            raise ValueError(f"Regel {rule.get('name')!r}: genau eine Basis-Operation "
+                             f"({'/'.join(BASE_OPS)}) nötig, gefunden: {ops or 'keine'}")
+        if "target" not in rule:
+            raise ValueError(f"Regel {rule.get('name')!r}: 'target' fehlt")
+    return rules
+
+
+def active_rules(rules: Sequence[dict], contexts: Optional[Sequence[str]] = None) -> List[dict]:
+    """Regeln, deren Sachverhalt (`case`) in den aktiven Sachverhalten steht."""
+    if contexts is None:
+        return list(rules)
+    have = set(contexts)
+    return [r for r in rules
+            if "case" not in r or (0 < int(r["case"]) <= len(_contexts)
+                                   and _contexts[int(r["case"]) - 1] in have)]
+
+
+def _vec(x) -> np.ndarray:
+    v = np.asarray(x, dtype=float).reshape(-1)
+    if v.size not in (1, HORIZON):
+        raise ValueError(f"Regel-Wert {x!r}: Skalar oder [t1, t2, t3] erwartet")
+    return np.broadcast_to(v, (HORIZON,)).copy()
+
+
+def _select(target, keys: Sequence[Key], names: Sequence[str]) -> np.ndarray:
+    """Auswahl (Dict oder Liste von Dicts) → Maske über alle Konten."""
+    mask = np.zeros(len(keys), dtype=bool)
+    for sel in target if isinstance(target, list) else [target]:
+        rows  = {int(r) for r in sel.get("rows") or []}
+        accs  = set(sel.get("accounts") or [])
+        rx    = re.compile(sel["match"]) if sel.get("match") else None
+        whole = not (rows or accs or rx)
+        for i, ((sheet, row), name) in enumerate(zip(keys, names)):
+            if sheet == sel["sheet"] and (whole or row in rows or name in accs
+                                          or (rx is not None and rx.search(name))):
+                mask[i] = True
+    return mask
+
+
+# --------------------------------------------------------------------------- #
+#  Auswertung                                                                 #
+# --------------------------------------------------------------------------- #
+def evaluate(H: np.ndarray, rules: Sequence[dict], keys: Sequence[Key],
+             names: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Historienmatrix (Konto × Periode, letzte Spalte = t0) → (Plan Konto × 3,
+    Index der bestimmenden Regel je Konto, −1 = keine Regel).
+    """
+    n     = len(keys)
+    t0    = H[:, -1]
+    kind  = np.zeros(n, dtype=int)                 # 0 ohne, 1 t0 × F, 2 F, 3 R @ Plan × F
+    F     = np.ones((n, HORIZON))
+    R     = np.zeros((n, n))
+    lo    = np.full((n, HORIZON), -np.inf)
+    hi    = np.full((n, HORIZON), np.inf)
+    who   = np.full(n, -1)
+
+    for k, rule in enumerate(rules):
+        m = _select(rule["target"], keys, names)
+        if "set" in rule:
+            kind[m], F[m] = 2, _vec(rule["set"])
+        elif "factor" in rule:
+            kind[m], F[m] = 1, _vec(rule["factor"])
+        elif "growth" in rule:
+            kind[m], F[m] = 1, np.cumprod(1 + _vec(rule["growth"]))
+        else:
+            spec = rule["ratio"]
+            src  = _select(spec["of"], keys, names)
+            R[m] = 0.0
+            if spec.get("mode", "share") == "follow":
+                total = t0[src].sum()
+                R[np.ix_(m, src)] = (t0[m] / total)[:, None] if total else 0.0
+            else:
+                R[np.ix_(m, src)] = 1.0
+            kind[m], F[m] = 3, _vec(spec.get("factor", 1.0))
+        who[m] = k
+        if "cap" in rule:
+            hi[m] = np.minimum(hi[m], _vec(rule["cap"]))
+        if "floor" in rule:
+            lo[m] = np.maximum(lo[m], _vec(rule["floor"]))
+
+    # Konten ohne Regel (mögliche Bezugskonten) mit ihrer CAGR-Baseline
+    plan = np.where((kind == 0)[:, None], STAT_METHODS["cagr"](H, HORIZON),
+                    np.where((kind == 2)[:, None], 1.0, t0[:, None]) * F)
+    lin  = kind == 3
+    for _ in range(int(lin.sum())):                # Ketten von Bezügen, höchstens so lang wie Konten
+        new = (R[lin] @ plan) * F[lin]
+        if np.allclose(new, plan[lin], equal_nan=True):
+            break
+        plan[lin] = new
+    plan = np.clip(plan, lo, hi)
+    return np.round(plan, 2), who
+
+
+def catalog(src: Path = xlsx_stream.SRC_XLSX) -> Tuple[List[Key], List[str], np.ndarray]:
+    """Alle Forecast-Konten aller Sheets → (Schlüssel, Kontotexte, Historie Konto × Periode)."""
+    from pipeline import sheet_jobs
+    hists = xlsx_stream.preload(src)
+    keys, names, H = [], [], []
+    for sheet in load_sheet_specs():
+        if sheet not in hists:
+            continue
+        for row, acc, hist in sheet_jobs(sheet, hists[sheet])[0]:
+            keys.append((sheet, row))
+            names.append(acc)
+            H.append(hist)
+    return keys, names, np.array(H, dtype=float).reshape(len(keys), -1)
+
+
+def _describe(rule: dict) -> str:
+    text = f"Regel „{rule.get('name', '?')}“"
+    if "case" in rule:
+        text += f" (Sachverhalt {rule['case']})"
+    op = next(op for op in BASE_OPS if op in rule)
+    return f"{text}: {rule.get('reason') or BASE_OPS[op]}"
+
+
+def results(contexts: Optional[Sequence[str]] = None,
+            src: Path = xlsx_stream.SRC_XLSX) -> Dict[Key, Tuple[List[float], str]]:
+    """Regel-Ergebnisse aller Konten mit Regel (einmal je Sachverhalts-Satz berechnet)."""
+    every = load_rules()
+    rules = active_rules(every, contexts)
+    memo  = (str(src), tuple(i for i, r in enumerate(every) if r in rules))
+    with _lock:
+        if memo not in _mem:
+            keys, names, H = catalog(src)
+            plan, who = evaluate(H, rules, keys, names) if rules and keys else (None, [])
+            _mem[memo] = {keys[i]: ([float(v) for v in plan[i]], _describe(rules[k]))
+                          for i, k in enumerate(who) if k >= 0}
+        return _mem[memo]
+
+
+def apply(sheet: str, jobs: Sequence[tuple],
+          contexts: Optional[Sequence[str]] = None) -> Dict[int, ForecastResult]:
+    """Jobs eines Sheets mit Regel → {Zeile: Ergebnis}; der Rest geht ans LLM."""
+    res = results(contexts)
+    return {r: ruled(*res[(sheet, r)], sheet=sheet) for r, _, _ in jobs if (sheet, r) in res}
+
+
+def covered(sheet: str, contexts: Optional[Sequence[str]] = None) -> set:
+    """Zeilen eines Sheets, die eine Regel abdeckt (für Trockenlauf/Planer)."""
+    return {r for s, r in results(contexts) if s == sheet}
+
+
+def reset() -> None:
+    with _lock:
+        _mem.clear()
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Szenario-Regeln auswerten (ohne LLM)")
+    p.add_argument("--src", type=Path, default=xlsx_stream.SRC_XLSX)
+    args = p.parse_args(argv)
+    res = results(src=args.src)
+    for (sheet, row), (vals, reason) in sorted(res.items()):
+        print(f"  {sheet:<12} {row:>3}  {json.dumps(vals):<30} {reason}")
+    print(f"📏 {len(res)} Konten per Regel berechnet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+run_store.py – Versionierter Forecast-Speicher (SQLite)
+=======================================================
+- Jeder Lauf bekommt eine run_id; jede prognostizierte Zeile wird mit
+  Historie, t1–t3, Begründung, Quelle (llm/baseline/cache) und Latenz abgelegt
+- Indizes auf (run_id, sheet, row), (account, run_id) und prompt_hash
+- Diff zweier Läufe und Accuracy-Export gegen später vorliegende Ist-Werte
+- Dient zugleich als persistente Stufe des Antwort-Caches in explanations.py:
+  `answers` hält die rohe LLM-Antwort je Prompt, `results` den Endstand der
+  Zeile nach Validierung und Ensemble
+
+    python scripts/run_store.py runs [--limit 20]
+    python scripts/run_store.py diff RUN_A RUN_B [--min-change 0.05]
+    python scripts/run_store.py account "Miete"
+    python scripts/run_store.py accuracy RUN_ID NEUE_PLANUNG.xlsx [--shift 1] [--out acc.csv] [--learn]
+"""
+
+from __future__ import annotations
+import argparse, csv, sqlite3, sys, threading, uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from results import ForecastResult, ResultTable
+
+BASE    = Path(__file__).resolve().parent.parent
+DB_PATH = BASE / "outputs" / "forecast_runs.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    started_at  TEXT NOT NULL,
+    finished_at TEXT,
+    model       TEXT,
+    source_xlsx TEXT,
+    note        TEXT,
+    n_rows      INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id      TEXT    NOT NULL,
+    sheet       TEXT    NOT NULL,
+    row         INTEGER NOT NULL,
+    account     TEXT,
+    h_t2        REAL,
+    h_t1        REAL,
+    h_t0        REAL,
+    t1          REAL,
+    t2          REAL,
+    t3          REAL,
+    reason      TEXT,
+    source      TEXT,
+    latency_ms  REAL,
+    prompt_hash TEXT,
+    PRIMARY KEY (run_id, sheet, row)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_results_account ON results (account, run_id);
+CREATE INDEX IF NOT EXISTS ix_results_prompt  ON results (prompt_hash, source);
+CREATE TABLE IF NOT EXISTS method_errors (
+    sheet       TEXT    NOT NULL,
+    grp         TEXT    NOT NULL,
+    method      TEXT    NOT NULL,
+    mape        REAL    NOT NULL,
+    n           INTEGER,
+    updated_at  TEXT,
+    PRIMARY KEY (sheet, grp, method)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS answers (
+    prompt_hash TEXT    PRIMARY KEY,
+    t1          REAL,
+    t2          REAL,
+    t3          REAL,
+    reason      TEXT,
+    created_at  TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS reasons (
+    prompt_hash TEXT    PRIMARY KEY,
+    prompt      TEXT    NOT NULL,
+    reason      TEXT,
+    created_at  TEXT,
+    model       TEXT
+) WITHOUT ROWID;
+"""
+
+# Spalten, die nach dem ersten Release dazugekommen sind (ältere Datenbanken nachrüsten)
+_ADDED_COLS = {"reasons": {"model": "TEXT"}}
+
+_RESULT_COLS = ("run_id", "sheet", "row", "account", "h_t2", "h_t1", "h_t0",
+                "t1", "t2", "t3", "reason", "source", "latency_ms", "prompt_hash")
+
+# ---------------- Verbindung & Laufzustand ----------------
+_conn: sqlite3.Connection | None = None
+_lock       = threading.Lock()
+_current:   Optional[str] = None
+_table      = ResultTable()                # Ergebnisse des laufenden Laufs (spaltenweise)
+_flushed    = 0                            # davon schon in SQLite
+_prompts:   Dict[str, tuple] = {}          # Prompt-Hash → (Prompt, Modell) (Begründungen auf Abruf)
+_answers:   Dict[str, tuple] = {}          # Prompt-Hash → (t1, t2, t3, Begründung) der LLM-Antwort
+
+def connect(path: Path = DB_PATH) -> sqlite3.Connection:
+    global _conn
+    with _lock:
+        if _conn is None:
+            path.parent.mkdir(exist_ok=True, parents=True)
+            _conn = sqlite3.connect(path, check_same_thread=False)
+            _conn.execute("PRAGMA journal_mode=WAL")
+            _conn.execute("PRAGMA synchronous=NORMAL")
+            _conn.executescript(_SCHEMA)
+            for tbl, cols in _ADDED_COLS.items():
+                have = {r[1] for r in _conn.execute(f"PRAGMA table_info({tbl})")}
+                for col, typ in cols.items():
+                    if col not in have:
+                        _conn.execute(f"ALTER TABLE {tbl} ADD COLUMN {col} {typ}")
+        return _conn
+
+
+def current_run() -> Optional[str]:
+    return _current
+
+
+def begin_run(model: str = "", source_xlsx: str = "", note: str = "") -> str:
+    """Neuen Lauf anlegen; ab jetzt werden record()-Aufrufe gepuffert."""
+    global _current
+    conn   = connect()
+    run_id = datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+    with _lock:
+        conn.execute(
+            "INSERT INTO runs (run_id, started_at, model, source_xlsx, note) VALUES (?,?,?,?,?)",
+            (run_id, datetime.now().isoformat(timespec="seconds"), model, source_xlsx, note),
+        )
+        conn.commit()
+        _current = run_id
+        _reset_table()
+    return run_id
+
+
+def resume_run(run_id: str) -> bool:
+    """Unterbrochenen Lauf fortsetzen (bei --resume); False, wenn unbekannt."""
+    global _current
+    conn = connect()
+    with _lock:
+        if conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone() is None:
+            return False
+        _current = run_id
+        _reset_table()
+    return True
+
+
+def _reset_table() -> None:
+    global _flushed
+    _table.clear()
+    _flushed = 0
+
+
+def table() -> ResultTable:
+    """Spaltenweise Ergebnisse des laufenden (bzw. zuletzt beendeten) Laufs."""
+    return _table
+
+
+def record(sheet: str, row: Optional[int], account: str, history: Sequence[float],
+           res: ForecastResult, prompt_hash: str = "") -> None:
+    """Ergebnis einer Zeile in die Lauf-Tabelle (no-op, solange kein Lauf aktiv ist)."""
+    if _current is None or row is None:
+        return
+    _table.add(sheet, row, account, history, res, prompt_hash)
+
+
+def flush() -> int:
+    """Neue Zeilen der Lauf-Tabelle in einer Transaktion schreiben."""
+    global _flushed
+    if _current is None:
+        return 0
+    conn = connect()
+    with _lock:
+        rows = [(_current, sheet, row, account, *(list(hist) + [None] * 3)[:3], *vals,
+                 reason, source, latency_ms, key)
+                for sheet, row, account, hist, vals, reason, source, latency_ms, key
+                in _table.records(_flushed)]
+        _flushed += len(rows)
+        prompts = [(k, *v) for k, v in _prompts.items()]
+        _prompts.clear()
+        answers = [(k, *v, datetime.now().isoformat(timespec="seconds")) for k, v in _answers.items()]
+        _answers.clear()
+        if rows:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO results ({','.join(_RESULT_COLS)}) "
+                f"VALUES ({','.join('?' * len(_RESULT_COLS))})",
+                rows,
+            )
+        if prompts:
+            conn.executemany("INSERT OR IGNORE INTO reasons (prompt_hash, prompt, model) VALUES (?, ?, ?)",
+                             prompts)
+        if answers:
+            conn.executemany("INSERT OR REPLACE INTO answers (prompt_hash, t1, t2, t3, reason, created_at) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", answers)
+        if rows or prompts or answers:
+            conn.commit()
+    return len(rows)
+
+
+def finish_run() -> Optional[str]:
+    global _current
+    if _current is None:
+        return None
+    flush()
+    conn = connect()
+    with _lock:
+        conn.execute(
+            "UPDATE runs SET finished_at = ?, "
+            "n_rows = (SELECT COUNT(*) FROM results WHERE run_id = ?) WHERE run_id = ?",
+            (datetime.now().isoformat(timespec="seconds"), _current, _current),
+        )
+        conn.commit()
+        run_id, _current = _current, None
+    return run_id
+
+
+# ---------------- Cache-Stufe ----------------
+def remember_answer(prompt_hash: str, res: ForecastResult) -> None:
+    """Rohe LLM-Antwort puffern – der Cache liefert die Antwort, nicht den gemischten Endstand."""
+    if _current is None:
+        return
+    with _lock:
+        _answers[prompt_hash] = (*res.values, res.reason)
+
+
+def lookup_cached(prompt_hash: str) -> Optional[ForecastResult]:
+    """Jüngste LLM-Antwort zum identischen Prompt (aus irgendeinem Lauf)."""
+    conn = connect()
+    with _lock:
+        r = conn.execute(
+            "SELECT t1, t2, t3, reason FROM answers WHERE prompt_hash = ?", (prompt_hash,),
+        ).fetchone()
+    if r is None:
+        return None
+    return ForecastResult.of(r[:3], r[3] or "", "cache")
+
+
+# ---------------- Begründungen auf Abruf (reasons.py) ----------------
+def remember_prompt(prompt_hash: str, prompt: str, model: str = "") -> None:
+    """Prompt und antwortendes Modell einer Zahlen-Antwort puffern – Grundlage der späteren Begründung."""
+    if _current is None:
+        return
+    with _lock:
+        _prompts[prompt_hash] = (prompt, model)
+
+
+def lazy_prompt(prompt_hash: str) -> Optional[tuple]:
+    """(Prompt, Begründung oder None, Modell oder None) zu einem Prompt-Hash; None = unbekannt."""
+    conn = connect()
+    with _lock:
+        return conn.execute("SELECT prompt, reason, model FROM reasons WHERE prompt_hash = ?",
+                            (prompt_hash,)).fetchone()
+
+
+def store_reason(prompt_hash: str, reason: str) -> None:
+    """Erzeugte Begründung ablegen und in alle Ergebnisse mit diesem Prompt übernehmen."""
+    conn = connect()
+    with _lock:
+        conn.execute("UPDATE reasons SET reason = ?, created_at = ? WHERE prompt_hash = ?",
+                     (reason, datetime.now().isoformat(timespec="seconds"), prompt_hash))
+        conn.execute("UPDATE results SET reason = ? WHERE prompt_hash = ? AND source IN ('llm', 'cache')",
+                     (reason, prompt_hash))
+        conn.execute("UPDATE answers SET reason = ? WHERE prompt_hash = ?", (reason, prompt_hash))
+        if prompt_hash in _answers:                # Antwort des laufenden Laufs noch im Puffer
+            _answers[prompt_hash] = (*_answers[prompt_hash][:3], reason)
+        conn.commit()
+
+
+def sheet_results(sheet: str, run_id: Optional[str] = None) -> List[dict]:
+    """Ergebnisse eines Sheets aus einem Lauf (Default: jüngster Lauf mit diesem Sheet)."""
+    conn = connect()
+    with _lock:
+        if run_id is None:
+            hit = conn.execute("SELECT MAX(run_id) FROM results WHERE sheet = ?", (sheet,)).fetchone()
+            run_id = hit[0] if hit else None
+        rows = conn.execute(
+            "SELECT run_id, sheet, row, account, t1, t2, t3, reason, source, prompt_hash "
+            "FROM results WHERE run_id = ? AND sheet = ? ORDER BY row", (run_id, sheet),
+        ).fetchall()
+    keys = ("run_id", "sheet", "row", "account", "t1", "t2", "t3", "reason", "source", "prompt_hash")
+    return [dict(zip(keys, r)) for r in rows]
+
+
+# ---------------- Methodenfehler (Ensemble-Gewichte) ----------------
+def method_errors(sheet: str) -> Dict[tuple, float]:
+    """(Kontogruppe, Methode) → geglätteter MAPE eines Sheets."""
+    conn = connect()
+    with _lock:
+        rows = conn.execute(
+            "SELECT grp, method, mape FROM method_errors WHERE sheet = ?", (sheet,),
+        ).fetchall()
+    return {(g, m): e for g, m, e in rows}
+
+
+def update_method_errors(rows: Sequence[tuple], alpha: float = 0.5) -> int:
+    """
+    (Sheet, Kontogruppe, Methode, MAPE, n) einpflegen; vorhandene Werte werden
+    exponentiell geglättet: neu = alpha × gemessen + (1 − alpha) × alt.
+    """
+    conn = connect()
+    now  = datetime.now().isoformat(timespec="seconds")
+    with _lock:
+        conn.executemany(
+            """
+            INSERT INTO method_errors (sheet, grp, method, mape, n, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (sheet, grp, method) DO UPDATE SET
+                mape       = ? * excluded.mape + (1 - ?) * method_errors.mape,
+                n          = excluded.n,
+                updated_at = excluded.updated_at
+            """,
+            [(*r, now, alpha, alpha) for r in rows],
+        )
+        conn.commit()
+    return len(rows)
+
+
+# ---------------- Abfragen ----------------
+def list_runs(limit: int = 20) -> List[tuple]:
+    conn = connect()
+    return conn.execute(
+        "SELECT run_id, started_at, finished_at, model, n_rows FROM runs "
+        "ORDER BY run_id DESC LIMIT ?", (limit,),
+    ).fetchall()
+
+
+def account_history(account: str, limit: int = 50) -> List[tuple]:
+    conn = connect()
+    return conn.execute(
+        "SELECT run_id, sheet, row, t1, t2, t3, source, reason FROM results "
+        "WHERE account = ? ORDER BY run_id DESC LIMIT ?", (account, limit),
+    ).fetchall()
+
+
+def latency_stats(last_runs: int = 5) -> Dict[str, tuple]:
+    """Sheet → (Anzahl, mittlere Latenz ms) der LLM-Zeilen in den letzten Läufen."""
+    conn = connect()
+    rows = conn.execute(
+        """
+        SELECT sheet, COUNT(*), AVG(latency_ms) FROM results
+         WHERE source = 'llm'
+           AND run_id IN (SELECT run_id FROM runs ORDER BY run_id DESC LIMIT ?)
+         GROUP BY sheet
+        """, (last_runs,),
+    ).fetchall()
+    return {sheet: (n, avg) for sheet, n, avg in rows}
+
+
+def diff(run_a: str, run_b: str, min_change: float = 0.0) -> List[tuple]:
+    """
+    Zeilen, deren t1–t3 sich zwischen zwei Läufen um mehr als `min_change`
+    (relativ) unterscheiden. Join über den Primärschlüssel (sheet, row).
+    """
+    conn = connect()
+    return conn.execute(
+        """
+        SELECT a.sheet, a.row, a.account,
+               a.t1, b.t1, a.t2, b.t2, a.t3, b.t3, a.source, b.source
+          FROM results a
+          JOIN results b ON b.run_id = ? AND b.sheet = a.sheet AND b.row = a.row
+         WHERE a.run_id = ?
+           AND (  abs(coalesce(b.t1,0) - coalesce(a.t1,0)) > ? * max(abs(coalesce(a.t1,0)), 1e-9)
+               OR abs(coalesce(b.t2,0) - coalesce(a.t2,0)) > ? * max(abs(coalesce(a.t2,0)), 1e-9)
+               OR abs(coalesce(b.t3,0) - coalesce(a.t3,0)) > ? * max(abs(coalesce(a.t3,0)), 1e-9))
+         ORDER BY a.sheet, a.row
+        """,
+        (run_b, run_a, min_change, min_change, min_change),
+    ).fetchall()
+
+
+def accuracy(run_id: str, actuals_xlsx: Path, shift: int = 1) -> List[Dict]:
+    """
+    Vergleicht die Prognosen eines Laufs mit Ist-Werten aus einer späteren
+    Planungsdatei. `shift` = Anzahl Jahre zwischen den Dateien: bei shift=1
+    ist t0 der neuen Datei das Ist zu t1 des alten Laufs, bei shift=2 sind
+    t-1/t0 das Ist zu t1/t2 usw. Zuordnung über (Sheet, Kontotext).
+    Perioden vor t-2 stehen nicht in der Datei und werden übersprungen.
+    Je Vergleich steht daneben die rohe LLM-Antwort (`llm`, vor Ensemble und
+    Validierung; None ohne LLM) und die Historie – daraus lernt ensemble.learn().
+    """
+    from xlsx_stream import preload
+    from loader import load_sheet_specs
+
+    conn  = connect()
+    rows  = conn.execute(
+        """
+        SELECT r.sheet, r.row, r.account, r.t1, r.t2, r.t3, a.t1, a.t2, a.t3, r.h_t2, r.h_t1, r.h_t0
+          FROM results r
+          LEFT JOIN answers a ON a.prompt_hash = r.prompt_hash AND r.source IN ('llm', 'cache')
+         WHERE r.run_id = ?
+        """, (run_id,),
+    ).fetchall()
+    sheets = {r[0] for r in rows}
+    hists  = preload(actuals_xlsx, {s: load_sheet_specs().get(s, {}) for s in sheets})
+
+    # Ist-Spalte je Horizont: t_k ↔ Periode t0-(shift-k) der neuen Datei
+    period_arrays = {0: "t0", 1: "t1", 2: "t2"}            # Abstand zu t0 → Array-Name
+    out: List[Dict] = []
+    for sheet, row, account, *vals in rows:
+        fc, llm, history = vals[:3], vals[3:6], vals[6:]
+        hist = hists[sheet]
+        idx  = {a: i for i, a in enumerate(hist.accounts) if a}
+        i    = idx.get(account)
+        if i is None:
+            continue
+        for k in range(1, min(shift, 3) + 1):
+            if shift - k not in period_arrays:
+                continue
+            arr    = getattr(hist, period_arrays[shift - k])
+            actual = arr[i]
+            pred   = fc[k - 1]
+            if pred is None or actual != actual:             # NaN
+                continue
+            err = pred - actual
+            out.append({
+                "sheet": sheet, "row": row, "account": account, "horizon": f"t{k}",
+                "forecast": pred, "actual": actual, "error": err,
+                "ape": abs(err) / abs(actual) if actual else None,
+                "llm": llm[k - 1], "history": history,
+            })
+    return out
+
+
+# ---------------- CLI ----------------
+def _print_rows(header: Sequence[str], rows: Sequence[Sequence]) -> None:
+    print(" | ".join(header))
+    for r in rows:
+        print(" | ".join("" if v is None else (f"{v:.2f}" if isinstance(v, float) else str(v)) for v in r))
+
+
+def main(argv=None) -> None:
+    p   = argparse.ArgumentParser(description="Abfragen auf den Forecast-Run-Store")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("runs");     s.add_argument("--limit", type=int, default=20)
+    s = sub.add_parser("account");  s.add_argument("name")
+    s = sub.add_parser("diff");     s.add_argument("run_a"); s.add_argument("run_b")
+    s.add_argument("--min-change", type=float, default=0.0)
+    s = sub.add_parser("accuracy"); s.add_argument("run_id"); s.add_argument("xlsx", type=Path)
+    s.add_argument("--shift", type=int, default=1, choices=(1, 2, 3))
+    s.add_argument("--out", type=Path)
+    s.add_argument("--learn", action="store_true",
+                   help="Fehler der LLM-Antworten in die Ensemble-Gewichte übernehmen")
+    args = p.parse_args(argv)
+
+    if args.cmd == "runs":
+        _print_rows(("run_id", "start", "ende", "modell", "zeilen"), list_runs(args.limit))
+    elif args.cmd == "account":
+        _print_rows(("run_id", "sheet", "row", "t1", "t2", "t3", "quelle", "reason"),
+                    account_history(args.name))
+    elif args.cmd == "diff":
+        _print_rows(("sheet", "row", "konto", "t1 A", "t1 B", "t2 A", "t2 B", "t3 A", "t3 B",
+                     "quelle A", "quelle B"),
+                    diff(args.run_a, args.run_b, args.min_change))
+    elif args.cmd == "accuracy":
+        res = accuracy(args.run_id, args.xlsx, args.shift)
+        apes = [r["ape"] for r in res if r["ape"] is not None]
+        if args.out:
+            with args.out.open("w", newline="", encoding="utf-8") as f:
+                w = csv.DictWriter(f, ["sheet", "row", "account", "horizon", "forecast",
+                                       "llm", "actual", "error", "ape"], extrasaction="ignore")
+                w.writeheader()
+                w.writerows(res)
+            print(f"✅ {len(res)} Vergleiche → {args.out}")
+        print(f"MAPE = {sum(apes) / len(apes):.1%} über {len(apes)} Werte" if apes
+              else "Keine vergleichbaren Werte gefunden.")
+        if args.learn:
+            from ensemble import learn, settings
+            n = learn(res, settings("")["alpha"])
+            print(f"⚖️  {n} LLM-Fehler in die Ensemble-Gewichte übernommen")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
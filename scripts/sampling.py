@@ -0,0 +1,130 @@
+"""
+sampling.py – Unsicherheitsbänder aus mehreren LLM-Stichproben
+==============================================================
+Eine einzelne Antwort bei Temperatur 0.4 ist ein beliebiger Punkt – ob das
+Modell sich sicher ist, sieht man ihr nicht an. Mit `sampling.enabled`
+schickt explain() je Zeile K Anfragen mit verschiedenen Seeds **gleichzeitig**
+an den Backend-Pool (gleicher Prompt → Präfix-Cache, Wandzeit ≈ ein Aufruf,
+solange der Pool Kapazität hat):
+
+- Prognose = Median der gültigen Stichproben je Jahr, Begründung aus der
+  Stichprobe, die dem Median am nächsten liegt
+- Band = Quantile `quantiles` (Default 10 % / 90 %) je Jahr
+- Writer schreiben die Spanne (q_hi − q_lo) je Jahr und einen Prüfhinweis in
+  die Spalten rechts neben der Begründung; geprüft wird, ob die Spanne in
+  einem Jahr mehr als `flag_spread` des Prognosewerts ausmacht
+
+Einstellungen im `sampling:`-Block von sheets.yml; `FORECAST_SAMPLES=K`
+bzw. `main.py --samples K` schaltet es für alle Sheets ein.
+"""
+
+from __future__ import annotations
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import metrics
+from loader import load_sheet_block
+from results import HORIZON, ForecastResult, matrix
+
+SAMPLES_ENV = int(os.getenv("FORECAST_SAMPLES", "0"))
+
+FLAGGED = metrics.REGISTRY.counter(
+    "forecast_sample_flagged_total",
+    "Zeilen, deren Stichproben-Spanne über flag_spread liegt (zur Prüfung markiert)")
+
+DEFAULTS = {
+    "enabled":     False,
+    "samples":     5,
+    "quantiles":   [0.1, 0.9],
+    "flag_spread": 0.3,        # (q_hi − q_lo) / |Prognose| > 30 % in einem Jahr → prüfen
+    "seed":        0,          # Seeds seed, seed + 1, …
+}
+
+
+def settings(sheet: str) -> dict:
+    cfg = {**DEFAULTS, **load_sheet_block("sampling", sheet)}
+    if SAMPLES_ENV > 1:
+        cfg.update(enabled=True, samples=SAMPLES_ENV)
+    return cfg
+
+
+def set_samples(k: int) -> None:
+    """Stichproben für alle Sheets erzwingen (main.py --samples)."""
+    global SAMPLES_ENV
+    SAMPLES_ENV = int(k)
+
+
+def samples(sheet: str) -> int:
+    """Stichproben je Zeile (1 = wie bisher eine Antwort)."""
+    cfg = settings(sheet)
+    return max(1, int(cfg["samples"])) if cfg.get("enabled") else 1
+
+
+def draw(invoke: Callable[..., tuple], prompt: str, model: str, k: int,
+         seed: int = 0) -> List[tuple]:
+    """K Aufrufe `invoke(prompt, model, seed=…)` gleichzeitig → Antworten (Fehler = Exception-Objekt)."""
+    def one(i: int):
+        try:
+            return invoke(prompt, model, seed=seed + i)
+        except Exception as e:                      # einzelne Stichprobe darf fehlen
+            return e
+    with ThreadPoolExecutor(max_workers=k, thread_name_prefix="sample") as ex:
+        return list(ex.map(one, range(k)))
+
+
+def combine(objs: Sequence[dict], quantiles: Sequence[float]) -> Tuple[dict, Optional[dict]]:
+    """
+    Geparste Stichproben → (Antwort mit Median-Werten, Band). Mit weniger als
+    zwei vollständigen Stichproben gibt es kein Band, nur die erste Antwort.
+    """
+    vals = matrix([ForecastResult.from_obj(o, "llm") for o in objs])
+    ok   = ~np.isnan(vals).any(axis=1)
+    if ok.sum() < 2:
+        return objs[0], None
+    good  = vals[ok]
+    med   = np.median(good, axis=0)
+    lo, hi = np.quantile(good, [min(quantiles), max(quantiles)], axis=0)
+    near  = np.flatnonzero(ok)[int(np.argmin(np.abs(good - med).sum(axis=1)))]
+    obj   = {**objs[near], **{k: round(float(v), 2) for k, v in zip(HORIZON, med)}}
+    return obj, {"lo": [round(float(v), 2) for v in lo], "hi": [round(float(v), 2) for v in hi],
+                 "n": int(ok.sum())}
+
+
+def spread(results: Sequence[ForecastResult]) -> Tuple[np.ndarray, np.ndarray]:
+    """(Spanne q_hi − q_lo, relative Spanne zur Prognose) je Zeile × Jahr; NaN ohne Band."""
+    n  = len(results)
+    lo = np.array([r.band["lo"] if r.band else [np.nan] * 3 for r in results], dtype=float).reshape(n, 3)
+    hi = np.array([r.band["hi"] if r.band else [np.nan] * 3 for r in results], dtype=float).reshape(n, 3)
+    width = hi - lo
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel = width / np.maximum(np.abs(matrix(results)), 1e-9)
+    return width, rel
+
+
+def write_bands(ws, header_row: Optional[int], col: int, results: Dict[int, ForecastResult],
+                sheet: str) -> int:
+    """
+    Spanne je Jahr in die Spalten `col`..`col+2`, Prüfhinweis in `col+3`
+    (nur Zeilen mit Band). Liefert die Zahl der markierten Zeilen.
+    """
+    rows = [(r, res) for r, res in results.items() if res.band]
+    if not rows:
+        return 0
+    cfg  = settings(sheet)
+    q_lo, q_hi = min(cfg["quantiles"]), max(cfg["quantiles"])
+    if header_row:
+        for j, t in enumerate(HORIZON):
+            ws.cell(header_row, col + j, value=f"Spanne {t} (q{q_lo * 100:.0f}–q{q_hi * 100:.0f})")
+        ws.cell(header_row, col + 3, value="Prüfen")
+    width, rel = spread([res for _, res in rows])
+    worst      = np.nan_to_num(rel, nan=0.0).max(axis=1)
+    flagged    = worst > float(cfg["flag_spread"])
+    for i, (r, _) in enumerate(rows):
+        for j in range(len(HORIZON)):
+            ws.cell(r, col + j, value=round(float(width[i, j]), 2))
+        ws.cell(r, col + 3, value=f"⚠ Spanne {worst[i]:.0%}" if flagged[i] else None)
+    FLAGGED.inc(int(flagged.sum()), sheet=sheet)
+    return int(flagged.sum())
@@ -0,0 +1,133 @@
+"""
+scheduler.py – Sheets als Abhängigkeitsgraph (DAG) abarbeiten
+=============================================================
+Statt die Writer in fester Reihenfolge nacheinander laufen zu lassen, baut
+`run_dag()` aus sheets.yml einen Graphen:
+
+- Kanten aus `depends_on` je Sheet, aus der Hierarchie (Einzelkonten vor
+  Summenkonten) und aus den `drivers`-Bezügen
+- Unabhängige Sheets laufen gleichzeitig (`FORECAST_SHEET_PARALLEL`); unter
+  den bereiten Sheets startet zuerst das mit dem längsten Restpfad (geschätzte
+  Dauer aus dem Trockenlauf) → Wandzeit ≈ längste Abhängigkeitskette
+- Fertige Vorgänger-Prognosen fließen als `drivers` in die Prompts der
+  nachgelagerten Sheets ein (z.B. Umsatz aus PnL (2) für BS (2))
+"""
+
+from __future__ import annotations
+import os, time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+import hierarchy
+from loader import load_sheet_specs, parse_ref
+from profiling import span
+
+SHEET_PARALLEL = int(os.getenv("FORECAST_SHEET_PARALLEL", "4"))
+
+
+def _driver_refs(sheet: str) -> Dict[str, List[Tuple[float, str, range]]]:
+    spec = load_sheet_specs().get(sheet) or {}
+    return {label: [parse_ref(r) for r in refs] for label, refs in (spec.get("drivers") or {}).items()}
+
+
+def dependencies(sheets: Sequence[str]) -> Dict[str, Set[str]]:
+    """Sheet → Vorgänger (nur innerhalb von `sheets`); Zyklen sind ein Konfigurationsfehler."""
+    specs = load_sheet_specs()
+    deps  = {s: set((specs.get(s) or {}).get("depends_on") or []) for s in sheets}
+    for (p_sheet, _), kids in hierarchy.load_hierarchy().items():
+        if p_sheet in deps:
+            deps[p_sheet] |= {k_sheet for _, (k_sheet, _) in kids}
+    for s in sheets:
+        deps[s] |= {ref_sheet for refs in _driver_refs(s).values() for _, ref_sheet, _ in refs}
+    deps = {s: {d for d in ds if d in deps and d != s} for s, ds in deps.items()}
+
+    state: Dict[str, int] = {}                     # 1 = in Arbeit, 2 = fertig
+    def visit(s: str, path: Tuple[str, ...]) -> None:
+        if state.get(s) == 1:
+            raise ValueError(f"Sheet-Zyklus: {' → '.join(path + (s,))}")
+        if state.get(s) != 2:
+            state[s] = 1
+            for d in deps[s]:
+                visit(d, path + (s,))
+            state[s] = 2
+    for s in sheets:
+        visit(s, ())
+    return deps
+
+
+def critical_path(deps: Dict[str, Set[str]], cost: Dict[str, float]) -> Tuple[float, List[str]]:
+    """Längste Kette (Summe der Kosten) durch den Graphen → (Länge, Sheets in Reihenfolge)."""
+    best: Dict[str, Tuple[float, List[str]]] = {}
+    def longest(s: str) -> Tuple[float, List[str]]:
+        if s not in best:
+            head = max((longest(d) for d in deps[s]), key=lambda x: x[0], default=(0.0, []))
+            best[s] = (head[0] + cost.get(s, 0.0), head[1] + [s])
+        return best[s]
+    return max((longest(s) for s in deps), key=lambda x: x[0], default=(0.0, []))
+
+
+def _ranks(deps: Dict[str, Set[str]], cost: Dict[str, float]) -> Dict[str, float]:
+    """Restpfad je Sheet: eigene Kosten + längste Kette der Nachfolger."""
+    after = {s: {t for t, ds in deps.items() if s in ds} for s in deps}
+    memo: Dict[str, float] = {}
+    def rank(s: str) -> float:
+        if s not in memo:
+            memo[s] = cost.get(s, 0.0) + max((rank(t) for t in after[s]), default=0.0)
+        return memo[s]
+    return {s: rank(s) for s in deps}
+
+
+def run_dag(sheets: Sequence[str], task: Callable[[str], None],
+            cost: Optional[Dict[str, float]] = None,
+            workers: int = SHEET_PARALLEL) -> Dict[str, float]:
+    """`task(sheet)` für alle Sheets in Abhängigkeitsreihenfolge → {Sheet: Dauer s}."""
+    deps  = dependencies(sheets)
+    rank  = _ranks(deps, cost or {s: 1.0 for s in sheets})
+    taken: Dict = {}
+    done:  Dict[str, float] = {}
+
+    def timed(s: str) -> float:
+        t = time.perf_counter()
+        task(s)
+        return time.perf_counter() - t
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="sheet") as ex:
+        while len(done) < len(sheets):
+            running = set(taken.values())
+            ready   = sorted((s for s in sheets if s not in done and s not in running
+                              and deps[s] <= set(done)), key=lambda s: -rank[s])
+            for s in ready[:max(0, workers - len(taken))]:
+                taken[ex.submit(timed, s)] = s
+            finished, _ = wait(list(taken), return_when=FIRST_COMPLETED)
+            for f in finished:
+                done[taken.pop(f)] = f.result()     # Fehler eines Writers bricht den Lauf ab
+    return done
+
+
+def summary(sheets: Sequence[str], durations: Dict[str, float], wall: float) -> str:
+    total, path = critical_path(dependencies(sheets), durations)
+    return (f"🗺️  Sheets: Wandzeit {wall:.1f}s, Summe {sum(durations.values()):.1f}s, "
+            f"kritischer Pfad {total:.1f}s ({' → '.join(path)})")
+
+
+# --------------------------------------------------------------------------- #
+#  Vorgänger-Prognosen als Treiber für nachgelagerte Prompts                  #
+# --------------------------------------------------------------------------- #
+def driver_lines(sheet: str, contexts: Optional[Sequence[str]] = None) -> List[str]:
+    """Prognosen der `drivers`-Bezüge eines Sheets als zusätzlicher Sachverhalt."""
+    refs = _driver_refs(sheet)
+    if not refs:
+        return []
+    keys  = sorted({(s, r) for rs in refs.values() for _, s, rows in rs for r in rows})
+    index = {k: i for i, k in enumerate(keys)}
+    with span("drivers", sheet=sheet, refs=len(keys)):
+        vals = hierarchy.values(keys, contexts)
+    parts = []
+    for label, rs in refs.items():
+        v = np.zeros(3)
+        for sign, s, rows in rs:
+            v += sign * vals[[index[(s, r)] for r in rows]].sum(axis=0)
+        parts.append(f"{label}: t1={v[0]:.2f}, t2={v[1]:.2f}, t3={v[2]:.2f}")
+    return ["Bereits geplante Werte vorgelagerter Sheets – " + "; ".join(parts) + "."]
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+sensitivity.py – Vektorisierte KPI-Sensitivität (Tornado)
+=========================================================
+Jedes Forecast-Konto wird um ±x % verschoben und alle Kennzahlen aus
+config/kpis.yml (EBITDA, EBIT-Marge, Net debt/EBITDA) werden für **alle**
+Schocks zugleich neu berechnet:
+
+- Kennzahl = (A·x) / (B·x) mit Koeffizienten-Matrizen A, B (Kennzahl × Konto)
+- Ein Schock auf Konto i ändert Zähler und Nenner nur um s·A[:, i]·x_i → alle
+  2 × n Schocks in einer Broadcast-Operation (Kennzahl × Konto × Periode),
+  ohne einen Lauf je Konto; auch tausende Konten in Millisekunden
+- Formelzeilen (z.B. Liquide Mittel, Steuerrückstellungen) gehen mit ihrem
+  gecachten Wert als Konstante ein, Rückkopplungen über CFR/Steuern entfallen
+
+    python scripts/sensitivity.py [--shock 0.1] [--period t1] [--top 15]
+
+Die Streamlit-App zeigt das Ergebnis als Tornado-Diagramm (Seite "Sensitivität").
+"""
+
+from __future__ import annotations
+import argparse
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import yaml
+
+from loader import load_sheet_specs, parse_ref
+from pipeline import account_map
+from xlsx_stream import read_columns, read_sheet_history
+
+BASE    = Path(__file__).resolve().parent.parent
+KPI_CFG = BASE / "config"  / "kpis.yml"
+FC_XLSX = BASE / "outputs" / "UnternehmensplanungForecast.xlsx"
+PERIODS = ("t1", "t2", "t3")
+
+Key = Tuple[str, int]                              # (Sheet, Zeile)
+
+
+# --------------------------------------------------------------------------- #
+#  Kennzahlen → Koeffizienten-Matrizen                                        #
+# --------------------------------------------------------------------------- #
+def load_kpi_defs(path: Path = KPI_CFG) -> Dict[str, dict]:
+    return yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+
+
+def coefficients(defs: Dict[str, dict]) -> Tuple[List[str], List[Key], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    → (Kennzahlen, Konten-Schlüssel, A, B, hat_Nenner). A/B: Kennzahl × Konto,
+    Konten = Vereinigung aller referenzierten Zeilen.
+    """
+    names  = list(defs)
+    parsed = {(n, part): [parse_ref(r) for r in defs[n].get(part) or []]
+              for n in names for part in ("num", "den")}
+    keys   = sorted({(sheet, r) for refs in parsed.values() for _, sheet, rows in refs for r in rows})
+    index  = {k: i for i, k in enumerate(keys)}
+    A, B   = np.zeros((len(names), len(keys))), np.zeros((len(names), len(keys)))
+    for k, n in enumerate(names):
+        for part, M in (("num", A), ("den", B)):
+            for sign, sheet, rows in parsed[(n, part)]:
+                for r in rows:
+                    M[k, index[(sheet, r)]] += sign
+    return names, keys, A, B, np.array([bool(defs[n].get("den")) for n in names])
+
+
+# --------------------------------------------------------------------------- #
+#  Kontenwerte t1..t3 aus dem Forecast-Workbook                               #
+# --------------------------------------------------------------------------- #
+def load_accounts(keys: Sequence[Key], xlsx: Path = FC_XLSX) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    → (Bezeichnungen, Werte Konto × Periode, Forecast-Maske). Leere Zellen und
+    Formeln ohne gecachten Wert zählen als 0; geschockt werden nur Konten mit
+    Kategorie `forecast` im Mapping.
+    """
+    specs  = load_sheet_specs()
+    labels = [f"{s} · Zeile {r}" for s, r in keys]
+    values = np.zeros((len(keys), len(PERIODS)))
+    mask   = np.zeros(len(keys), dtype=bool)
+    for sheet in dict.fromkeys(s for s, _ in keys):
+        spec = specs.get(sheet, {})
+        hist = read_sheet_history(xlsx, sheet, spec.get("header_aliases", ["t0"]),
+                                  spec.get("account_column"))
+        c0   = hist.cols["t0"]                     # t1..t3 stehen rechts von t0
+        rows, vals = read_columns(xlsx, sheet, [c0 + 1, c0 + 2, c0 + 3], hist.header_row + 1)
+        by_row  = {r: v for r, v in zip(rows, vals)}
+        mapping = account_map(sheet)
+        for i, (s, r) in enumerate(keys):
+            if s != sheet:
+                continue
+            if r in by_row:
+                values[i] = np.nan_to_num(np.frombuffer(by_row[r], dtype=float))
+            name      = hist.account(r) or mapping.get(r, ("", ""))[0]
+            labels[i] = f"{sheet} · {name}" if name else labels[i]
+            mask[i]   = mapping.get(r, ("", ""))[1] == "forecast"
+    return labels, values, mask
+
+
+# --------------------------------------------------------------------------- #
+#  Batch-Auswertung                                                           #
+# --------------------------------------------------------------------------- #
+def kpi_values(values: np.ndarray, A: np.ndarray, B: np.ndarray, has_den: np.ndarray) -> np.ndarray:
+    """Kennzahlen für beliebig viele Szenarien: values (…, Konto, Periode) → (…, Kennzahl, Periode)."""
+    num = np.einsum("kn,...np->...kp", A, values)
+    den = np.einsum("kn,...np->...kp", B, values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(has_den[:, None], num / den, num)
+
+
+def tornado(values: np.ndarray, A: np.ndarray, B: np.ndarray, has_den: np.ndarray,
+            mask: np.ndarray, shock: float = 0.1) -> Dict[str, np.ndarray]:
+    """
+    Alle Konten einzeln um −shock/+shock verschieben → Kennzahl je Schock.
+    Liefert base (Kennzahl × Periode) sowie low/high (Kennzahl × Konto × Periode).
+    """
+    num, den = A @ values, B @ values                         # Kennzahl × Periode
+    d_num    = A[:, :, None] * values[None] * mask[None, :, None]
+    d_den    = B[:, :, None] * values[None] * mask[None, :, None]
+    out      = {"base": kpi_values(values, A, B, has_den)}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for name, s in (("low", -shock), ("high", shock)):
+            n = num[:, None, :] + s * d_num
+            d = den[:, None, :] + s * d_den
+            out[name] = np.where(has_den[:, None, None], n / d, n)
+    return out
+
+
+def ranking(result: dict, kpi: int, period: int, top: int | None = None) -> List[Tuple[str, float, float]]:
+    """(Konto, Δ bei −x %, Δ bei +x %) nach Spannweite absteigend; Konten ohne Wirkung entfallen."""
+    base = result["base"][kpi, period]
+    low  = result["low"][kpi, :, period] - base
+    high = result["high"][kpi, :, period] - base
+    swing = np.nan_to_num(np.abs(high - low))
+    order = [i for i in np.argsort(-swing, kind="stable") if swing[i] > 0]
+    return [(result["labels"][i], float(low[i]), float(high[i])) for i in order[:top]]
+
+
+def sensitivity(xlsx: Path = FC_XLSX, shock: float = 0.1, kpi_cfg: Path = KPI_CFG) -> dict:
+    """Kompletter Durchlauf: Kennzahlen laden, Konten lesen, alle Schocks rechnen."""
+    names, keys, A, B, has_den = coefficients(load_kpi_defs(kpi_cfg))
+    labels, values, mask       = load_accounts(keys, xlsx)
+    return {"kpis": names, "labels": labels, "periods": list(PERIODS), "shock": shock,
+            **tornado(values, A, B, has_den, mask, shock)}
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="KPI-Sensitivität (Tornado) je Forecast-Konto")
+    p.add_argument("--xlsx", type=Path, default=FC_XLSX)
+    p.add_argument("--shock", type=float, default=0.1, help="relative Verschiebung (Default 0.1 = ±10 %%)")
+    p.add_argument("--period", choices=PERIODS, default="t1")
+    p.add_argument("--top", type=int, default=10)
+    args = p.parse_args(argv)
+
+    res = sensitivity(args.xlsx, args.shock)
+    j   = PERIODS.index(args.period)
+    for k, kpi in enumerate(res["kpis"]):
+        print(f"\n🌪️  {kpi} ({args.period}) = {res['base'][k, j]:,.4g}  – Schock ±{args.shock:.0%}")
+        for label, lo, hi in ranking(res, k, j, args.top):
+            print(f"  {label:<50} {lo:+12,.4g} {hi:+12,.4g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+service.py – Forecast-Dienst mit warmem Zustand und lokaler HTTP/JSON-API
+========================================================================
+Hält Template-Workbook, Historie (Streaming-Cache), Mappings, Sachverhalte,
+Antwort-Cache und Backend-Pool im Speicher. Workbook- und Sheet-Aufträge
+laufen über eine Job-Queue nacheinander – Writer-Logs und Roll-up-Speicher
+gelten prozessweit für einen Lauf; parallel wird innerhalb eines Jobs (Zeilen
+über den Backend-Pool, unabhängige Sheets über scheduler.py). Zeilen-Aufträge
+haben eine eigene Spur mit eigenem Roll-up-Speicher je Job und warten nicht
+hinter einem ganzen Planwerk. /reload wartet, bis kein Auftrag mehr läuft.
+
+    python scripts/service.py [--port 8765]
+
+    POST /jobs            {"kind": "workbook"}                         → ganzes Planwerk
+                          {"kind": "sheet", "sheet": "OPEX (2)"}       → ein Sheet
+                          {"kind": "rows",  "sheet": "OPEX (2)", "rows": [5, 7]}
+                          optional "wait": true → Antwort erst mit Ergebnis
+    GET  /jobs/<id>       Status & Ergebnis
+    GET  /jobs/<id>/file  erzeugte xlsx (workbook/sheet)
+    GET  /health          Zustand, Queue, Endpunkte
+    GET  /metrics         Prometheus
+    POST /reload          sheets.yml, Mappings & Historie neu einlesen
+"""
+
+from __future__ import annotations
+import argparse, io, json, os, sys, threading, time, uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+
+from openpyxl import load_workbook
+
+import hierarchy
+import impact
+import metrics
+import rules
+import run_store
+import xlsx_stream
+from backends import get_pool
+from explanations import OLLAMA_MODEL, reload_contexts
+from loader import load_config, load_sheet_block
+from main import SRC_XLSX, WRITERS, run_writers
+from pipeline import explain_rows, sheet_jobs
+
+BASE    = Path(__file__).resolve().parent.parent
+OUT_DIR = BASE / "outputs" / "service"
+
+ROW_JOBS = int(os.getenv("FORECAST_SERVICE_ROW_JOBS", "2"))   # Zeilen-Jobs gleichzeitig
+
+
+# --------------------------------------------------------------------------- #
+#  Warmes Template: immer ein fertig geparstes Workbook in Reserve            #
+# --------------------------------------------------------------------------- #
+class WarmWorkbooks:
+    """Hält die Quelldatei als Bytes und ein vorab geladenes Workbook bereit."""
+
+    def __init__(self, src: Path):
+        self.src   = src
+        self._data = src.read_bytes()
+        self._lock = threading.Lock()
+        self._next: Optional[threading.Thread] = None
+        self._spare = None
+        self._refill()
+
+    def _load(self):
+        return load_workbook(io.BytesIO(self._data), data_only=False)
+
+    def _refill(self) -> None:
+        def work():
+            wb = self._load()
+            with self._lock:
+                self._spare = wb
+        self._next = threading.Thread(target=work, name="wb-prefetch", daemon=True)
+        self._next.start()
+
+    def take(self):
+        """Reserve-Workbook übernehmen (wartet ggf. auf das Vorladen) und neu nachladen."""
+        if self._next is not None:
+            self._next.join()
+        with self._lock:
+            wb, self._spare = self._spare, None
+        self._refill()
+        return wb if wb is not None else self._load()
+
+    def reload(self) -> None:
+        if self._next is not None:
+            self._next.join()
+        self._data = self.src.read_bytes()
+        with self._lock:
+            self._spare = None
+        self._refill()
+
+
+# --------------------------------------------------------------------------- #
+#  Jobs                                                                       #
+# --------------------------------------------------------------------------- #
+class ForecastService:
+    def __init__(self, src: Path = SRC_XLSX):
+        self.src        = src
+        self.jobs:      Dict[str, dict] = {}
+        self._lock      = threading.Lock()
+        self._pool      = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job")   # ein Planwerk zur Zeit
+        self._rows      = ThreadPoolExecutor(max_workers=max(1, ROW_JOBS), thread_name_prefix="rows")
+        self._gate      = threading.Condition()         # /reload ↔ laufende Jobs
+        self._active    = 0
+        self._reloading = False
+        self._reloader  = threading.Lock()              # ein /reload zur Zeit
+        self.templates  = WarmWorkbooks(src)
+        xlsx_stream.preload(src)
+        impact.warm()
+        self.run_id = run_store.begin_run(OLLAMA_MODEL, str(src), note="service")
+
+    # ---- Annahme ----
+    def submit(self, spec: dict) -> dict:
+        kind = spec.get("kind", "workbook")
+        if kind not in ("workbook", "sheet", "rows"):
+            raise ValueError(f"unbekannte Job-Art {kind!r}")
+        if kind != "workbook" and spec.get("sheet") not in dict(WRITERS):
+            raise ValueError(f"unbekanntes Sheet {spec.get('sheet')!r}")
+        job_id = uuid.uuid4().hex[:12]
+        job = {"id": job_id, "kind": kind, "spec": spec, "status": "queued",
+               "submitted": time.time(), "result": None, "error": None}
+        with self._lock:
+            self.jobs[job_id] = job
+        lane = self._rows if kind == "rows" else self._pool
+        job["_future"] = lane.submit(self._run, job)
+        return job
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> dict:
+        fut = self.jobs[job_id]["_future"]
+        fut.result(timeout=timeout)
+        return self.jobs[job_id]
+
+    # ---- Ausführung ----
+    def _run(self, job: dict) -> None:
+        with self._gate:
+            while self._reloading:
+                self._gate.wait()
+            self._active += 1
+        job["status"], job["started"] = "running", time.time()
+        try:
+            spec = job["spec"]
+            if job["kind"] == "rows":
+                job["result"] = self._row_job(spec["sheet"], spec.get("rows"))
+            else:
+                sheets = None if job["kind"] == "workbook" else [spec["sheet"]]
+                job["result"] = self._workbook(job["id"], sheets)
+            job["status"] = "done"
+        except Exception as e:                          # Fehler gehören dem Job, nicht dem Dienst
+            job["status"], job["error"] = "error", f"{type(e).__name__}: {e}"
+        finally:
+            job["finished"] = time.time()
+            run_store.flush()
+            with self._gate:
+                self._active -= 1
+                self._gate.notify_all()
+
+    def _row_job(self, sheet: str, rows) -> dict:
+        hist          = xlsx_stream.sheet_history(sheet, self.src)
+        jobs, skipped = sheet_jobs(sheet, hist, rows)
+        out = {}
+        with hierarchy.scope():                         # eigener Roll-up-Speicher, neben einem Planwerk
+            for r, res in explain_rows(sheet, jobs).items():
+                out[str(r)] = res.to_dict()
+        return {"sheet": sheet, "rows": out, "skipped": {str(r): w for r, w in skipped.items()}}
+
+    def _workbook(self, job_id: str, sheets) -> dict:
+        # Debug-Logs der Writer sind Modul-Listen → im Dauerbetrieb je Job leeren
+        # (sicher, weil Workbook- und Sheet-Jobs nacheinander laufen)
+        for _, writer in WRITERS:
+            getattr(sys.modules[writer.__module__], "LOG", []).clear()
+        wb = self.templates.take()
+        run_writers(wb, sheets)
+        OUT_DIR.mkdir(exist_ok=True, parents=True)
+        path = OUT_DIR / f"{job_id}.xlsx"
+        wb.save(path)
+        return {"file": str(path), "sheets": sheets or [s for s, _ in WRITERS]}
+
+    # ---- Verwaltung ----
+    def reload(self) -> None:
+        """Neu einlesen, sobald kein Job mehr läuft; neue Jobs warten so lange."""
+        with self._reloader:
+            with self._gate:
+                self._reloading = True
+                while self._active:
+                    self._gate.wait()
+            try:
+                self._reload()
+            finally:
+                with self._gate:
+                    self._reloading = False
+                    self._gate.notify_all()
+
+    def _reload(self) -> None:
+        load_config.cache_clear()
+        load_sheet_block.cache_clear()
+        reload_contexts()
+        hierarchy.reset()
+        impact.reset()
+        rules.reset()
+        xlsx_stream.clear_cache()
+        xlsx_stream.preload(self.src)
+        self.templates.reload()
+
+    def public(self, job: dict) -> dict:
+        return {k: v for k, v in job.items() if not k.startswith("_")}
+
+    def health(self) -> dict:
+        states = [j["status"] for j in list(self.jobs.values())]
+        return {"status": "ok", "run_id": self.run_id,
+                "queued": states.count("queued"), "running": states.count("running"),
+                "done": states.count("done"), "error": states.count("error"),
+                "endpoints": {ep.url: ep.healthy for ep in get_pool().endpoints}}
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+        self._rows.shutdown(wait=True)
+        run_store.finish_run()
+
+
+# --------------------------------------------------------------------------- #
+#  HTTP                                                                       #
+# --------------------------------------------------------------------------- #
+def make_handler(svc: ForecastService):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, body, ctype="application/json; charset=utf-8") -> None:
+            data = body if isinstance(body, bytes) else json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            parts = [p for p in self.path.split("?")[0].split("/") if p]
+            if parts == ["health"]:
+                return self._send(200, svc.health())
+            if parts == ["metrics"]:
+                return self._send(200, metrics.REGISTRY.render().encode("utf-8"),
+                                  "text/plain; version=0.0.4; charset=utf-8")
+            if len(parts) >= 2 and parts[0] == "jobs" and parts[1] in svc.jobs:
+                job = svc.jobs[parts[1]]
+                if parts[2:] == ["file"]:
+                    f = (job.get("result") or {}).get("file")
+                    if not f:
+                        return self._send(404, {"error": "keine Datei (Job offen oder rows-Job)"})
+                    return self._send(200, Path(f).read_bytes(),
+                                      "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+                return self._send(200, svc.public(job))
+            self._send(404, {"error": "unbekannter Pfad"})
+
+        def do_POST(self):
+            path = self.path.split("?")[0].rstrip("/")
+            try:
+                n    = int(self.headers.get("Content-Length") or 0)
+                spec = json.loads(self.rfile.read(n) or b"{}")
+                if path == "/reload":
+                    svc.reload()
+                    return self._send(200, {"status": "reloaded"})
+                if path != "/jobs":
+                    return self._send(404, {"error": "unbekannter Pfad"})
+                job = svc.submit(spec)
+                if spec.get("wait"):
+                    job = svc.wait(job["id"])
+                return self._send(200 if job["status"] != "error" else 500, svc.public(job))
+            except (ValueError, KeyError) as e:
+                self._send(400, {"error": str(e)})
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Forecast-Dienst (HTTP/JSON)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    args = p.parse_args(argv)
+
+    t0  = time.perf_counter()
+    svc = ForecastService(SRC_XLSX)
+    srv = ThreadingHTTPServer((args.host, args.port), make_handler(svc))
+    print(f"🚀 Forecast-Dienst bereit nach {time.perf_counter() - t0:.1f}s "
+          f"unter http://{args.host}:{args.port} (Lauf {svc.run_id})")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+        svc.shutdown()
+
+
+if __name__ == "__main__":
+    main()
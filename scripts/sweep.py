@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+sweep.py – Szenario-Sweep über Varianten der Sachverhalte (cases.csv)
+=====================================================================
+Statt cases.csv zu editieren und alles neu zu rechnen, beschreibt
+config/scenarios.yml ein Raster von Varianten (z.B. Russland-Exit ja/nein ×
+Inflation 5/10/15 %). Alle Szenarien laufen in **einem** Prozess:
+
+    python scripts/sweep.py [--grid config/scenarios.yml] [--sheets "OPEX (2)" ...]
+
+- Historie, Mappings und Jobs werden einmal aufgebaut, kein Workbook geladen
+- Szenarien laufen nebeneinander (`FORECAST_SWEEP_PARALLEL`, Default 2) über
+  denselben Backend-Pool und denselben Antwort-Cache
+- Szenarien mit identischen Sachverhalten werden nur einmal gerechnet;
+  identische Prompts (auch gleichzeitig laufende) gehen nur einmal ans LLM
+- Je Szenario wird sein Präfix vorgewärmt → pro Zeile nur der Konto-Suffix
+- Sheets eines Szenarios laufen in Abhängigkeitsreihenfolge (scheduler.py):
+  Summenkonten und Treiber finden ihre Vorgänger fertig vor
+- Ergebnis: outputs/scenario_sweep.xlsx mit einem t1..t3-Block je Szenario
+  und der Spanne (max − min) über alle Szenarien
+
+Sweep-Zeilen landen nicht im Run-Store (dort ist eine Zeile je Lauf eindeutig),
+Antworten früherer Läufe werden aber als Cache genutzt.
+"""
+
+from __future__ import annotations
+import argparse, itertools, os, time, warnings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import yaml
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Font
+from openpyxl.utils import get_column_letter
+
+import hierarchy
+import impact
+import metrics
+import scheduler
+import xlsx_stream
+from explanations import CONTEXT_PATH, load_contexts
+from main import SRC_XLSX, WRITERS
+from pipeline import explain_rows, sheet_jobs
+from profiling import span
+from results import ForecastResult, matrix
+
+BASE      = Path(__file__).resolve().parent.parent
+GRID_PATH = BASE / "config"  / "scenarios.yml"
+OUT_XLSX  = BASE / "outputs" / "scenario_sweep.xlsx"
+PARALLEL  = int(os.getenv("FORECAST_SWEEP_PARALLEL", "2"))
+
+Scenario = Tuple[str, Tuple[str, ...]]             # (Name, Sachverhalte)
+_EMPTY   = ForecastResult(None, None, None)       # Zeile fehlt in einem Szenario
+
+
+# --------------------------------------------------------------------------- #
+#  Raster → Szenarien                                                         #
+# --------------------------------------------------------------------------- #
+def apply_variant(base: Sequence[str], variant: dict) -> List[str]:
+    """Eine (zusammengeführte) Variante auf die Basis-Sachverhalte anwenden."""
+    cases = list(base)
+    for old, new in (variant.get("replace") or {}).items():
+        hits = [i for i, c in enumerate(cases) if old in c]
+        if not hits:
+            raise ValueError(f"replace: {old!r} kommt in keinem Sachverhalt vor")
+        for i in hits:
+            cases[i] = cases[i].replace(old, str(new))
+    for nr, text in (variant.get("set") or {}).items():
+        if not 1 <= int(nr) <= len(base):
+            raise ValueError(f"set: Sachverhalt {nr} existiert nicht (1…{len(base)})")
+        cases[int(nr) - 1] = str(text)
+    drop = set()
+    for nr in variant.get("drop") or []:
+        if not 1 <= int(nr) <= len(base):
+            raise ValueError(f"drop: Sachverhalt {nr} existiert nicht (1…{len(base)})")
+        drop.add(int(nr) - 1)
+    return [c for i, c in enumerate(cases) if i not in drop] + [str(a) for a in variant.get("add") or []]
+
+
+def _combine(variants: Sequence[dict]) -> dict:
+    """Varianten mehrerer Dimensionen zu einer zusammenführen (Nummern bleiben gültig)."""
+    out = {"replace": {}, "set": {}, "drop": [], "add": []}
+    for v in variants:
+        v = v or {}
+        out["replace"].update(v.get("replace") or {})
+        out["set"].update(v.get("set") or {})
+        out["drop"] += list(v.get("drop") or [])
+        out["add"]  += list(v.get("add") or [])
+    return out
+
+
+def expand_grid(grid: dict, base: Sequence[str]) -> List[Scenario]:
+    """Kreuzprodukt aller Dimensionen → [(Name, Sachverhalte)]."""
+    dims = grid.get("dimensions") or {}
+    if not dims:
+        return [("Basis", tuple(base))]
+    names = list(dims)
+    out: List[Scenario] = []
+    for combo in itertools.product(*[list((dims[d] or {"basis": {}}).items()) for d in names]):
+        name = " / ".join(f"{d}={v}" for d, (v, _) in zip(names, combo))
+        out.append((name, tuple(apply_variant(base, _combine([spec for _, spec in combo])))))
+    return out
+
+
+def load_grid(path: Path = GRID_PATH, cases: Path = CONTEXT_PATH) -> List[Scenario]:
+    return expand_grid(yaml.safe_load(path.read_text(encoding="utf-8")) or {}, load_contexts(cases))
+
+
+# --------------------------------------------------------------------------- #
+#  Ausführung                                                                 #
+# --------------------------------------------------------------------------- #
+def run_sweep(scenarios: Sequence[Scenario], sheets: Sequence[str], src: Path = SRC_XLSX,
+              parallel: int = PARALLEL, warm: bool = True) -> Dict[str, Dict[str, Dict[int, ForecastResult]]]:
+    """Alle Szenarien rechnen → {Szenario: {Sheet: {Zeile: ForecastResult}}}."""
+    hierarchy.reset()
+    hists = xlsx_stream.preload(src)
+    jobs  = {s: sheet_jobs(s, hists[s])[0] for s in sheets}
+    sets  = list(dict.fromkeys(ctx for _, ctx in scenarios))   # gleiche Sachverhalte nur einmal
+    cost  = {s: float(len(jobs[s])) for s in sheets}
+
+    def one(ctx: Tuple[str, ...]) -> Dict[str, Dict[int, ForecastResult]]:
+        contexts = list(ctx)
+        if warm:
+            impact.warm(contexts)
+        out = {}
+
+        def sheet(s: str) -> None:
+            with span("sweep_sheet", sheet=s, rows=len(jobs[s])):
+                out[s] = explain_rows(s, jobs[s], contexts)
+
+        scheduler.run_dag(sheets, sheet, cost)
+        return {s: out[s] for s in sheets}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(sets))),
+                            thread_name_prefix="scenario") as ex:
+        done = dict(zip(sets, ex.map(one, sets)))
+    return {name: done[ctx] for name, ctx in scenarios}
+
+
+# --------------------------------------------------------------------------- #
+#  Vergleichs-Workbook                                                        #
+# --------------------------------------------------------------------------- #
+def write_comparison(results: Dict[str, Dict[str, Dict[int, ForecastResult]]],
+                     scenarios: Sequence[Scenario], sheets: Sequence[str],
+                     base: Sequence[str], src: Path = SRC_XLSX, path: Path = OUT_XLSX) -> Path:
+    """Je Sheet: Konto + Historie, danach t1..t3 je Szenario und die Spanne."""
+    wb   = Workbook()
+    bold = Font(bold=True)
+    info = wb.active
+    info.title = "Szenarien"
+    info.append(["Szenario", "Sachverhalte", "Abweichungen zur Basis (cases.csv)"])
+    for c in info[1]:
+        c.font = bold
+    for name, ctx in scenarios:
+        diff = [c for c in ctx if c not in base] + [f"(entfällt) {c}" for c in base if c not in ctx]
+        info.append([name, len(ctx), "\n".join(diff) or "–"])
+    info.column_dimensions["A"].width = 40
+    info.column_dimensions["C"].width = 120
+
+    names = [n for n, _ in scenarios]
+    for sheet in sheets:
+        ws   = wb.create_sheet(sheet[:31])
+        hist = xlsx_stream.sheet_history(sheet, src)
+        fixed = ["Zeile", "Konto", "t-2", "t-1", "t0"]
+        for i, h in enumerate(fixed, start=1):
+            ws.cell(row=2, column=i, value=h).font = bold
+        for k, label in enumerate(names + ["Spanne (max − min)"]):
+            col = len(fixed) + 1 + 3 * k
+            ws.cell(row=1, column=col, value=label).font = bold
+            ws.cell(row=1, column=col).alignment = Alignment(horizontal="center")
+            ws.merge_cells(start_row=1, start_column=col, end_row=1, end_column=col + 2)
+            for j, t in enumerate(("t1", "t2", "t3")):
+                ws.cell(row=2, column=col + j, value=t).font = bold
+
+        rows = sorted({r for n in names for r in results[n].get(sheet, {})})
+        for out_row, r in enumerate(rows, start=3):
+            ws.cell(row=out_row, column=1, value=r)
+            ws.cell(row=out_row, column=2, value=hist.account(r))
+            for j, v in enumerate(hist.values(r), start=3):
+                ws.cell(row=out_row, column=j, value=v)
+            grid = matrix([results[n].get(sheet, {}).get(r, _EMPTY) for n in names])
+            for k, vals in enumerate(grid):
+                for j, v in enumerate(vals):
+                    ws.cell(row=out_row, column=len(fixed) + 1 + 3 * k + j,
+                            value=None if np.isnan(v) else float(v))
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)       # Spalte ganz ohne Werte
+                span_ = np.nanmax(grid, axis=0) - np.nanmin(grid, axis=0)
+            for j, v in enumerate(span_):
+                ws.cell(row=out_row, column=len(fixed) + 1 + 3 * len(names) + j,
+                        value=None if np.isnan(v) else round(float(v), 2))
+
+        ws.column_dimensions["B"].width = 40
+        for col in range(3, len(fixed) + 3 * (len(names) + 1) + 1):
+            ws.column_dimensions[get_column_letter(col)].width = 12
+            for (cell,) in ws.iter_rows(min_row=3, min_col=col, max_col=col):
+                cell.number_format = "#,##0.00"
+        ws.freeze_panes = "C3"
+
+    path.parent.mkdir(exist_ok=True, parents=True)
+    wb.save(path)
+    return path
+
+
+# --------------------------------------------------------------------------- #
+#  CLI                                                                        #
+# --------------------------------------------------------------------------- #
+def main(argv=None) -> None:
+    all_sheets = [s for s, _ in WRITERS]
+    p = argparse.ArgumentParser(description="Szenario-Sweep über Varianten von cases.csv")
+    p.add_argument("--grid", type=Path, default=GRID_PATH, help="Raster (Default config/scenarios.yml)")
+    p.add_argument("--sheets", nargs="+", default=all_sheets, choices=all_sheets, metavar="SHEET")
+    p.add_argument("--parallel", type=int, default=PARALLEL,
+                   help=f"gleichzeitig laufende Szenarien (Default {PARALLEL})")
+    p.add_argument("--out", type=Path, default=OUT_XLSX)
+    p.add_argument("--no-warmup", action="store_true",
+                   help="Präfix je Szenario vorab nicht an die Backends schicken")
+    args = p.parse_args(argv)
+
+    base      = load_contexts(CONTEXT_PATH)
+    scenarios = load_grid(args.grid)
+    unique    = len(set(ctx for _, ctx in scenarios))
+    print(f"🔀 {len(scenarios)} Szenarien ({unique} unterschiedliche Sachverhalt-Sets) "
+          f"× {len(args.sheets)} Sheets")
+
+    t0      = time.perf_counter()
+    results = run_sweep(scenarios, args.sheets, parallel=args.parallel, warm=not args.no_warmup)
+    out     = write_comparison(results, scenarios, args.sheets, base, path=args.out)
+    secs    = time.perf_counter() - t0
+
+    rows  = sum(len(r) for s in results.values() for r in s.values())
+    calls = metrics.CASCADE.total()
+    print(f"✅ Vergleich geschrieben in: {out}")
+    print(f"📊 {rows} Szenario-Zeilen in {secs:.1f}s, {calls:.0f} LLM-Anfragen "
+          f"({metrics.ROWS.total(source='cache'):.0f} aus dem Cache)")
+    print(f"📊 {metrics.summary()}")
+
+
+if __name__ == "__main__":
+    main()
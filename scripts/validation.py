@@ -0,0 +1,97 @@
+"""
+validation.py – Vektorisierte Plausibilitätsprüfung der LLM-Ergebnisse
+=====================================================================
+Alle Ergebnisse eines Sheets werden in **einem** NumPy-Durchgang bewertet:
+
+- Abweichung zur CAGR-Baseline als Log-Verhältnis (Faktor statt Prozent)
+- Toleranzband wächst mit der Volatilität der Historie und dem Horizont
+- Vorzeichenwechsel gegenüber t0 und nicht-numerische Werte → Ausreißer
+
+Score > 1 = Ausreißer. Nur diese Zeilen fragt `pipeline.explain_rows()` mit
+einem Hinweis erneut an (begrenztes Retry-Budget je Sheet), der Rest wird
+sofort übernommen. Einstellungen im `validation:`-Block von sheets.yml.
+"""
+
+from __future__ import annotations
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+import metrics
+from forecast import cagr_baseline
+from loader import load_sheet_block
+from results import ForecastResult, matrix
+
+VALIDATION = metrics.REGISTRY.counter(
+    "forecast_validation_rows_total",
+    "Validierte Zeilen nach Ergebnis (ok/requeried/fixed/rejected)")
+
+DEFAULTS = {
+    "enabled":      True,
+    "max_factor":   5.0,    # bis Faktor 5 über/unter der Baseline plausibel
+    "vol_factor":   1.0,    # Band (log) + vol_factor × Volatilität × √Horizont
+    "retry_budget": 10,     # max. erneute Anfragen je Sheet
+    "attempts":     2,      # max. erneute Anfragen je Zeile
+}
+
+
+def settings(sheet: str) -> dict:
+    return {**DEFAULTS, **load_sheet_block("validation", sheet)}
+
+
+def score(fc: np.ndarray, hist: np.ndarray, cfg: dict = DEFAULTS,
+          base: np.ndarray | None = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    fc, hist: Zeilen × 3. Liefert (Score je Zeile, Grund-Code je Zeile):
+    0 = ok, 1 = Abweichung, 2 = Vorzeichen, 3 = nicht numerisch.
+    Abweichung als Log-Verhältnis zur Baseline, damit +400 % und −80 % gleich
+    zählen; ein Wert von genau 0 (Wegfall, z.B. Russland-Exit) ist plausibel.
+    """
+    fc   = np.asarray(fc, dtype=float)
+    hist = np.nan_to_num(np.asarray(hist, dtype=float))
+    base = cagr_baseline(hist) if base is None else np.asarray(base, dtype=float)
+    t0   = hist[:, -1]
+
+    scale = np.maximum.reduce([np.abs(t0), np.abs(base).max(axis=1),
+                               np.abs(hist).mean(axis=1), np.full(len(t0), 1e-9)])
+    eps   = 0.01 * scale[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prev = hist[:, :-1]
+        chg  = np.where(np.abs(prev) > 1e-12, np.diff(hist, axis=1) / np.abs(prev), 0.0)
+        vol  = np.clip(np.nan_to_num(chg).std(axis=1), 0, 2.0)
+        band = (np.log(cfg["max_factor"])
+                + cfg["vol_factor"] * vol[:, None] * np.sqrt(np.arange(1, fc.shape[1] + 1))[None, :])
+        dev  = np.abs(np.log((np.abs(fc) + eps) / (np.abs(base) + eps)))
+    dev    = np.where((np.abs(fc) <= 1e-9) | np.isnan(dev), 0.0, dev)
+    s      = (dev / band).max(axis=1)
+    reason = np.where(s > 1, 1, 0)
+
+    big    = np.abs(fc) > 0.1 * scale[:, None]
+    flip   = ((np.sign(fc) * np.sign(t0)[:, None] < 0) & big).any(axis=1)
+    s      = np.where(flip, np.maximum(s, 10.0), s)
+    reason = np.where(flip, 2, reason)
+
+    bad    = np.isnan(fc).any(axis=1)
+    s      = np.where(bad, np.inf, s)
+    reason = np.where(bad, 3, reason)
+    return s, reason
+
+
+REASONS = {1: "unplausible Abweichung zur Historie", 2: "Vorzeichenwechsel", 3: "keine gültigen Zahlen"}
+
+def hint(values: np.ndarray, code: int) -> str:
+    """Hinweis für die erneute Anfrage einer Ausreißer-Zeile."""
+    shown = "/".join("?" if v != v else f"{v:.2f}" for v in values)
+    return (f"Hinweis: Eine frühere Antwort (t1/t2/t3 = {shown}) wurde verworfen "
+            f"({REASONS.get(int(code), 'unplausibel')}). Prüfe Größenordnung und Vorzeichen.")
+
+
+def outliers(sheet: str, hists: Sequence[List[float]], results: Sequence[ForecastResult],
+             cfg: dict | None = None) -> Dict[int, Tuple[np.ndarray, int]]:
+    """Index → (Werte, Grund-Code) aller Ausreißer eines Sheets."""
+    cfg = cfg or settings(sheet)
+    if not results:
+        return {}
+    fc        = matrix(results)
+    s, reason = score(fc, np.asarray(hists, dtype=float), cfg)
+    return {int(i): (fc[i], int(reason[i])) for i in np.flatnonzero(s > 1)}
@@ -3,20 +3,21 @@
 writer_capex.py – Tiefen-Debug (CAPEX 2) mit LLM-only Forecast
 =============================================================
 - Liest config/capex2_accounts.csv für row → category
-- Workbook A (data_only=True) zum Auslesen historischer Werte
-- Workbook B (write-enabled) wird von main.py übergeben
-- Schreibt LLM-Prognosen in Spalten t1–t3 und JSON in Spalte reason
+- Historie über xlsx_stream.sheet_history (Streaming, gecachte Formelwerte)
+- Das Ziel-Workbook (write-enabled) wird von main.py übergeben
+- Schreibt LLM-Prognosen in Spalten t1–t3 und die Begründung in Spalte reason
 - Logt in outputs/capex2_debug.txt
 """
 from __future__ import annotations
 from pathlib import Path
 from csv import DictReader
-import re, json
-from typing import List, Dict, Optional
+from typing import List, Dict
 
-from openpyxl import load_workbook
 from loader import find_header_row, col_map
-from explanations import explain
+from pipeline import Job, explain_rows
+from sampling import write_bands
+from xlsx_stream import sheet_history
+from profiling import span
 
 # ——————————————————————————————————————————————————————————————————— #
 BASE       = Path(__file__).resolve().parent.parent.parent
@@ -25,25 +26,10 @@ SRC_XLSX   = BASE / "data"    / "UnternehmensplanungExcel.xlsx"
 LOG_FILE   = BASE / "outputs" / "capex2_debug.txt"
 SHEET      = "CAPEX (2)"
 
-PLACEH: set = {None, "", "-", "???", "."}
 LOG: List[str] = []
 def log(msg: str) -> None:
     LOG.append(msg)
 
-_rx = re.compile(r"[^\d,.\-]")
-def safe_float(v) -> Optional[float]:
-    if v in PLACEH:
-        return None
-    if isinstance(v, (int, float)):
-        return float(v)
-    if isinstance(v, str):
-        s = _rx.sub("", v).replace(".", "").replace(",", ".")
-        try:
-            return float(s)
-        except ValueError:
-            return None
-    return None
-
 def write_capex_forecast(wb) -> None:
     # 1) Mapping
     if not MAP_CSV.exists():
@@ -56,11 +42,13 @@ def write_capex_forecast(wb) -> None:
     log(f"Mapping geladen: {len(cfg)} Einträge")
 
     # 2) Sheets
-    data_ws = load_workbook(SRC_XLSX, data_only=True)[SHEET]
+    with span("load_history", sheet=SHEET):
+        hist = sheet_history(SHEET, SRC_XLSX)
     ws      = wb[SHEET]
 
     # 3) Header
-    header = find_header_row(ws)
+    with span("find_header", sheet=SHEET):
+        header = find_header_row(ws)
     if header is None:
         log("ERROR: Header nicht gefunden.")
         _write_log(); return
@@ -85,32 +73,35 @@ def write_capex_forecast(wb) -> None:
 
     # 6) Forecast-Loop
     writes = 0
+    jobs: List[Job] = []
     for row, cat in sorted(cfg.items()):
         if cat != "forecast":
             log(f"Skip row {row} (category={cat})")
             continue
 
-        t2 = safe_float(data_ws.cell(row, cols["t-2"]).value)
-        t1 = safe_float(data_ws.cell(row, cols["t-1"]).value)
-        t0 = safe_float(data_ws.cell(row, COL_T0).value)
+        t2, t1, t0 = hist.values(row)
         log(f"ROW {row} | t-2={t2} | t-1={t1} | t0={t0}")
         if t0 is None:
             log(f"  -> t0 fehlt, skip row {row}")
             continue
 
-        raw = explain(ws.cell(row, acc_col).value, [t2 or 0, t1 or 0, t0], [])
-        log(f"  RAW_LLM row {row}: {raw!r}")
-
-        try:
-            obj = json.loads(raw)
-            for key, col in COL_FC.items():
-                v = obj.get(key)
-                if isinstance(v, (int, float)):
-                    ws.cell(row, col, value=round(v, 2))
-                    writes += 1
-            ws.cell(row, COL_REASON, value=obj.get("reason", ""))
-        except Exception as e:
-            log(f"  ERROR parsing JSON row {row}: {e}")
+        # Job sammeln – LLM-Aufrufe laufen danach gesammelt & parallel
+        jobs.append((row, ws.cell(row, acc_col).value, [t2 or 0, t1 or 0, t0]))
+
+    # LLM-Prognosen parallel über den Backend-Pool
+    results = explain_rows(SHEET, jobs)
+    for row, res in results.items():
+        log(f"  RAW_LLM row {row}: {res}")
+
+        # Werte & Begründung schreiben
+        for col, val in zip(COL_FC.values(), res.values):
+            if val is not None:
+                ws.cell(row, col, value=round(val, 2))
+                writes += 1
+        ws.cell(row, COL_REASON, value=res.reason)
+
+    # Stichproben-Spanne & Prüfhinweis rechts neben der Begründung (sampling.py)
+    write_bands(ws, header, COL_REASON + 1, results, SHEET)
 
     log(f"TOTAL writes={writes}")
     _write_log()
@@ -2,22 +2,23 @@
 writer_cfr.py – Tiefen-Debug (CFR 2) mit LLM-only Forecast
 ==========================================================
 - Liest config/cfr2_accounts.csv für row→category
-- Workbook A (data_only=True) zum Auslesen historischer Werte
-- Workbook B (write-enabled) wird von main.py übergeben
-- Schreibt LLM-Prognosen in Spalten t1–t3 und JSON in die erste freie Spalte
+- Historie über xlsx_stream.sheet_history (Streaming, gecachte Formelwerte)
+- Das Ziel-Workbook (write-enabled) wird von main.py übergeben
+- Schreibt LLM-Prognosen in Spalten t1–t3 und die Begründung in die erste freie Spalte
 """
 
 from __future__ import annotations
 from pathlib import Path
 from csv import DictReader
-import re, json
 from typing import List
 
-from openpyxl import load_workbook
 from openpyxl.utils import get_column_letter
 
 from loader import find_header_row, col_map
-from explanations import explain
+from pipeline import Job, explain_rows
+from sampling import write_bands
+from xlsx_stream import sheet_history
+from profiling import span
 
 # --------------------------------------------------------------------------- #
 #  Pfade & Konstanten                                                         #
@@ -28,7 +29,6 @@ SRC_XLSX   = BASE / "data"    / "UnternehmensplanungExcel.xlsx"
 LOG_FILE   = BASE / "outputs" / "cfr2_debug.txt"
 
 SHEET      = "CFR (2)"
-PLACEH     = {None, "", "-", "—", ".", "…"}
 
 LOG: List[str] = []
 def log(msg: str) -> None:
@@ -37,20 +37,6 @@ def log(msg: str) -> None:
 # --------------------------------------------------------------------------- #
 #  Helper                                                                     #
 # --------------------------------------------------------------------------- #
-_rx = re.compile(r"[^\d,.\-]")
-def safe_float(v) -> float | None:
-    if v in PLACEH:
-        return None
-    if isinstance(v, (int, float)):
-        return float(v)
-    if isinstance(v, str):
-        s = _rx.sub("", v).replace(".", "").replace(",", ".")
-        try:
-            return float(s)
-        except ValueError:
-            return None
-    return None
-
 def detect_acc_col(ws, header_row: int, max_col: int = 15) -> int | None:
     """erste Spalte unterhalb Header-Zeile mit nicht-leeren Strings"""
     for col in range(1, max_col + 1):
@@ -74,10 +60,12 @@ def write_cfr_forecast(wb) -> None:
            for r in DictReader(MAP_CSV.open(encoding="utf-8"))}
     log(f"Mapping geladen: {len(cfg)} Einträge")
 
-    data_ws = load_workbook(SRC_XLSX, data_only=True)[SHEET]
+    with span("load_history", sheet=SHEET):
+        hist = sheet_history(SHEET, SRC_XLSX)
     ws      = wb[SHEET]
 
-    header_row = find_header_row(ws)
+    with span("find_header", sheet=SHEET):
+        header_row = find_header_row(ws)
     if header_row is None:
         log("ERROR: Header-Zeile mit 't0' nicht gefunden."); _write_log(); return
     log(f"Header-Zeile: {header_row}")
@@ -98,13 +86,12 @@ def write_cfr_forecast(wb) -> None:
 
     # -----------------------------------------------------------------
     writes = 0
+    jobs: List[Job] = []
     for r, cat in cfg.items():
         if cat != "forecast":
             log(f"Skip row {r} (category={cat})"); continue
 
-        t2 = safe_float(data_ws.cell(r, cols.get("t-2", 0)).value) if "t-2" in cols else None
-        t1 = safe_float(data_ws.cell(r, cols.get("t-1", 0)).value) if "t-1" in cols else None
-        t0 = safe_float(data_ws.cell(r, COL_T0).value)
+        t2, t1, t0 = hist.values(r)
 
         # t0 ist Pflicht – sonst keinen Forecast
         if t0 is None:
@@ -119,19 +106,23 @@ def write_cfr_forecast(wb) -> None:
 
         log(f"ROW {r} | t-2={t2} | t-1={t1} | t0={t0}")
 
-        raw_json = explain(ws.cell(r, acc_col).value, [t2, t1, t0], [])
-        log(f"  RAW_LLM row {r}: {raw_json}")
-
-        try:
-            obj = json.loads(raw_json)
-            for key, col in COL_FC.items():
-                val = obj.get(key)
-                if isinstance(val, (int, float)):
-                    ws.cell(r, col, value=round(val, 2))
-                    writes += 1
-            ws.cell(r, COL_REASON, value=str(obj.get("reason", "")))
-        except Exception as e:
-            log(f"  ERROR parsing/writing row {r}: {e!s}")
+        # Job sammeln – LLM-Aufrufe laufen danach gesammelt & parallel
+        jobs.append((r, ws.cell(r, acc_col).value, [t2, t1, t0]))
+
+    # LLM-Prognosen parallel über den Backend-Pool
+    results = explain_rows(SHEET, jobs)
+    for r, res in results.items():
+        log(f"  RAW_LLM row {r}: {res}")
+
+        # Werte & Begründung schreiben
+        for col, val in zip(COL_FC.values(), res.values):
+            if val is not None:
+                ws.cell(r, col, value=round(val, 2))
+                writes += 1
+        ws.cell(r, COL_REASON, value=res.reason)
+
+    # Stichproben-Spanne & Prüfhinweis rechts neben der Begründung (sampling.py)
+    write_bands(ws, header_row, COL_REASON + 1, results, SHEET)
 
     log(f"TOTAL writes={writes}")
     _write_log()
@@ -2,26 +2,26 @@
 writer_pnl.py – Tiefen-Debug (PnL 2) mit LLM-only Forecast
 ==========================================================
 - Liest config/pnl2_accounts.csv für row→category
-- Workbook A (data_only=True) zum Auslesen historischer Werte
-- Workbook B (write-enabled) wird von main.py übergeben
-- Schreibt LLM-Prognosen in Spalten F–H und JSON in Spalte I
+- Historie über xlsx_stream.sheet_history (Streaming, gecachte Formelwerte)
+- Das Ziel-Workbook (write-enabled) wird von main.py übergeben
+- Schreibt LLM-Prognosen in Spalten F–H und die Begründung in Spalte I
 - Logt in outputs/pnl2_debug.txt
 """
 
 from __future__ import annotations
 from pathlib import Path
 from csv import DictReader
-import re
-import json
 import warnings
 from typing import List
 
-from openpyxl import load_workbook
 from openpyxl.utils import column_index_from_string
 
 from loader import find_header_row
 from forecast import cagr, project
-from explanations import explain
+from pipeline import Job, explain_rows
+from sampling import write_bands
+from xlsx_stream import sheet_history
+from profiling import span
 
 # --------------------------------------------------------------------------- #
 #  Pfade & Konstanten                                                         #
@@ -40,29 +40,10 @@ COL_FC    = {
 }
 COL_REASON = COL_FC["t3"] + 1
 
-PLACEH    = {None, "", "-", "???", "."}
-
 LOG: List[str] = []
 def log(msg: str) -> None:
     LOG.append(msg)
 
-# --------------------------------------------------------------------------- #
-#  safe_float                                                                 #
-# --------------------------------------------------------------------------- #
-_rx = re.compile(r"[^\d,.\-]")
-def safe_float(v) -> float | None:
-    if v in PLACEH:
-        return None
-    if isinstance(v, (int, float)):
-        return float(v)
-    if isinstance(v, str):
-        s = _rx.sub("", v).replace(".", "").replace(",", ".")
-        try:
-            return float(s)
-        except ValueError:
-            return None
-    return None
-
 # --------------------------------------------------------------------------- #
 #  Hauptfunktion                                                              #
 # --------------------------------------------------------------------------- #
@@ -82,14 +63,15 @@ def write_pnl_forecast(wb) -> None:
     log(f"Mapping geladen: {len(cfg)} Einträge")
 
     # 2) Historische Werte aus Quelldatei
-    data_wb = load_workbook(SRC_XLSX, data_only=True)
-    data_ws = data_wb[SHEET]
+    with span("load_history", sheet=SHEET):
+        hist = sheet_history(SHEET, SRC_XLSX)
 
     # 3) Ziel-Sheet
     ws = wb[SHEET]
 
     # 4) Header-Zeile finden
-    header_row = find_header_row(ws)
+    with span("find_header", sheet=SHEET):
+        header_row = find_header_row(ws)
     if header_row is None:
         log("ERROR: Header-Zeile mit 't0' nicht gefunden.")
         _write_log()
@@ -114,36 +96,37 @@ def write_pnl_forecast(wb) -> None:
 
     # 6) Forecast pro Zeile
     writes = 0
+    jobs: List[Job] = []
     for r, category in cfg.items():
         if category != "forecast":
             log(f"Skip row {r} (category={category})")
             continue
 
         # a) historische Werte
-        t2 = safe_float(data_ws.cell(r, COL_T0 - 2).value)
-        t1 = safe_float(data_ws.cell(r, COL_T0 - 1).value)
-        t0 = safe_float(data_ws.cell(r, COL_T0).value)
+        t2, t1, t0 = hist.values(r)
         log(f"ROW {r} | t-2={t2} | t-1={t1} | t0={t0}")
 
         if t2 is None or t0 is None:
             log(f"  -> BAD DATA in row {r}")
             continue
 
-        # b) LLM-Prognose
-        raw_json = explain(ws.cell(r, acc_col).value, [t2, t1, t0], [])
-        log(f"  RAW_LLM row {r}: {raw_json}")
-
-        # c) JSON parsen & schreiben
-        try:
-            obj = json.loads(raw_json)
-            for key in ("t1","t2","t3"):
-                val = obj.get(key)
-                if isinstance(val, (int, float)):
-                    ws.cell(r, COL_FC[key], value=round(val, 2))
-                    writes += 1
-            ws.cell(r, COL_REASON, value=str(obj.get("reason","")))
-        except Exception as e:
-            log(f"  ERROR parsing JSON in row {r}: {e!s}")
+        # b) Job sammeln – LLM-Aufrufe laufen danach gesammelt & parallel
+        jobs.append((r, ws.cell(r, acc_col).value, [t2, t1, t0]))
+
+    # LLM-Prognosen parallel über den Backend-Pool
+    results = explain_rows(SHEET, jobs)
+    for r, res in results.items():
+        log(f"  RAW_LLM row {r}: {res}")
+
+        # Werte & Begründung schreiben
+        for col, val in zip(COL_FC.values(), res.values):
+            if val is not None:
+                ws.cell(r, col, value=round(val, 2))
+                writes += 1
+        ws.cell(r, COL_REASON, value=res.reason)
+
+    # Stichproben-Spanne & Prüfhinweis rechts neben der Begründung (sampling.py)
+    write_bands(ws, header_row, COL_REASON + 1, results, SHEET)
 
     log(f"TOTAL writes={writes}")
     _write_log()
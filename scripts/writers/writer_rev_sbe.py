@@ -4,11 +4,12 @@ writer_rev_sbe.py – Forecast REV_sbE (2) via LLM
 from __future__ import annotations
 from pathlib import Path
 from csv import DictReader
-import re, json
 from typing import List
-from openpyxl import load_workbook
 from loader import find_header_row, col_map
-from explanations import explain
+from pipeline import Job, explain_rows
+from sampling import write_bands
+from xlsx_stream import sheet_history
+from profiling import span
 
 BASE       = Path(__file__).resolve().parent.parent.parent
 MAP_CSV    = BASE / "config"  / "revsbe2_accounts.csv"
@@ -16,21 +17,9 @@ SRC_XLSX   = BASE / "data"    / "UnternehmensplanungExcel.xlsx"
 LOG_FILE   = BASE / "outputs" / "rev_sbe2_debug.txt"
 SHEET      = "REV_sbE (2)"
 
-PLACEH     = {None,"","-","—",".","…"}
-
 LOG: List[str] = []
 log = LOG.append
 
-_rx = re.compile(r"[^\d,.\-]")
-def safe_float(v):           # wie gewohnt …
-    if v in PLACEH: return None
-    if isinstance(v,(int,float)): return float(v)
-    if isinstance(v,str):
-        s=_rx.sub("",v).replace(".","").replace(",",".")
-        try: return float(s)
-        except: return None
-    return None
-
 def write_rev_sbe_forecast(wb) -> None:
     if not MAP_CSV.exists():
         print("❌ Mapping CSV fehlt – discover_accounts.py laufen lassen."); return
@@ -39,10 +28,12 @@ def write_rev_sbe_forecast(wb) -> None:
            for r in DictReader(MAP_CSV.open(encoding="utf-8"))}
     log(f"Mapping: {len(cfg)} Einträge")
 
-    data_ws = load_workbook(SRC_XLSX, data_only=True)[SHEET]
+    with span("load_history", sheet=SHEET):
+        hist = sheet_history(SHEET, SRC_XLSX)
     ws      = wb[SHEET]
 
-    header = find_header_row(ws)
+    with span("find_header", sheet=SHEET):
+        header = find_header_row(ws)
     if header is None: log("Header nicht gefunden"); _flush(); return
 
     cols = col_map(ws, header)          # {'t-2':C, 't-1':D, 't0':E, 't1':F, ...}
@@ -56,26 +47,26 @@ def write_rev_sbe_forecast(wb) -> None:
                           for r in range(header+1, header+8)))
 
     writes = 0
+    jobs: List[Job] = []
     for r,cat in cfg.items():
         if cat!="forecast": log(f"Skip {r} ({cat})"); continue
 
-        t2 = safe_float(data_ws.cell(r, cols["t-2"]).value)
-        t1 = safe_float(data_ws.cell(r, cols["t-1"]).value)
-        t0 = safe_float(data_ws.cell(r, COL_T0).value)
+        t2, t1, t0 = hist.values(r)
         if t0 is None: log(f"Row {r}: t0 fehlt"); continue
 
-        baseline = []  # hier könnten einfache Schätzungen rein
-        raw = explain(ws.cell(r,acc_col).value, [t2 or 0,t1 or 0,t0], baseline)
-        log(f"LLM row {r}: {raw}")
+        # Job sammeln – LLM-Aufrufe laufen danach gesammelt & parallel
+        jobs.append((r, ws.cell(r,acc_col).value, [t2 or 0,t1 or 0,t0]))
+
+    # LLM-Prognosen parallel über den Backend-Pool
+    results = explain_rows(SHEET, jobs)
+    for r, res in results.items():
+        log(f"LLM row {r}: {res}")
+        for c, v in zip(COL_FC.values(), res.values):
+            if v is not None: ws.cell(r,c,value=round(v,2)); writes+=1
+        ws.cell(r,COL_REASON,value=res.reason)
 
-        try:
-            obj = json.loads(raw)
-            for k,c in COL_FC.items():
-                v=obj.get(k); 
-                if isinstance(v,(int,float)): ws.cell(r,c,value=round(v,2)); writes+=1
-            ws.cell(r,COL_REASON,value=obj.get("reason",""))
-        except Exception as e:
-            log(f"JSON-Error row {r}: {e}")
+    # Stichproben-Spanne & Prüfhinweis rechts neben der Begründung (sampling.py)
+    write_bands(ws, header, COL_REASON + 1, results, SHEET)
 
     log(f"writes={writes}")
     _flush()
@@ -0,0 +1,343 @@
+"""
+xlsx_stream.py – Streaming-Reader für historische Werte (t-2 … t0)
+==================================================================
+- Liest das Sheet-XML direkt aus dem xlsx-Zip via `iterparse`, ohne
+  openpyxl-Zellobjekte zu erzeugen
+- Verarbeitete <row>-Elemente werden sofort verworfen → konstanter
+  Parse-Speicher pro Sheet, unabhängig von der Zeilenzahl
+- Behalten werden nur Kontotext + t-2/t-1/t0 als typisierte Arrays
+- Mehrere Sheets werden parallel in eigenen Prozessen geparst
+- Wie `load_workbook(data_only=True)`: Formeln liefern den gecachten Wert
+- Sheets mit `ingest.source` (sheets.yml) kommen aus ERP-Exporten (ingest.py);
+  aus der Vorlage wird dann nur noch das Spalten-Layout gelesen
+"""
+
+from __future__ import annotations
+import posixpath, re, zipfile
+from itertools import chain
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from math import isnan, nan
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import xml.etree.ElementTree as ET
+
+from openpyxl.utils import column_index_from_string
+
+from loader import PERIOD_RE, load_sheet_specs
+
+BASE     = Path(__file__).resolve().parent.parent
+SRC_XLSX = BASE / "data" / "UnternehmensplanungExcel.xlsx"
+
+_NS     = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_R   = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PR  = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_ROW, _C, _V, _IS, _T, _SI, _R = (_NS + t for t in ("row", "c", "v", "is", "t", "si", "r"))
+
+HEADER_SCAN_ROWS = 40     # wie loader.find_header_row
+ACC_SCAN_ROWS    = 7      # wie detect_acc_col in den Writern
+PLACEH           = {"", "-", "—", ".", "…", "???"}
+
+_rx       = re.compile(r"[^\d,.\-]")
+
+# --------------------------------------------------------------------------- #
+#  Zip-Struktur                                                               #
+# --------------------------------------------------------------------------- #
+def _sheet_paths(zf: zipfile.ZipFile) -> Dict[str, str]:
+    """Sheet-Name → Pfad des Sheet-XML im Zip."""
+    rels = {
+        rel.get("Id"): rel.get("Target")
+        for rel in ET.fromstring(zf.read("xl/_rels/workbook.xml.rels")).iter(_NS_PR + "Relationship")
+    }
+    out = {}
+    for sh in ET.fromstring(zf.read("xl/workbook.xml")).iter(_NS + "sheet"):
+        target = rels[sh.get(_NS_R + "id")]
+        out[sh.get("name")] = (target.lstrip("/") if target.startswith("/")
+                               else posixpath.normpath(posixpath.join("xl", target)))
+    return out
+
+
+def _shared_strings(zf: zipfile.ZipFile) -> List[str]:
+    if "xl/sharedStrings.xml" not in zf.namelist():
+        return []
+    out: List[str] = []
+    with zf.open("xl/sharedStrings.xml") as f:
+        for _, el in ET.iterparse(f, events=("end",)):
+            if el.tag == _SI:
+                # nur <si>/<t> und <si>/<r>/<t> – Phonetik (<rPh>) wie openpyxl ignorieren
+                parts = [t.text or "" for t in el.findall(_T)]
+                parts += [t.text or "" for r in el.findall(_R) for t in r.findall(_T)]
+                out.append("".join(parts))
+                el.clear()
+    return out
+
+
+_col_cache: Dict[str, int] = {}
+
+def _col_index(ref: str) -> int:
+    letters = ref.rstrip("0123456789")
+    idx = _col_cache.get(letters)
+    if idx is None:
+        idx = _col_cache[letters] = column_index_from_string(letters)
+    return idx
+
+
+def _to_float(v) -> float:
+    """Wie safe_float der Writer, aber NaN statt None (für typisierte Arrays)."""
+    if v is None:
+        return nan
+    if isinstance(v, float):
+        return v
+    s = v.strip()
+    if s in PLACEH:
+        return nan
+    s = _rx.sub("", s).replace(".", "").replace(",", ".")
+    try:
+        return float(s)
+    except ValueError:
+        return nan
+
+
+def _iter_rows(zf: zipfile.ZipFile, member: str, strings: List[str],
+               wanted: set | None = None) -> Iterator[Tuple[int, Dict[int, object]]]:
+    """
+    (Zeilennummer, {Spalte: Wert}) pro <row>; Elemente werden sofort verworfen.
+    `wanted` ist ein veränderbares Set: sobald befüllt, werden nur noch diese
+    Spalten dekodiert (Header-Suche braucht anfangs alle).
+    """
+    with zf.open(member) as f:
+        parent = None
+        for ev, el in ET.iterparse(f, events=("start", "end")):
+            if ev == "start":
+                if el.tag == _NS + "sheetData":
+                    parent = el
+                continue
+            if el.tag != _ROW:
+                continue
+            cells: Dict[int, object] = {}
+            for c in el.iter(_C):
+                col = _col_index(c.get("r"))
+                if wanted and col not in wanted:
+                    continue
+                t = c.get("t")
+                if t == "inlineStr":
+                    is_ = c.find(_IS)
+                    val = "".join(x.text or "" for x in is_.iter(_T)) if is_ is not None else None
+                else:
+                    v = c.find(_V)
+                    if v is None or v.text is None:
+                        continue
+                    if t == "s":
+                        val = strings[int(v.text)]
+                    elif t in ("str", "e"):
+                        val = v.text if t == "str" else None
+                    elif t == "b":
+                        val = None
+                    else:
+                        try:
+                            val = float(v.text)
+                        except ValueError:      # z.B. t="d" (ISO-Datum) – kein Zahlenwert
+                            val = None
+                if val is not None:
+                    cells[col] = val
+            yield int(el.get("r")), cells
+            el.clear()
+            if parent is not None:
+                parent.clear()          # bereits verarbeitete Zeilen freigeben
+
+
+# --------------------------------------------------------------------------- #
+#  Ergebnis-Struktur                                                          #
+# --------------------------------------------------------------------------- #
+class SheetHistory:
+    """Konto × Periode (t-2, t-1, t0) eines Sheets als typisierte Spalten."""
+    __slots__ = ("sheet", "header_row", "acc_col", "cols",
+                 "rows", "accounts", "t2", "t1", "t0", "_index")
+
+    def __init__(self, sheet: str, header_row: int, acc_col: int, cols: Dict[str, int]):
+        self.sheet      = sheet
+        self.header_row = header_row
+        self.acc_col    = acc_col
+        self.cols       = cols                 # {'t-2': 3, 't-1': 4, 't0': 5}
+        self.rows       = array("l")
+        self.accounts: List[str] = []
+        self.t2, self.t1, self.t0 = array("d"), array("d"), array("d")
+        self._index: Dict[int, int] = {}
+
+    def _append(self, row: int, account: str, t2: float, t1: float, t0: float) -> None:
+        self._index[row] = len(self.rows)
+        self.rows.append(row)
+        self.accounts.append(account)
+        self.t2.append(t2); self.t1.append(t1); self.t0.append(t0)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def values(self, row: int) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """(t-2, t-1, t0) einer Excel-Zeile; fehlende Werte → None (wie safe_float)."""
+        i = self._index.get(row)
+        if i is None:
+            return None, None, None
+        return tuple(None if isnan(x) else x for x in (self.t2[i], self.t1[i], self.t0[i]))
+
+    def account(self, row: int) -> str:
+        i = self._index.get(row)
+        return self.accounts[i] if i is not None else ""
+
+
+# --------------------------------------------------------------------------- #
+#  Sheet lesen                                                                #
+# --------------------------------------------------------------------------- #
+def _layout(rows: Iterator[Tuple[int, Dict[int, object]]], sheet: str, aliases: set,
+            account_column: str | int | None
+            ) -> Tuple[int, Dict[str, int], int, List[Tuple[int, Dict[int, object]]]]:
+    """Header-Zeile, Perioden-Spalten und Kontospalte → (Header, Spalten, Kontospalte, gepufferte Zeilen)."""
+    # 1) Header-Zeile & Perioden-Spalten
+    header_row = col_t0 = None
+    periods: Dict[str, int] = {}
+    for r, cells in rows:
+        for c, v in cells.items():
+            if isinstance(v, str) and v.strip() in aliases:
+                header_row, col_t0 = r, c
+        if header_row is not None:
+            periods = {v: c for c, v in cells.items()
+                       if isinstance(v, str) and PERIOD_RE.fullmatch(v)}
+            break
+        if r >= HEADER_SCAN_ROWS:
+            break
+    if header_row is None:
+        raise KeyError(f"Header {sorted(aliases)} in '{sheet}' nicht gefunden")
+    # Header mit echten Perioden-Labels: fehlende Periode bleibt leer (0 → NaN);
+    # Alias-Header (z.B. STAFF 'Gesamt 12/t0'): Spalten links von t0 wie im Writer
+    by_offset = "t0" not in periods
+    cols = {
+        "t-2": periods.get("t-2", col_t0 - 2 if by_offset else 0),
+        "t-1": periods.get("t-1", col_t0 - 1 if by_offset else 0),
+        "t0":  col_t0,
+    }
+
+    # 2) Kontospalte: Config oder erste Spalte mit Text in den ersten Datenzeilen
+    buffered: List[Tuple[int, Dict[int, object]]] = []
+    if isinstance(account_column, str):
+        acc_col = column_index_from_string(account_column.upper())
+    elif account_column:
+        acc_col = int(account_column)
+    else:
+        for item in rows:
+            buffered.append(item)
+            if item[0] >= header_row + ACC_SCAN_ROWS:
+                break
+        acc_col = next(
+            (c for c in range(1, 16)
+             if any(isinstance(cells.get(c), str) and cells[c].strip()
+                    for r, cells in buffered if r < header_row + ACC_SCAN_ROWS + 1)),
+            0,
+        )
+    return header_row, cols, acc_col, buffered
+
+
+def read_layout(path: Path, sheet: str,
+                header_aliases: Iterable[str] = ("t0",),
+                account_column: str | int | None = None) -> SheetHistory:
+    """Nur Header & Spalten eines Sheets (leere Historie) – für externe Ingestion (ingest.py)."""
+    with zipfile.ZipFile(path) as zf:
+        rows = _iter_rows(zf, _sheet_paths(zf)[sheet], _shared_strings(zf), set())
+        header_row, cols, acc_col, _ = _layout(rows, sheet, {a.strip() for a in header_aliases},
+                                               account_column)
+    return SheetHistory(sheet, header_row, acc_col, cols)
+
+
+def read_sheet_history(path: Path, sheet: str,
+                       header_aliases: Iterable[str] = ("t0",),
+                       account_column: str | int | None = None) -> SheetHistory:
+    aliases = {a.strip() for a in header_aliases}
+    with zipfile.ZipFile(path) as zf:
+        member  = _sheet_paths(zf)[sheet]
+        strings = _shared_strings(zf)
+        wanted: set = set()
+        rows    = _iter_rows(zf, member, strings, wanted)
+        header_row, cols, acc_col, buffered = _layout(rows, sheet, aliases, account_column)
+
+        # 3) Datenzeilen streamen – ab jetzt nur noch die vier Spalten dekodieren
+        hist = SheetHistory(sheet, header_row, acc_col, cols)
+        c2, c1, c0 = cols["t-2"], cols["t-1"], cols["t0"]
+        wanted.update((acc_col, c2, c1, c0))
+        for r, cells in chain(buffered, rows):
+            acc = cells.get(acc_col)
+            acc = acc.strip() if isinstance(acc, str) else ""
+            v2, v1, v0 = (_to_float(cells.get(c)) for c in (c2, c1, c0))
+            if acc or not (isnan(v2) and isnan(v1) and isnan(v0)):
+                hist._append(r, acc, v2, v1, v0)
+    return hist
+
+
+def read_columns(path: Path, sheet: str, columns: Iterable[str | int],
+                 min_row: int = 1) -> Tuple[array, List[array]]:
+    """
+    Beliebige Spalten (z.B. Monatsspalten) ab `min_row` streamen.
+    Liefert (Zeilennummern, je Zeile ein array('d') in Spaltenreihenfolge).
+    """
+    idx = [column_index_from_string(c.upper()) if isinstance(c, str) else int(c)
+           for c in columns]
+    rows_out, values = array("l"), []
+    with zipfile.ZipFile(path) as zf:
+        member  = _sheet_paths(zf)[sheet]
+        strings = _shared_strings(zf)
+        for r, cells in _iter_rows(zf, member, strings, set(idx)):
+            if r < min_row:
+                continue
+            rows_out.append(r)
+            values.append(array("d", (_to_float(cells.get(c)) for c in idx)))
+    return rows_out, values
+
+
+def _read_job(args) -> SheetHistory:
+    import ingest
+    path, sheet, spec = args
+    if Path(path) == SRC_XLSX and ingest.configured(sheet):
+        return ingest.read_history(sheet, spec, path)     # ERP-Export statt Vorlage
+    return read_sheet_history(path, sheet,
+                              spec.get("header_aliases", ["t0"]),
+                              spec.get("account_column"))
+
+
+# --------------------------------------------------------------------------- #
+#  Parallel-Preload & Prozess-Cache                                           #
+# --------------------------------------------------------------------------- #
+_cache: Dict[Tuple[str, str], SheetHistory] = {}
+_cache_lock = Lock()
+
+def preload(path: Path = SRC_XLSX,
+            specs: Dict[str, dict] | None = None,
+            max_workers: int | None = None) -> Dict[str, SheetHistory]:
+    """Alle Sheets aus `specs` (Default: sheets.yml) parallel einlesen und cachen."""
+    specs = specs if specs is not None else load_sheet_specs()
+    todo  = [(path, name, spec) for name, spec in specs.items()
+             if (str(path), name) not in _cache]
+    if len(todo) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as ex:
+            results = list(ex.map(_read_job, todo))
+    else:
+        results = [_read_job(job) for job in todo]
+    with _cache_lock:
+        for hist in results:
+            _cache[(str(path), hist.sheet)] = hist
+        return {name: _cache[(str(path), name)] for name in specs}
+
+
+def sheet_history(sheet: str, path: Path = SRC_XLSX) -> SheetHistory:
+    """Historie eines Sheets – aus dem Cache oder (einzeln) frisch gestreamt."""
+    key = (str(path), sheet)
+    with _cache_lock:
+        hist = _cache.get(key)
+    if hist is None:
+        hist = _read_job((path, sheet, load_sheet_specs().get(sheet, {})))
+        with _cache_lock:
+            _cache[key] = hist
+    return hist
+
+
+def clear_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
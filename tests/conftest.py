@@ -0,0 +1,18 @@
+"""Gemeinsame Fixtures: scripts/ importierbar machen, Lauf-Zustand zwischen Tests leeren."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+
+@pytest.fixture(autouse=True)
+def _fresh_state():
+    import hierarchy, monthly
+    hierarchy.reset()
+    monthly.reset()
+    yield
+    hierarchy.reset()
+    monthly.reset()
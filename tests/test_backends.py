@@ -0,0 +1,68 @@
+import socket
+import urllib.error
+
+import pytest
+
+import backends
+
+
+class FakeEndpoint(backends.Endpoint):
+    """Endpunkt ohne Netz: `answers` liefert der Reihe nach Text oder wirft den Fehler."""
+    def __init__(self, url, answers, max_inflight=2):
+        super().__init__(url, "ollama", max_inflight)
+        self.answers = list(answers)
+        self.calls   = 0
+
+    def generate(self, prompt, model, temperature, seed=None):
+        self.calls += 1
+        a = self.answers.pop(0) if self.answers else "ok"
+        if isinstance(a, Exception):
+            raise a
+        return a, 10, 2
+
+
+class ResponseError(Exception):
+    """Wie ollama.ResponseError: der Server hat geantwortet, nur mit Fehler."""
+    status_code = 404
+
+
+def _pool(*eps):
+    return backends.BackendPool(list(eps), cooldown=30, health_interval=0)
+
+
+def test_parse_backends():
+    eps = backends.parse_backends(" http://a:11434|4, openai+http://b:8000/v1/ ,")
+    assert [(e.kind, e.url, e.max_inflight) for e in eps] == \
+           [("ollama", "http://a:11434", 4), ("openai", "http://b:8000/v1", backends.DEFAULT_INFLIGHT)]
+    assert sum(e.max_inflight for e in eps) == backends.BackendPool(eps, health_interval=0).capacity
+
+
+def test_connection_errors_fail_over_and_lock_the_endpoint():
+    slow, fast = FakeEndpoint("http://slow", [ConnectionRefusedError()]), FakeEndpoint("http://fast", [])
+    slow.latency, fast.latency = 0.1, 5.0                  # slow wird zuerst gewählt
+    pool = _pool(slow, fast)
+    assert pool.generate("p", "m", 0.0) == ("ok", 10, 2)
+    assert not slow.healthy and slow.failures == 1 and fast.healthy
+    assert pool.generate("p", "m", 0.0)[0] == "ok" and slow.calls == 1   # gesperrt → fast
+
+
+def test_error_responses_do_not_lock_the_endpoint():
+    ep   = FakeEndpoint("http://a", [ResponseError("model 'x' not found")])
+    pool = _pool(ep)
+    with pytest.raises(ResponseError):
+        pool.generate("p", "x", 0.0)
+    assert ep.healthy and ep.failures == 0 and ep.inflight == 0
+    assert pool.generate("p", "m", 0.0)[0] == "ok"
+
+
+def test_unreachable_classifies_wrapped_errors():
+    class ConnectError(Exception): pass                   # httpx.ConnectError
+    class APITimeoutError(Exception): pass                # openai.APITimeoutError
+    wrapped = RuntimeError("generate fehlgeschlagen")
+    wrapped.__cause__ = ConnectError()
+    for err in (ConnectError(), APITimeoutError(), socket.timeout(), wrapped,
+                urllib.error.URLError(ConnectionRefusedError())):
+        assert backends._unreachable(err), err
+    for err in (ResponseError(), ValueError("kein JSON"),
+                urllib.error.HTTPError("http://a", 404, "Not Found", {}, None)):
+        assert not backends._unreachable(err), err
@@ -0,0 +1,50 @@
+import pytest
+
+import backtest
+from results import ForecastResult
+
+JOBS = [(3, "Miete", [100.0, 100.0, 100.0, 100.0]),
+        (4, "Umsatz", [100.0, 110.0, 121.0, 133.1])]
+
+
+@pytest.fixture
+def _sheet(monkeypatch):
+    monkeypatch.setattr(backtest, "sheet_jobs", lambda sheet, hist: (JOBS, {}))
+
+
+def test_origins_need_two_training_periods():
+    assert backtest.origins(3) == [(2, 1)]
+    assert backtest.origins(5) == [(2, 3), (3, 2), (4, 1)]
+    assert backtest.origins(2) == []
+
+
+def test_statistical_backtest_scores_each_method(_sheet):
+    records = backtest.backtest_sheet("OPEX (2)", None, use_llm=False)
+    assert len(records) == 2 * 3 * 4                    # Konten × (2 + 1 Horizonte) × Methoden
+    naiv = [e for e in records if e["method"] == "naiv" and e["account"] == "Umsatz"]
+    assert [(e["origin"], e["horizon"], e["forecast"], e["actual"]) for e in naiv] == \
+           [(2, 1, 110.0, 121.0), (2, 2, 110.0, 133.1), (3, 1, 121.0, 133.1)]
+    assert naiv[0]["pe"] == pytest.approx(-11 / 121)
+    assert not any(e["hit"] for e in naiv)              # naiv bleibt flach, Ist steigt
+
+    board = backtest.scoreboard(records)
+    flat  = next(b for b in board if (b["type"], b["method"]) == ("konstant", "naiv"))
+    assert (flat["n"], flat["mape"], flat["hit_rate"]) == (3, 0.0, 1.0)
+    cagr  = next(b for b in board if (b["type"], b["method"]) == ("alle", "cagr"))
+    assert cagr["mape"] == pytest.approx(0.0, abs=1e-9)
+    assert backtest.best_methods(board) == {"OPEX (2)": "cagr"}
+
+
+def test_llm_backtest_sees_only_the_training_history(_sheet, monkeypatch):
+    calls = []
+
+    def explain(sheet, jobs, contexts, **flags):
+        calls.append(([h for _, _, h in jobs], contexts, flags))
+        return {r: ForecastResult.of([h[-1]] * 3, "", "llm") for r, _, h in jobs}
+
+    monkeypatch.setattr(backtest, "explain_rows", explain)
+    records = backtest.backtest_sheet("OPEX (2)", None, use_llm=True, contexts=[])
+    assert [c[0][1] for c in calls] == [[100.0, 110.0], [100.0, 110.0, 121.0]]
+    assert calls[0][1] == [] and not any(calls[0][2].values())   # ohne Ensemble, Regeln, Hierarchie, Monate
+    llm = [e for e in records if e["method"] == "llm" and e["account"] == "Umsatz"]
+    assert [e["forecast"] for e in llm] == [110.0, 110.0, 121.0]
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+import explanations
+import loader
+import metrics
+
+GOOD = {"t1": 110.0, "t2": 121.0, "t3": 133.1, "reason": "Mietanpassung laut Vertrag"}
+
+
+def _answers(monkeypatch, by_model, spec):
+    """_invoke ohne LLM: Antwort je Modell, Aufrufe werden mitgeschrieben."""
+    calls = []
+    def invoke(prompt, model=None, seed=None):
+        calls.append(model)
+        a = by_model[model]
+        if isinstance(a, Exception):
+            raise a
+        return (a if isinstance(a, str) else json.dumps(a)), 100, 20
+    monkeypatch.setattr(explanations, "_invoke", invoke)
+    monkeypatch.setattr(explanations, "load_llm_spec", lambda sheet="": spec)
+    monkeypatch.setattr(explanations, "CACHE_ON", False)
+    monkeypatch.setattr(explanations, "REASONS_MODE", "eager")
+    return calls
+
+
+SPEC = {"tiers": ["klein", "$OLLAMA_MODEL"], "checks": {"max_deviation": 0.5, "min_reason_words": 3}}
+
+
+def test_default_config_has_a_single_tier():
+    loader.load_sheet_block.cache_clear()
+    assert explanations.model_tiers(loader.load_sheet_block("llm", "OPEX (2)")) == \
+           [explanations.OLLAMA_MODEL]
+    assert explanations.model_tiers({}) == [explanations.OLLAMA_MODEL]
+    assert explanations.model_tiers(SPEC) == ["klein", explanations.OLLAMA_MODEL]
+
+
+def test_small_model_answer_is_accepted(monkeypatch):
+    calls = _answers(monkeypatch, {"klein": GOOD}, SPEC)
+    res = explanations.explain("Miete", [100.0, 100.0, 100.0], sheet="OPEX (2)")
+    assert calls == ["klein"]
+    assert (res.values, res.source, res.prompt_tokens) == ([110.0, 121.0, 133.1], "llm", 100)
+
+
+@pytest.mark.parametrize("small", [
+    {**GOOD, "t2": 500.0},                              # weicht > 50 % von der Baseline ab
+    {**GOOD, "reason": "passt"},                        # Begründung zu kurz
+    "keine Zahlen",                                     # kein JSON
+    ConnectionError("Backend weg"),
+])
+def test_failed_checks_escalate_to_the_large_model(monkeypatch, small):
+    big   = {**GOOD, "t1": 111.0}
+    calls = _answers(monkeypatch, {"klein": small, explanations.OLLAMA_MODEL: big}, SPEC)
+    before = metrics.CASCADE.total(tier="1", result="escalated")
+    res = explanations.explain("Miete", [100.0, 100.0, 100.0], sheet="OPEX (2)")
+    assert calls == ["klein", explanations.OLLAMA_MODEL]
+    assert res.t1 == 111.0 and res.source == "llm"
+    assert metrics.CASCADE.total(tier="1", result="escalated") == before + 1
+
+
+def test_last_tier_is_taken_despite_checks_and_errors_fall_back(monkeypatch):
+    far = {**GOOD, "t1": 900.0}
+    _answers(monkeypatch, {explanations.OLLAMA_MODEL: far}, {**SPEC, "tiers": ["$OLLAMA_MODEL"]})
+    assert explanations.explain("Miete", [100.0, 100.0, 100.0], sheet="OPEX (2)").t1 == 900.0
+
+    _answers(monkeypatch, {explanations.OLLAMA_MODEL: ValueError("kaputt")},
+             {**SPEC, "tiers": ["$OLLAMA_MODEL"]})
+    with pytest.warns(UserWarning):
+        res = explanations.explain("Miete", [100.0, 100.0, 100.0], sheet="OPEX (2)")
+    assert res.source == "baseline" and res.values == [100.0, 100.0, 100.0]
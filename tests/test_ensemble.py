@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+import ensemble
+import run_store
+from forecast import STAT_METHODS, blend
+from results import ForecastResult
+
+CFG = {**ensemble.DEFAULTS, "methods": ["llm", "cagr", "naiv", "trend", "mittel"]}
+
+
+@pytest.fixture(autouse=True)
+def _no_measured_errors(monkeypatch, tmp_path):
+    """Ohne Run-Store gelten die Prior-Gewichte (LLM 0.5, Statistik je 0.125)."""
+    monkeypatch.setattr(run_store, "DB_PATH", tmp_path / "none.sqlite")
+
+
+def _stat(hist):
+    preds = np.stack([STAT_METHODS[m](np.array([hist], dtype=float), 3) for m in CFG["methods"][1:]])
+    return blend(preds, np.full((1, 4), 0.25))[0]
+
+
+def _apply(hist, res):
+    return ensemble.apply("CAPEX (2)", [(3, "Konto", hist)], [res], CFG)[0]
+
+
+def test_baseline_rows_keep_the_cagr_baseline():
+    # BS (2) Z. 35: Historie -600/0/0 → Baseline 0, Trend würde +50/+125/+200 liefern
+    res = ForecastResult.of([0.0, 0.0, 0.0], "CAGR-Baseline für Konto", "baseline")
+    assert _apply([-600.0, 0.0, 0.0], res).values == [0.0, 0.0, 0.0]
+    # CAPEX (2) Z. 6: 500/0/0 darf nicht negativ werden
+    assert _apply([500.0, 0.0, 0.0], res).values == [0.0, 0.0, 0.0]
+    # Baseline mit Wachstum bleibt ebenfalls stehen
+    res = ForecastResult.of([110.0, 121.0, 133.1], "CAGR-Baseline für Konto", "baseline")
+    assert _apply([100.0, 100.0, 121.0], res).values == [110.0, 121.0, 133.1]
+
+
+def test_zero_t0_keeps_the_llm_answer():
+    res = ForecastResult.of([100.0, 100.0, 100.0], "Neue Anlage", "llm")
+    assert _apply([100.0, 50.0, 0.0], res).values == [100.0, 100.0, 100.0]
+
+
+def test_blend_keeps_the_sign_of_t0():
+    hist = [1000.0, 500.0, 100.0]                      # Trend zieht t2/t3 unter 0
+    stat = _stat(hist)
+    assert stat[0] > 0 and (stat[1:] < 0).all()
+    out = _apply(hist, ForecastResult.of(stat.tolist(), "LLM", "llm"))
+    assert out.weights and out.t1 == round(float(stat[0]), 2)
+    assert out.t2 == 0.0 and out.t3 == 0.0
+
+    neg  = [-1000.0, -500.0, -100.0]
+    out  = _apply(neg, ForecastResult.of((-stat).tolist(), "LLM", "llm"))
+    assert out.t1 < 0 and out.t2 == 0.0 and out.t3 == 0.0
+
+
+def test_close_llm_answer_is_blended_far_one_kept():
+    hist  = [100.0, 110.0, 121.0]
+    stat  = _stat(hist)
+    close = _apply(hist, ForecastResult.of((stat * 1.1).tolist(), "LLM", "llm"))
+    assert close.weights["llm"] == 0.5
+    assert close.t1 == pytest.approx(stat[0] * 1.05, abs=0.01)
+    far   = ForecastResult.of((stat * 3).tolist(), "Sachverhalt", "llm")
+    assert _apply(hist, far) is far
+
+
+def test_band_follows_the_blended_value():
+    hist = [100.0, 110.0, 121.0]
+    stat = _stat(hist)
+    llm  = (stat * 1.1).round(2)
+    band = {"lo": (llm * 0.8).round(2).tolist(), "hi": (llm * 1.2).round(2).tolist(), "n": 5}
+    out  = _apply(hist, ForecastResult.of(llm.tolist(), "LLM", "llm", band=band))
+    assert out.band["n"] == 5
+    for k, v in enumerate(out.values):                 # relative Spanne bleibt, Band umschließt den Wert
+        assert out.band["lo"][k] < v < out.band["hi"][k]
+        assert (out.band["hi"][k] - out.band["lo"][k]) / v == pytest.approx(0.4, abs=1e-3)
+
+
+def test_band_is_dropped_when_the_blend_is_clipped():
+    hist = [1000.0, 500.0, 100.0]
+    stat = _stat(hist)
+    band = {"lo": (stat * 0.8).tolist(), "hi": (stat * 1.2).tolist(), "n": 5}
+    out  = _apply(hist, ForecastResult.of(stat.tolist(), "LLM", "llm", band=band))
+    assert out.t2 == 0.0 and out.band is None
@@ -0,0 +1,90 @@
+import threading
+
+import ensemble
+import pipeline
+import hierarchy
+import rules
+import validation
+import xlsx_stream
+from results import ForecastResult
+
+
+def _fake_dispatch(calls):
+    """explain() ohne LLM: t1..t3 = t0 × 1.1 / 1.2 / 1.3, zählt die Aufrufe."""
+    def dispatch(sheet, jobs, hints=(), contexts=()):
+        calls.extend(r for r, _, _ in jobs)
+        return [ForecastResult.of([h[-1] * f for f in (1.1, 1.2, 1.3)], "fake", "llm") for _, _, h in jobs]
+    return dispatch
+
+
+def _plain(monkeypatch, calls):
+    monkeypatch.setattr(pipeline, "_dispatch", _fake_dispatch(calls))
+    monkeypatch.setattr(pipeline, "_job_contexts", lambda sheet, jobs, *a, **k: [None] * len(jobs))
+    monkeypatch.setattr(rules, "apply", lambda sheet, jobs, contexts=None: {})
+    monkeypatch.setattr(ensemble, "settings", lambda sheet: {"enabled": False})
+    monkeypatch.setattr(validation, "settings", lambda sheet: {"enabled": False})
+
+
+def test_second_run_with_changed_history_is_recomputed(monkeypatch):
+    calls = []
+    _plain(monkeypatch, calls)
+    first = pipeline.explain_rows("OPEX (2)", [(7, "Miete", [10.0, 10.0, 10.0])],
+                                  use_ensemble=False, use_rules=False)
+    again = pipeline.explain_rows("OPEX (2)", [(7, "Miete", [20.0, 20.0, 20.0])],
+                                  use_ensemble=False, use_rules=False)
+    assert calls == [7, 7]
+    assert first[7].t1 == 11.0
+    assert again[7].t1 == 22.0
+
+
+def test_pulled_children_are_reused_once_and_only_for_same_history(monkeypatch):
+    calls = []
+    _plain(monkeypatch, calls)
+    kids = [(3, "A", [1.0, 2.0, 4.0]), (4, "B", [1.0, 2.0, 8.0])]
+    monkeypatch.setattr(xlsx_stream, "preload", lambda *a, **k: {"COGS (2)": None})
+    monkeypatch.setattr(pipeline, "sheet_jobs", lambda sheet, hist, rows: ([j for j in kids if j[0] in rows], {}))
+
+    vals = hierarchy.values([("COGS (2)", 3), ("COGS (2)", 4)])
+    assert vals[:, 0].tolist() == [4.4, 8.8]
+    assert calls == [3, 4]
+
+    # gleiche Historie → übernommen, geänderte → nicht
+    got = hierarchy.known("COGS (2)", [kids[0], (4, "B", [1.0, 2.0, 9.0])])
+    assert list(got) == [3]
+    # nur einmal
+    assert hierarchy.known("COGS (2)", [kids[0]]) == {}
+
+
+def test_reset_forgets_pulled_rows(monkeypatch):
+    calls = []
+    _plain(monkeypatch, calls)
+    monkeypatch.setattr(xlsx_stream, "preload", lambda *a, **k: {"COGS (2)": None})
+    monkeypatch.setattr(pipeline, "sheet_jobs", lambda sheet, hist, rows: ([(3, "A", [1.0, 1.0, 1.0])], {}))
+    hierarchy.values([("COGS (2)", 3)])
+    hierarchy.reset()
+    assert hierarchy.known("COGS (2)", [(3, "A", [1.0, 1.0, 1.0])]) == {}
+
+
+def test_pulls_of_different_sheets_run_side_by_side(monkeypatch):
+    calls = []
+    _plain(monkeypatch, calls)
+    both = threading.Barrier(2, timeout=5)             # hielte values() die Sperre, liefe das in den Timeout
+    fake = pipeline._dispatch
+
+    def dispatch(sheet, jobs, *a, **k):
+        both.wait()
+        return fake(sheet, jobs, *a, **k)
+
+    monkeypatch.setattr(pipeline, "_dispatch", dispatch)
+    monkeypatch.setattr(xlsx_stream, "preload", lambda *a, **k: {"COGS (2)": None, "REV (2)": None})
+    monkeypatch.setattr(pipeline, "sheet_jobs", lambda sheet, hist, rows: ([(3, sheet, [1.0, 1.0, 1.0])], {}))
+
+    got = {}
+    threads = [threading.Thread(target=lambda s=s: got.update({s: hierarchy.values([(s, 3)])}))
+               for s in ("COGS (2)", "REV (2)")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert {s: v[0, 0] for s, v in got.items()} == {"COGS (2)": 1.1, "REV (2)": 1.1}
+    assert list(hierarchy.known("REV (2)", [(3, "REV (2)", [1.0, 1.0, 1.0])])) == [3]
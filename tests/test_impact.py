@@ -0,0 +1,55 @@
+import pytest
+
+import impact
+
+CAT   = [("REV (2)", 3, "Russland"), ("REV (2)", 4, "China"), ("OPEX (2)", 7, "Energie")]
+CASES = ["Russland-Exit zum Jahresende.", "Energiepreise steigen.", "Unklarer Sachverhalt."]
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Katalog und Matrix-Datei im Speicher; das LLM antwortet je Sachverhalt aus ANSWERS."""
+    answers = {CASES[0]: '{"accounts": [1]}', CASES[1]: 'Gerne: {"accounts": [3, 9]}',
+               CASES[2]: "weiß nicht"}
+    calls, saved = [], {}
+
+    def invoke(prompt, model=None, seed=None):
+        case = next(c for c in CASES if c in prompt)
+        calls.append(case)
+        return answers[case], 10, 2
+
+    monkeypatch.setattr(impact, "catalog", lambda: CAT)
+    monkeypatch.setattr(impact, "settings", lambda: {"enabled": True, "warm_top": 8})
+    monkeypatch.setattr(impact, "_invoke", invoke)
+    monkeypatch.setattr(impact, "_load", lambda: dict(saved))
+    monkeypatch.setattr(impact, "_save", lambda entries: saved.clear() or saved.update(entries))
+    impact.reset()
+    yield calls, saved
+    impact.reset()
+
+
+def test_each_account_gets_only_its_cases(llm):
+    calls, saved = llm
+    assert impact.select("REV (2)", 3, CASES) == [CASES[0], CASES[2]]    # ohne Antwort: alle Konten
+    assert impact.select("REV (2)", 4, CASES) == [CASES[2]]
+    assert impact.select("OPEX (2)", 7, CASES) == [CASES[1], CASES[2]]   # Nummer 9 gibt es nicht
+    assert sorted(calls) == sorted(CASES)                                # einmal je Sachverhalt
+    assert sorted(e["case"] for e in saved.values()) == sorted(CASES[:2])  # Fehlschlag nicht gespeichert
+
+
+def test_saved_entries_are_reused_and_failures_asked_again(llm):
+    calls, _ = llm
+    impact.matrix(CASES)
+    impact.reset()
+    calls.clear()
+    assert impact.contexts_for("REV (2)", [(3, "Russland", []), (4, "China", [])], CASES) == \
+           [[CASES[0], CASES[2]], [CASES[2]]]
+    assert calls == [CASES[2]]
+
+
+def test_disabled_matrix_passes_all_cases_through(llm, monkeypatch):
+    calls, _ = llm
+    monkeypatch.setattr(impact, "settings", lambda: {"enabled": False})
+    assert impact.contexts_for("REV (2)", [(3, "Russland", [])], CASES) == [CASES]
+    assert impact.select("REV (2)", 4, CASES) == CASES
+    assert calls == []
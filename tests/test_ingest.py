@@ -0,0 +1,66 @@
+import sqlite3
+import warnings
+
+import numpy as np
+import pytest
+
+import ingest
+
+BASE_CFG = {**ingest.DEFAULTS}
+
+
+def _cfg(tmp_path, name, **kw):
+    return {**BASE_CFG, "source": str(tmp_path / name), **kw}
+
+
+def test_wide_csv_with_decimal_comma_and_filter(tmp_path):
+    (tmp_path / "ist.csv").write_text(
+        "Zeile;GJ22;GJ23;GJ24;Ges\n"
+        "7;1.000,5;1.100;1.210;1000\n"
+        "7;10;;;1000\n"                                  # zweite Buchung derselben Zeile
+        "8;5;5;5;2000\n"                                 # andere Gesellschaft
+        "9;;;;1000\n", encoding="utf-8")
+    cfg = _cfg(tmp_path, "ist.csv", sep=";", decimal=",", row="Zeile", filter={"Ges": "1000"},
+               periods={"t-2": "GJ22", "t-1": "GJ23", "t0": "GJ24"})
+    keys, vals = ingest._pivot(ingest.read_columns(cfg), cfg)
+    assert keys.tolist() == ["7", "9"]
+    assert vals[0].tolist() == [1010.5, 1100.0, 1210.0]
+    assert np.isnan(vals[1]).all()
+
+
+def test_long_sqlite_export_is_summed_per_account(tmp_path):
+    with sqlite3.connect(tmp_path / "erp.sqlite") as conn:
+        conn.execute("CREATE TABLE ist (konto TEXT, jahr INTEGER, betrag REAL)")
+        conn.executemany("INSERT INTO ist VALUES (?, ?, ?)",
+                         [("Miete", 2022, 50), ("Miete", 2022, 50), ("Miete", 2024, 121),
+                          ("Strom", 2023, 7), ("Miete", 2019, 999)])
+    cfg = _cfg(tmp_path, "erp.sqlite", table="ist", account="konto", period="jahr", value="betrag",
+               periods={"t-2": "2022", "t-1": "2023", "t0": "2024"})
+    keys, vals = ingest._pivot(ingest.read_columns(cfg), cfg)
+    assert keys.tolist() == ["Miete", "Strom"]
+    assert vals[0, [0, 2]].tolist() == [100.0, 121.0] and np.isnan(vals[0, 1])
+    assert vals[1, 1] == 7.0 and np.isnan(vals[1, [0, 2]]).all()
+
+
+def test_configuration_errors(tmp_path):
+    with pytest.raises(ValueError, match="`row` oder `account`"):
+        ingest._wanted({"periods": {}})
+    with pytest.raises(ValueError, match="unbekanntes Format"):
+        ingest.read_columns(_cfg(tmp_path, "ist.xls", row="r"))
+    (tmp_path / "ist.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+    with pytest.raises(KeyError, match="fehlen"):
+        ingest.read_columns(_cfg(tmp_path, "ist.csv", row="Zeile", periods={"t0": "b"}))
+
+
+def test_read_history_maps_account_texts_to_template_rows(tmp_path, monkeypatch):
+    (tmp_path / "opex.csv").write_text(
+        "Konto,t0,t-1,t-2\nMiete,121,110,100\nReisekosten Inland,1,1,1\nUnbekannt,5,5,5\n",
+        encoding="utf-8")
+    cfg = _cfg(tmp_path, "opex.csv", account="Konto", periods={t: t for t in ingest.PERIODS})
+    monkeypatch.setattr(ingest, "settings", lambda sheet: cfg)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        hist = ingest.read_history("OPEX (2)")
+    assert list(hist.rows) == [7]
+    assert hist.values(7) == (100.0, 110.0, 121.0) and hist.account(7) == "Miete"
+    assert any("Reisekosten Inland" in str(w.message) for w in caught)
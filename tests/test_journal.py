@@ -0,0 +1,74 @@
+import json
+
+import journal
+
+
+def _entry(sheet, row, t1):
+    journal.append(sheet, row, "Konto", [1.0, 2.0, 3.0], json.dumps({"t1": t1}), "llm", 12.0, "h")
+
+
+def test_resume_replays_rows_of_an_unchanged_source(tmp_path):
+    src, path = tmp_path / "plan.xlsx", tmp_path / "journal.jsonl"
+    src.write_bytes(b"x")
+    assert journal.start(src, path=path) is None
+    journal.set_run("run-1")
+    _entry("OPEX (2)", 7, 1.0)
+    _entry("OPEX (2)", 7, 2.0)                   # spätere Einträge gewinnen
+    journal.append("OPEX (2)", None, "ohne Zeile", [], "{}", "llm")
+    journal.finish(success=False)
+    assert path.exists()
+
+    assert journal.start(src, resume=True, path=path) == "run-1"
+    e = journal.lookup("OPEX (2)", 7, "Konto")
+    assert json.loads(e["json"]) == {"t1": 2.0} and e["hash"] == "h"
+    assert journal.lookup("OPEX (2)", 7, "anderes Konto") is None
+    journal.finish(success=True, path=path)
+    assert not path.exists() and journal.lookup("OPEX (2)", 7, "Konto") is None
+
+
+def test_changed_source_or_torn_line_is_handled(tmp_path):
+    src, path = tmp_path / "plan.xlsx", tmp_path / "journal.jsonl"
+    src.write_bytes(b"x")
+    journal.start(src, path=path)
+    _entry("BS (2)", 4, 1.0)
+    journal.finish(success=False)
+
+    with path.open("a", encoding="utf-8") as f:
+        f.write('{"sheet": "BS (2)", "row": 5, "acc')    # Absturz mitten im Schreiben
+    assert journal.peek(src, path) is None            # ohne set_run keine run_id
+    assert journal.lookup("BS (2)", 4, "Konto") is not None
+    assert journal.lookup("BS (2)", 5, "Konto") is None
+
+    src.write_bytes(b"neu")                             # Quelle geändert → Neustart
+    journal.start(src, resume=True, path=path)
+    assert journal.lookup("BS (2)", 4, "Konto") is None
+    journal.finish(success=True, path=path)
+
+
+def test_rows_after_a_torn_line_survive_the_next_resume(tmp_path):
+    src, path = tmp_path / "plan.xlsx", tmp_path / "journal.jsonl"
+    src.write_bytes(b"x")
+    journal.start(src, path=path)
+    journal.set_run("run-1")
+    _entry("BS (2)", 4, 1.0)
+    journal.finish(success=False)
+    with path.open("a", encoding="utf-8") as f:
+        f.write('{"sheet": "BS (2)", "row": 5, "acc')    # Absturz mitten im Schreiben
+
+    assert journal.start(src, resume=True, path=path) == "run-1"
+    _entry("BS (2)", 5, 5.0)                            # im fortgesetzten Lauf fertig
+    journal.finish(success=False)
+
+    assert journal.start(src, resume=True, path=path) == "run-1"
+    assert json.loads(journal.lookup("BS (2)", 5, "Konto")["json"]) == {"t1": 5.0}
+    assert journal.lookup("BS (2)", 4, "Konto") is not None
+    journal.finish(success=True, path=path)
+    assert not path.exists()
+
+
+def test_unreadable_lines_in_the_middle_are_skipped(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text('{"header": {"run_id": "r"}}\nkaputt\n'
+                    '{"sheet": "BS (2)", "row": 6, "account": "Konto"}\n', encoding="utf-8")
+    header, rows = journal._load(path)
+    assert header == {"run_id": "r"} and list(rows) == [("BS (2)", 6)]
@@ -0,0 +1,63 @@
+import math
+import urllib.request
+
+import pytest
+
+import metrics
+
+
+def test_counter_totals_match_label_subsets():
+    c = metrics.Counter("rows_total", "Zeilen")
+    c.inc(sheet="PnL", source="llm")
+    c.inc(2, sheet="PnL", source="baseline")
+    c.inc(sheet="BS", source="llm")
+    assert c.value(sheet="PnL", source="baseline") == 2.0
+    assert c.total() == 4.0
+    assert c.total(source="llm") == 2.0
+    assert c.total(sheet="PnL") == 3.0
+    assert c.render()[0] == 'rows_total{sheet="BS",source="llm"} 1.0'
+
+
+def test_histogram_buckets_and_nearest_rank_quantile():
+    h = metrics.Histogram("lat", "Latenz", buckets=(1, 5))
+    for v in (0.5, 2.0, 3.0, 10.0):
+        h.observe(v, tier="1")
+    assert h.count() == 4 and h.count(tier="2") == 0
+    assert h.quantile(0.5) == 2.0 and h.quantile(0.95) == 10.0
+    assert math.isnan(h.quantile(0.5, tier="2"))
+    assert h.render() == ['lat_bucket{tier="1",le="1.0"} 1', 'lat_bucket{tier="1",le="5.0"} 3',
+                          'lat_bucket{tier="1",le="+Inf"} 4', 'lat_sum{tier="1"} 15.5',
+                          'lat_count{tier="1"} 4']
+
+
+def test_registry_renders_prometheus_text():
+    reg = metrics.Registry()
+    assert reg.counter("a_total", "A") is reg.counter("a_total", "A")
+    reg.counter("a_total", "A").inc(reason='x "y"')
+    reg.gauge("b", "B").set(3)
+    text = reg.render()
+    assert text == ('# HELP a_total A\n# TYPE a_total counter\na_total{reason="x \\"y\\""} 1.0\n'
+                    '# HELP b B\n# TYPE b gauge\nb 3.0\n')
+
+
+@pytest.fixture
+def _registry(monkeypatch):
+    reg = metrics.Registry()
+    reg.gauge("forecast_run_duration_seconds", "Lauf").set(1.5)
+    monkeypatch.setattr(metrics, "REGISTRY", reg)
+    return reg
+
+
+def test_textfile_and_http_endpoint(_registry, tmp_path):
+    path = metrics.write_textfile(tmp_path / "out" / "metrics.prom")
+    assert path.read_text(encoding="utf-8") == _registry.render()
+    assert not path.with_suffix(".prom.tmp").exists()
+
+    srv = metrics.start_http_server(0)
+    try:
+        url = f"http://127.0.0.1:{srv.server_port}/metrics"
+        with urllib.request.urlopen(url) as resp:
+            assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert resp.read().decode("utf-8") == _registry.render()
+    finally:
+        srv.shutdown()
@@ -0,0 +1,59 @@
+from openpyxl import Workbook
+
+import explanations
+import monthly
+import pipeline
+from results import MonthlyResult
+
+from test_hierarchy import _plain
+from test_pipeline import _capture
+
+
+def _llm(monkeypatch, answer, calls):
+    def invoke(prompt, model=None, seed=None):
+        calls.append(prompt)
+        return answer, 10, 5
+    monkeypatch.setattr(explanations, "_invoke", invoke)
+    monkeypatch.setattr(explanations, "CACHE_ON", True)
+    monkeypatch.setattr(explanations, "_monthly_cache", {})
+
+
+def test_monthly_answer_is_typed_and_cached(monkeypatch):
+    calls = []
+    _llm(monkeypatch, '{"months": [1, 2, 3], "reason": "Saison"}', calls)
+    res = explanations.explain_monthly("Löhne", [1.0, 1.0], [1.0, 1.0, 1.0], sheet="STAFF (2)")
+    assert isinstance(res, MonthlyResult)
+    assert (res.months, res.reason, res.source) == ([1.0, 2.0, 3.0], "Saison", "llm")
+
+    again = explanations.explain_monthly("Löhne", [1.0, 1.0], [1.0, 1.0, 1.0], sheet="STAFF (2)")
+    assert again.source == "cache" and again.months == res.months
+    assert len(calls) == 1
+
+
+def test_wrong_length_falls_back_to_the_baseline(monkeypatch):
+    calls = []
+    _llm(monkeypatch, '{"months": [1, 2], "reason": "zu kurz"}', calls)
+    res = explanations.explain_monthly("Löhne", [1.0], [4.0, 5.0, 6.0])
+    assert res.source == "baseline" and res.months == [4.0, 5.0, 6.0]
+    assert explanations._monthly_cache == {}
+
+
+def test_monthly_rows_skip_the_yearly_call_and_are_recorded(monkeypatch):
+    calls, yearly = [], []
+    _plain(monkeypatch, yearly)
+    seen = _capture(monkeypatch)
+    _llm(monkeypatch, '{"months": %s, "reason": "Saison"}' % ([1] * 12 + [2] * 12 + [3] * 12), calls)
+    cfg = {"enabled": True, "history_columns": list("CDEFGHIJKLMN"), "periods": 36, "aggregate": "sum"}
+    monkeypatch.setattr(monthly, "settings", lambda sheet: cfg if sheet == "STAFF (2)" else {})
+    monkeypatch.setattr(monthly, "read_columns",
+                        lambda path, sheet, cols: ([7], [[10.0] * 12]))
+
+    out = pipeline.explain_rows("STAFF (2)", [(7, "Löhne", [100.0, 110.0, 120.0])])
+    assert yearly == [] and len(calls) == 1             # nur der Monats-Aufruf
+    assert (out[7].values, out[7].source) == ([12.0, 24.0, 36.0], "llm")
+    assert seen == {"journal": {7: 12.0}, "store": {7: 12.0}, "progress": {7: 12.0}}
+
+    wb = Workbook()
+    assert monthly.write_monthly_sheet(wb, "STAFF (2)", {"monthly": cfg}) == 1
+    row = [c.value for c in wb["STAFF (2) Monate"][2]]
+    assert row[:3] == [7, "Löhne", 1.0] and row[-3:] == [12.0, 24.0, 36.0]
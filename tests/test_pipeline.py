@@ -0,0 +1,98 @@
+import numpy as np
+
+import ensemble
+import journal
+import pipeline
+import progress
+import rules
+import run_store
+import validation
+from results import ForecastResult
+
+from test_hierarchy import _plain
+
+
+def _capture(monkeypatch):
+    """Journal-, Run-Store- und Fortschritts-Einträge mitschreiben: {Ziel: {Zeile: t1}}."""
+    seen = {"journal": {}, "store": {}, "progress": {}}
+    monkeypatch.setattr(journal, "append",
+                        lambda sheet, row, acc, hist, text, *a: seen["journal"].update(
+                            {row: ForecastResult.from_json(text, "").t1}))
+    monkeypatch.setattr(run_store, "record",
+                        lambda sheet, row, acc, hist, res, key="": seen["store"].update({row: res.t1}))
+    monkeypatch.setattr(progress, "row_done",
+                        lambda sheet, row, acc, res: seen["progress"].update({row: res.t1}))
+    return seen
+
+
+def _halve(sheet, jobs, results, cfg):
+    return [r.replace(t1=r.t1 / 2) for r in results]
+
+
+def test_rows_are_recorded_after_ensemble(monkeypatch):
+    calls = []
+    _plain(monkeypatch, calls)
+    seen = _capture(monkeypatch)
+    monkeypatch.setattr(ensemble, "settings", lambda sheet: {"enabled": True})
+    monkeypatch.setattr(ensemble, "apply", _halve)
+
+    out = pipeline.explain_rows("OPEX (2)", [(7, "Miete", [10.0, 10.0, 10.0])])
+    assert out[7].t1 == 5.5
+    assert seen == {"journal": {7: 5.5}, "store": {7: 5.5}, "progress": {7: 5.5}}
+
+
+def test_rule_rows_are_recorded_and_replayed_rows_not_blended_again(monkeypatch):
+    calls = []
+    _plain(monkeypatch, calls)
+    seen = _capture(monkeypatch)
+    monkeypatch.setattr(ensemble, "settings", lambda sheet: {"enabled": True})
+    monkeypatch.setattr(ensemble, "apply", _halve)
+    monkeypatch.setattr(rules, "apply", lambda sheet, jobs, contexts=None: {
+        3: ForecastResult.of([1.0, 1.0, 1.0], "Regel", "rule")})
+    entry = {"account": "Strom", "history": [4.0, 4.0, 4.0], "source": "llm",
+             "json": ForecastResult.of([8.0, 8.0, 8.0], "", "llm").to_json()}
+    monkeypatch.setattr(journal, "lookup", lambda sheet, row, acc: entry if row == 5 else None)
+
+    jobs = [(3, "Gebühren", [1.0, 1.0, 1.0]), (5, "Strom", [4.0, 4.0, 4.0]),
+            (7, "Miete", [10.0, 10.0, 10.0])]
+    out = pipeline.explain_rows("OPEX (2)", jobs, use_hierarchy=False)
+    assert list(out) == [3, 5, 7]
+    assert [out[r].t1 for r in (3, 5, 7)] == [1.0, 8.0, 5.5]
+    assert calls == [7]
+    assert seen["journal"] == {3: 1.0, 7: 5.5}          # Replay steht schon im Journal
+    assert seen["store"] == {3: 1.0, 5: 8.0, 7: 5.5}
+
+
+def test_validation_fallback_is_recorded_once(monkeypatch):
+    calls = []
+    _plain(monkeypatch, calls)
+    seen = _capture(monkeypatch)
+    monkeypatch.setattr(validation, "settings",
+                        lambda sheet: {"enabled": True, "retry_budget": 0, "attempts": 0})
+    monkeypatch.setattr(validation, "outliers", lambda sheet, hists, results, cfg: {0: (None, 1)})
+
+    out = pipeline.explain_rows("OPEX (2)", [(7, "Miete", [10.0, 10.0, 10.0])],
+                                use_ensemble=False, use_rules=False, use_hierarchy=False)
+    assert out[7].source == "baseline"
+    assert seen["store"] == {7: out[7].t1}
+
+
+def test_validation_checks_blended_values_and_blends_requeries(monkeypatch):
+    calls, checked = [], []
+    _plain(monkeypatch, calls)
+    _capture(monkeypatch)
+    monkeypatch.setattr(ensemble, "settings", lambda sheet: {"enabled": True})
+    monkeypatch.setattr(ensemble, "apply", _halve)
+    monkeypatch.setattr(validation, "settings",
+                        lambda sheet: {"enabled": True, "retry_budget": 5, "attempts": 1})
+
+    def outliers(sheet, hists, results, cfg):
+        checked.append([r.t1 for r in results])
+        return {0: (np.array(checked[-1] * 3), 1)} if len(checked) == 1 else {}
+    monkeypatch.setattr(validation, "outliers", outliers)
+
+    out = pipeline.explain_rows("OPEX (2)", [(7, "Miete", [10.0, 10.0, 10.0])],
+                                use_rules=False, use_hierarchy=False)
+    assert calls == [7, 7]
+    assert checked == [[5.5], [5.5]]                   # geprüft wird die Mischung, auch nach Nachfrage
+    assert out[7].t1 == 5.5
@@ -0,0 +1,55 @@
+import pytest
+
+import hierarchy
+import impact
+import journal
+import planner
+import rules
+import run_store
+
+SHEET = "OPEX (2)"
+JOBS  = [(3, "Miete", [1.0, 2.0, 3.0]), (4, "Strom", [1.0, 2.0, 3.0]),
+         (5, "Gebühren", [1.0, 2.0, 3.0]), (6, "Reisen", [1.0, 2.0, 3.0])]
+
+
+@pytest.fixture
+def sheet(monkeypatch, tmp_path):
+    """Ein Sheet mit 6 gemappten Zeilen: skip, ohne Daten, Journal, Regel und zwei fürs LLM."""
+    monkeypatch.setattr(planner, "account_map", lambda s: dict.fromkeys(range(1, 7), ("", "")))
+    monkeypatch.setattr(planner, "sheet_jobs",
+                        lambda s, hist: (JOBS, {1: "category=skip", 2: "Historie unvollständig"}))
+    monkeypatch.setattr(journal, "lookup", lambda s, row, acc: {"row": row} if row == 3 else None)
+    monkeypatch.setattr(rules, "covered", lambda s: {4})
+    monkeypatch.setattr(hierarchy, "parents", lambda s: set())
+    monkeypatch.setattr(impact, "select", lambda s, row, build=True: None)
+    monkeypatch.setattr(run_store, "DB_PATH", tmp_path / "none.sqlite")
+    monkeypatch.setattr(planner, "lazy_reasons", lambda s="": False)
+    monkeypatch.setattr(planner, "load_llm_spec", lambda s="": {"tiers": ["m"]})
+
+
+def test_rows_are_classified_and_tokens_counted(sheet):
+    p = planner.plan_sheet(SHEET, None, 1, {})
+    assert {k: p[k] for k in ("mapped", "skip", "bad", "journal", "rule", "cache", "llm")} == \
+           {"mapped": 6, "skip": 1, "bad": 1, "journal": 1, "rule": 1, "cache": 0, "llm": 2}
+    assert p["calls"] == 2 and p["compl_tok"] == 2 * planner.COMPLETION_TOKENS
+    assert 0 < p["suffix_tok"] < p["prompt_tok"]          # Präfix zählt nur einmal
+    assert (p["latency_s"], p["measured"]) == (planner.DEFAULT_LATENCY_S, False)
+    assert p["seconds"] == 2 * planner.DEFAULT_LATENCY_S
+
+
+def test_measured_latency_workers_and_cascade(sheet, monkeypatch):
+    p = planner.plan_sheet(SHEET, None, 2, {SHEET: (10, 1500.0)})
+    assert (p["latency_s"], p["measured"], p["seconds"]) == (1.5, True, 1.5)
+
+    monkeypatch.setattr(planner, "load_llm_spec", lambda s="": {"tiers": ["klein", "groß"]})
+    monkeypatch.setattr(planner, "lazy_reasons", lambda s="": True)
+    p = planner.plan_sheet(SHEET, None, 1, {})
+    assert p["calls"] == pytest.approx(2 * (1 + planner.ESCALATION_GUESS))
+    assert p["compl_tok"] == int(p["calls"] * planner.NUMERIC_TOKENS)
+
+
+def test_missing_mapping_and_formatting(monkeypatch):
+    monkeypatch.setattr(planner, "account_map", lambda s: {})
+    p = planner.plan_sheet(SHEET, None, 4, {})
+    assert p["note"] == "Mapping-CSV fehlt" and p["llm"] == 0 and p["seconds"] == 0.0
+    assert [planner._fmt_secs(s) for s in (5, 125, 3725)] == ["0m05s", "2m05s", "1h02m"]
@@ -0,0 +1,72 @@
+import json
+
+import backends
+import explanations
+
+
+def test_prompts_share_a_byte_identical_prefix():
+    ctx    = ["Russland-Exit", "Energiepreise +20 %"]
+    prefix = explanations.shared_prefix(ctx)
+    a = explanations.build_prompt("Miete", [1.0, 2.0, 3.0], contexts=ctx)
+    b = explanations.build_prompt("Strom", [4.0, 5.0, 6.0], hint="Bitte prüfen.", contexts=ctx)
+    assert a.startswith(prefix) and b.startswith(prefix)
+    assert "Miete" not in prefix and "- Russland-Exit" in prefix
+    assert b.endswith("\nBitte prüfen.\n")                 # Hinweis nur am Ende
+    assert explanations.build_prompt("Miete", [1.0, 2.0, 3.0], contexts=list(reversed(ctx))) != a
+
+    numeric = explanations.shared_prefix(ctx, numeric=True)
+    common  = explanations._context_prefix(tuple(ctx))
+    assert numeric != prefix and numeric.startswith(common) and prefix.startswith(common)
+
+
+def test_monthly_prompt_starts_with_the_context_prefix(monkeypatch):
+    prompts = []
+    monkeypatch.setattr(explanations, "_invoke",
+                        lambda prompt, model=None, seed=None: prompts.append(prompt) or ("{}", 0, 0))
+    monkeypatch.setattr(explanations, "CACHE_ON", False)
+    explanations.explain_monthly("Löhne", [1.0], [1.0] * 36, contexts=["Tarif +3 %"])
+    assert prompts[0].startswith(explanations._context_prefix(("Tarif +3 %",)))
+
+
+def test_warm_sends_the_prefix_once_per_endpoint(monkeypatch):
+    sent = []
+
+    class Resp:
+        status = 200
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc):
+            return False
+
+    def urlopen(req, timeout=None):
+        sent.append((req.full_url, json.loads(req.data)))
+        return Resp()
+    monkeypatch.setattr(backends.urllib.request, "urlopen", urlopen)
+    monkeypatch.setattr(backends, "NUM_CTX", 8192)
+
+    pool = backends.BackendPool(backends.parse_backends("http://a:11434, openai+http://b:8000/v1"),
+                                health_interval=0)
+    pool.endpoints[1].down_until = float("inf")             # gesperrt → nicht vorwärmen
+    assert pool.warm("PRÄFIX", ["m"]) == {"http://a:11434": True}
+    url, body = sent[0]
+    assert url == "http://a:11434/api/generate"
+    assert body["prompt"] == "PRÄFIX" and body["keep_alive"] == backends.KEEP_ALIVE
+    assert body["options"] == {"num_predict": 1, "num_ctx": 8192}
+
+    assert pool.endpoints[1].warm("PRÄFIX", "m")
+    url, body = sent[1]
+    assert url == "http://b:8000/v1/completions"
+    assert body == {"model": "m", "prompt": "PRÄFIX", "max_tokens": 1, "cache_prompt": True}
+
+
+def test_warm_backends_uses_the_first_tier(monkeypatch):
+    seen = []
+    class Pool:
+        def warm(self, prefix, models):
+            seen.append((prefix, models))
+            return {}
+    monkeypatch.setattr(explanations, "get_pool", lambda: Pool())
+    monkeypatch.setattr(explanations, "load_llm_spec", lambda sheet="": {"tiers": ["klein", "groß"]})
+    monkeypatch.setattr(explanations, "REASONS_MODE", "lazy")
+    explanations.warm_backends(["X"])
+    assert seen == [(explanations.shared_prefix(["X"], numeric=True), ["klein"])]
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture(autouse=True)
+def _clean():
+    profiling.reset()
+    yield
+    profiling.disable()
+    profiling.reset()
+
+
+def test_disabled_spans_are_shared_no_ops():
+    assert not profiling.is_enabled()
+    with profiling.span("sheet", sheet="OPEX (2)") as s:
+        pass
+    assert s is profiling._NULL
+    assert profiling.events() == []
+
+
+def test_nested_spans_record_depth_and_args():
+    profiling.enable(trace_memory=False)
+    with profiling.span("sheet", sheet="OPEX (2)"):
+        with profiling.span("row", row=7):
+            pass
+    inner, outer = profiling.events()                   # innerer Span endet zuerst
+    assert (inner["name"], outer["name"]) == ("row", "sheet")
+    assert inner["args"] == {"row": 7, "mem_delta_bytes": 0, "depth": 1}
+    assert outer["args"]["sheet"] == "OPEX (2)" and outer["args"]["depth"] == 0
+    assert outer["ts"] <= inner["ts"] and outer["dur"] >= inner["dur"]
+
+
+def test_chrome_trace_and_summary(tmp_path):
+    profiling.enable(trace_memory=False)
+    for _ in range(3):
+        with profiling.span("llm"):
+            pass
+    with profiling.span("write"):
+        pass
+
+    path  = profiling.export_chrome_trace(tmp_path / "sub" / "trace.json")
+    trace = json.loads(path.read_text(encoding="utf-8"))
+    meta  = [e for e in trace["traceEvents"] if e["ph"] == "M"]
+    spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert [m["args"]["name"] for m in meta] == ["worker-0"]
+    assert sorted(e["name"] for e in spans) == ["llm", "llm", "llm", "write"]
+    assert trace["displayTimeUnit"] == "ms"
+
+    lines = profiling.summary().splitlines()
+    calls = {l.split()[0]: int(l.split()[1]) for l in lines[2:]}
+    assert calls == {"llm": 3, "write": 1}
+    assert len(profiling.summary(top_n=1).splitlines()) == 3
+
+    profiling.reset()
+    assert profiling.events() == []
@@ -0,0 +1,31 @@
+import progress
+from results import ForecastResult
+
+
+def test_follow_and_state_track_a_run(tmp_path):
+    path = tmp_path / "progress.jsonl"
+    progress.start("run-1", path)
+    progress.expect([{"sheet": "OPEX (2)", "journal": 0, "rule": 1, "cache": 0, "llm": 1}], 4.0)
+    progress.sheet_started("OPEX (2)")
+    progress.answered("OPEX (2)", 7)
+    events, offset = progress.follow(0, path)
+    st = progress.state(events)
+    assert (st["status"], st["done"], st["total"], st["rows"]) == ("running", 1, 2, {})
+
+    progress.row_done("OPEX (2)", 7, "Miete", ForecastResult.of([1.0, 2.0, 3.0], "", "llm"))
+    progress.finish(seconds=1.0)
+    more, _ = progress.follow(offset, path)
+    assert [e["event"] for e in more] == ["row", "run_done"]
+    st = progress.state(events + more)
+    assert st["status"] == "done" and st["done"] == 1
+    assert st["rows"][("OPEX (2)", 7)]["t3"] == 3.0
+
+
+def test_failed_run_reports_the_error(tmp_path):
+    path = tmp_path / "progress.jsonl"
+    progress.start("run-2", path)
+    progress.fail(error="RuntimeError: Writer kaputt")
+    st = progress.state(progress.follow(0, path)[0])
+    assert st["status"] == "failed" and st["error"] == "RuntimeError: Writer kaputt"
+    progress.answered("OPEX (2)", 7)                   # Strom ist zu → wirkungslos
+    assert len(progress.follow(0, path)[0]) == 2
@@ -0,0 +1,65 @@
+import sqlite3
+
+import explanations
+import reasons
+from results import ForecastResult
+
+from test_cascade import GOOD, SPEC, _answers
+from test_run_store import store  # noqa: F401  (Fixture)
+
+
+def _invoke(monkeypatch, calls, answer='{"reason": "Mietvertrag mit Indexklausel"}'):
+    def invoke(prompt, model=None, seed=None):
+        calls.append((prompt, model))
+        return answer, 50, 10
+    monkeypatch.setattr(reasons, "_invoke", invoke)
+
+
+def test_numbers_remember_the_model_that_answered(monkeypatch, store):
+    calls = _answers(monkeypatch, {"klein": "keine Zahlen", explanations.OLLAMA_MODEL: GOOD}, SPEC)
+    monkeypatch.setattr(explanations, "REASONS_MODE", "lazy")
+    store.begin_run()
+    res = explanations.explain("Miete", [100.0, 100.0, 100.0], sheet="OPEX (2)")
+    store.flush()
+    assert calls == ["klein", explanations.OLLAMA_MODEL]
+    assert res.reason == explanations.PENDING_REASON
+    assert store.lazy_prompt(res.prompt_hash)[1:] == (None, explanations.OLLAMA_MODEL)
+
+
+def test_reason_is_generated_with_the_stored_model_once(monkeypatch, store):
+    calls = []
+    _invoke(monkeypatch, calls)
+    store.begin_run()
+    store.remember_prompt("k", "Prompt\n", "groß")
+    store.record("OPEX (2)", 3, "Miete", [1.0, 1.0, 1.0],
+                 ForecastResult.of([1.0, 2.0, 3.0], explanations.PENDING_REASON, "llm"), "k")
+    run_id = store.finish_run()
+
+    rec = store.sheet_results("OPEX (2)", run_id)[0]
+    out = reasons.explain_reason(rec)
+    assert out["reason"] == "Mietvertrag mit Indexklausel"
+    assert [m for _, m in calls] == ["groß"] and calls[0][0].startswith("Prompt\nDeine Prognose")
+    assert reasons.explain_reason(rec)["reason"] == out["reason"]   # jetzt aus dem Run-Store
+    assert len(calls) == 1
+    assert store.sheet_results("OPEX (2)", run_id)[0]["reason"] == out["reason"]
+
+
+def test_old_databases_get_the_model_column(monkeypatch, store, tmp_path):
+    path = tmp_path / "alt.sqlite"
+    with sqlite3.connect(path) as old:
+        old.execute("CREATE TABLE reasons (prompt_hash TEXT PRIMARY KEY, prompt TEXT NOT NULL, "
+                    "reason TEXT, created_at TEXT) WITHOUT ROWID")
+        old.execute("INSERT INTO reasons (prompt_hash, prompt) VALUES ('k', 'Prompt\n')")
+    monkeypatch.setattr(store, "_conn", None)
+    conn = store.connect(path)
+    try:
+        assert store.lazy_prompt("k") == ("Prompt\n", None, None)
+        calls = []
+        _invoke(monkeypatch, calls)
+        rec = {"sheet": "OPEX (2)", "row": 3, "t1": 1.0, "t2": 2.0, "t3": 3.0,
+               "reason": explanations.PENDING_REASON, "prompt_hash": "k"}
+        monkeypatch.setattr(reasons, "load_llm_spec", lambda sheet: {"tiers": ["erster"]})
+        reasons.explain_reason(rec)
+        assert [m for _, m in calls] == ["erster"]                     # ohne Modell: erster Tier
+    finally:
+        conn.close()
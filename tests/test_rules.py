@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+import rules
+
+KEYS  = [("REV", 3), ("REV", 4), ("REV", 5), ("OPEX", 7)]
+NAMES = ["Inland", "China", "Russland", "Reisekosten"]
+H     = np.array([[100.0, 100.0, 100.0],
+                  [50.0, 50.0, 50.0],
+                  [80.0, 40.0, 20.0],
+                  [10.0, 10.0, 10.0]])
+
+
+def _plan(*rule_list):
+    return rules.evaluate(H, list(rule_list), KEYS, NAMES)
+
+
+def test_base_operations():
+    plan, who = _plan({"target": {"sheet": "REV", "match": "Russ"}, "set": 0},
+                      {"target": {"sheet": "REV", "rows": [3]}, "factor": [0.5, 0.4, 0.3]},
+                      {"target": {"sheet": "REV", "accounts": ["China"]}, "growth": 0.1})
+    assert plan[2].tolist() == [0.0, 0.0, 0.0]
+    assert plan[0].tolist() == [50.0, 40.0, 30.0]
+    assert plan[1].tolist() == [55.0, 60.5, 66.55]
+    assert who.tolist() == [1, 2, 0, -1]
+    assert plan[3].tolist() == [10.0, 10.0, 10.0]       # ohne Regel: CAGR-Baseline
+
+
+def test_ratio_uses_planned_reference_accounts():
+    share, _ = _plan({"target": {"sheet": "REV", "rows": [3]}, "factor": 2.0},
+                     {"target": {"sheet": "OPEX"}, "ratio": {"of": {"sheet": "REV", "rows": [3, 4]},
+                                                             "factor": 0.1}})
+    assert share[3].tolist() == [25.0, 25.0, 25.0]      # 10 % von 200 + 50
+
+    follow, _ = _plan({"target": {"sheet": "REV", "rows": [4]}, "growth": 0.2},
+                      {"target": {"sheet": "OPEX"},
+                       "ratio": {"of": {"sheet": "REV", "rows": [4]}, "mode": "follow"}})
+    assert follow[3].tolist() == [12.0, 14.4, 17.28]    # t0 × Entwicklung des Bezugskontos
+
+
+def test_cap_and_floor():
+    plan, _ = _plan({"target": {"sheet": "REV", "rows": [3]}, "growth": 0.5, "cap": 200},
+                    {"target": {"sheet": "REV", "rows": [4]}, "factor": -1, "floor": [0, -10, -60]})
+    assert plan[0].tolist() == [150.0, 200.0, 200.0]
+    assert plan[1].tolist() == [0.0, -10.0, -50.0]
+
+
+def test_load_rules_rejects_ambiguous_or_incomplete_rules(tmp_path):
+    path = tmp_path / "rules.yml"
+    path.write_text("rules:\n  - {name: x, target: {sheet: A}, set: 0, factor: 1}\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="genau eine Basis-Operation"):
+        rules.load_rules(path)
+    path.write_text("rules:\n  - {name: y, set: 0}\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="'target' fehlt"):
+        rules.load_rules(path)
+    with pytest.raises(ValueError, match="Skalar oder"):
+        rules._vec([1, 2])
+    assert rules.load_rules(tmp_path / "fehlt.yml") == []
+
+
+def test_active_rules_follow_the_cases(monkeypatch):
+    monkeypatch.setattr(rules, "_contexts", ["Russland-Exit", "China schwach"])
+    every = [{"name": "immer"}, {"name": "a", "case": 1}, {"name": "b", "case": 2}]
+    assert rules.active_rules(every) == every
+    assert [r["name"] for r in rules.active_rules(every, ["China schwach"])] == ["immer", "b"]
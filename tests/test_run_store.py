@@ -0,0 +1,115 @@
+import pytest
+from openpyxl import Workbook
+
+import run_store
+from results import ForecastResult
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    """Eigener Run-Store je Test, ohne laufenden Lauf und ohne Puffer."""
+    path = tmp_path / "runs.sqlite"
+    monkeypatch.setattr(run_store, "DB_PATH", path)
+    monkeypatch.setattr(run_store, "_conn", None)
+    monkeypatch.setattr(run_store, "_current", None)
+    monkeypatch.setattr(run_store, "_prompts", {})
+    monkeypatch.setattr(run_store, "_answers", {})
+    conn = run_store.connect(path)
+    yield run_store
+    conn.close()
+
+
+def _run(store, values, note=""):
+    run_id = store.begin_run(model="m", note=note)
+    for row, (acc, t1) in enumerate(values, start=3):
+        store.record("OPEX (2)", row, acc, [1.0, 2.0, 3.0],
+                     ForecastResult.of([t1, t1, t1], f"Grund {acc}", "llm"), f"h{row}")
+    store.flush()
+    assert store.finish_run() == run_id
+    return run_id
+
+
+def test_runs_are_stored_and_diffed(store):
+    store.record("OPEX (2)", 3, "Miete", [1.0, 2.0, 3.0], ForecastResult.of([1, 1, 1], "", "llm"))
+    assert store.current_run() is None and store.flush() == 0    # ohne Lauf: no-op
+
+    a = _run(store, [("Miete", 100.0), ("Strom", 50.0)])
+    b = _run(store, [("Miete", 100.0), ("Strom", 60.0)])
+    assert {r[0]: r[4] for r in store.list_runs()} == {a: 2, b: 2}
+
+    rows = store.sheet_results("OPEX (2)", b)
+    assert [(r["row"], r["t1"], r["prompt_hash"]) for r in rows] == [(3, 100.0, "h3"), (4, 60.0, "h4")]
+    assert [d[:5] for d in store.diff(a, b, min_change=0.1)] == [("OPEX (2)", 4, "Strom", 50.0, 60.0)]
+    assert store.diff(a, b, min_change=0.5) == []
+    assert sorted(h[3] for h in store.account_history("Strom")) == [50.0, 60.0]
+
+
+def test_answer_cache_and_lazy_reasons(store):
+    store.remember_answer("k", ForecastResult.of([1.0, 2.0, 3.0], "roh", "llm"))
+    assert store.lookup_cached("k") is None                      # ohne Lauf wird nichts gepuffert
+
+    store.begin_run()
+    store.remember_answer("k", ForecastResult.of([1.0, 2.0, 3.0], "", "llm"))
+    store.remember_prompt("k", "Prompt", "llama3:70b")
+    store.flush()
+    assert store.lazy_prompt("k") == ("Prompt", None, "llama3:70b")
+
+    store.store_reason("k", "Begründung")
+    hit = store.lookup_cached("k")
+    assert (hit.values, hit.reason, hit.source) == ([1.0, 2.0, 3.0], "Begründung", "cache")
+    assert store.lazy_prompt("k") == ("Prompt", "Begründung", "llama3:70b")
+
+
+def test_method_errors_are_smoothed(store):
+    store.update_method_errors([("PnL", "Umsatz", "trend", 0.2, 4)])
+    store.update_method_errors([("PnL", "Umsatz", "trend", 0.4, 5)], alpha=0.5)
+    assert store.method_errors("PnL") == {("Umsatz", "trend"): pytest.approx(0.3)}
+
+
+def test_accuracy_maps_periods_by_shift(store, tmp_path):
+    run_id = _run(store, [("Miete", 100.0), ("Strom", 50.0)])
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "OPEX (2)"
+    ws.append(["Konto", "t-2", "t-1", "t0"])
+    ws.append(["Miete", 1.0, 90.0, 110.0])
+    ws.append(["Strom", 1.0, 50.0, None])
+    wb.save(tmp_path / "ist.xlsx")
+
+    one = store.accuracy(run_id, tmp_path / "ist.xlsx", shift=1)
+    assert [(r["account"], r["horizon"], r["actual"]) for r in one] == [("Miete", "t1", 110.0)]
+    assert one[0]["ape"] == pytest.approx(10 / 110)
+
+    two = store.accuracy(run_id, tmp_path / "ist.xlsx", shift=2)
+    assert [(r["account"], r["horizon"], r["actual"]) for r in two] == \
+           [("Miete", "t1", 90.0), ("Miete", "t2", 110.0), ("Strom", "t1", 50.0)]
+
+    four = store.accuracy(run_id, tmp_path / "ist.xlsx", shift=4)   # t1 läge vor t-2
+    assert [(r["horizon"], r["actual"]) for r in four if r["account"] == "Miete"] == \
+           [("t2", 1.0), ("t3", 90.0)]
+    with pytest.raises(SystemExit):
+        store.main(["accuracy", run_id, str(tmp_path / "ist.xlsx"), "--shift", "4"])
+
+
+def test_llm_error_from_actuals_feeds_the_ensemble_weights(store, tmp_path):
+    import ensemble
+    run_id = store.begin_run()
+    store.remember_answer("h3", ForecastResult.of([120.0, 120.0, 120.0], "", "llm"))
+    store.record("OPEX (2)", 3, "Miete", [90.0, 95.0, 100.0],       # gemischt, roh war 120
+                 ForecastResult.of([110.0, 110.0, 110.0], "", "llm"), "h3")
+    store.record("OPEX (2)", 4, "Strom", [50.0, 50.0, 50.0], ForecastResult.of([0, 0, 0], "Regel", "rule"))
+    store.finish_run()
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "OPEX (2)"
+    ws.append(["Konto", "t-2", "t-1", "t0"])
+    ws.append(["Miete", 95.0, 100.0, 100.0])
+    ws.append(["Strom", 50.0, 50.0, 40.0])
+    wb.save(tmp_path / "ist.xlsx")
+
+    res = store.accuracy(run_id, tmp_path / "ist.xlsx")
+    assert [(r["account"], r["forecast"], r["llm"]) for r in res] == [("Miete", 110.0, 120.0),
+                                                                        ("Strom", 0.0, None)]
+    assert ensemble.learn(res, alpha=1.0) == 2                     # "alle" + "wachsend"
+    assert store.method_errors("OPEX (2)") == {("alle", "llm"): pytest.approx(0.2),
+                                               ("wachsend", "llm"): pytest.approx(0.2)}
@@ -0,0 +1,31 @@
+import numpy as np
+
+import sampling
+from results import ForecastResult
+
+
+def _obj(t1, t2, t3, reason=""):
+    return {"t1": t1, "t2": t2, "t3": t3, "reason": reason}
+
+
+def test_combine_takes_median_band_and_nearest_reason():
+    objs = [_obj(100, 110, 120, "a"), _obj(90, 100, 110, "b"), _obj(130, 150, 170, "c"),
+            _obj(95, 105, 115, "d"), _obj("?", 1, 1, "kaputt")]
+    obj, band = sampling.combine(objs, [0.1, 0.9])
+    assert [obj[k] for k in ("t1", "t2", "t3")] == [97.5, 107.5, 117.5]
+    assert obj["reason"] in ("a", "d")
+    assert band["n"] == 4
+    assert band["lo"] == [91.5, 101.5, 111.5] and band["hi"] == [121.0, 138.0, 155.0]
+
+
+def test_combine_needs_two_complete_samples():
+    objs = [_obj(100, 110, 120, "a"), _obj(None, 1, 1)]
+    assert sampling.combine(objs, [0.1, 0.9]) == (objs[0], None)
+
+
+def test_spread_relative_to_the_forecast():
+    res = [ForecastResult.of([100, 200, 0], "", "llm", band={"lo": [90, 150, -1], "hi": [110, 250, 1]}),
+           ForecastResult.of([1, 1, 1], "", "llm")]
+    width, rel = sampling.spread(res)
+    assert width[0].tolist() == [20.0, 100.0, 2.0] and np.isnan(width[1]).all()
+    assert rel[0, :2].tolist() == [0.2, 0.5]
@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+
+import hierarchy
+import scheduler
+
+SPECS = {"PnL": {"depends_on": ["REV"]},
+         "BS":  {"drivers": {"Umsatz": ["PnL!4:5"]}},
+         "CFR": {"depends_on": ["BS", "Fremd"]},
+         "REV": {}, "OPEX": {}}
+
+
+@pytest.fixture(autouse=True)
+def _specs(monkeypatch):
+    monkeypatch.setattr(scheduler, "load_sheet_specs", lambda: SPECS)
+    monkeypatch.setattr(hierarchy, "load_hierarchy", lambda: {("PnL", 4): [(1.0, ("OPEX", 3))]})
+
+
+def test_dependencies_from_config_hierarchy_and_drivers():
+    deps = scheduler.dependencies(list(SPECS))
+    assert deps == {"PnL": {"REV", "OPEX"}, "BS": {"PnL"}, "CFR": {"BS"}, "REV": set(), "OPEX": set()}
+    assert scheduler.dependencies(["BS", "CFR"]) == {"BS": set(), "CFR": {"BS"}}
+
+
+def test_cycles_are_rejected(monkeypatch):
+    monkeypatch.setattr(scheduler, "load_sheet_specs",
+                        lambda: {"A": {"depends_on": ["B"]}, "B": {"depends_on": ["A"]}})
+    with pytest.raises(ValueError, match="Sheet-Zyklus"):
+        scheduler.dependencies(["A", "B"])
+
+
+def test_critical_path():
+    deps = scheduler.dependencies(list(SPECS))
+    cost = {"REV": 1.0, "OPEX": 5.0, "PnL": 2.0, "BS": 1.0, "CFR": 1.0}
+    assert scheduler.critical_path(deps, cost) == (9.0, ["OPEX", "PnL", "BS", "CFR"])
+    assert scheduler.critical_path({}, {}) == (0.0, [])
+
+
+def test_run_dag_respects_dependencies_and_runs_independent_sheets_together():
+    started, finished, lock = {}, {}, threading.Lock()
+
+    def task(sheet):
+        with lock:
+            started[sheet] = time.perf_counter()
+        time.sleep(0.05)
+        with lock:
+            finished[sheet] = time.perf_counter()
+
+    done = scheduler.run_dag(list(SPECS), task, workers=4)
+    assert set(done) == set(SPECS) and all(v >= 0.05 for v in done.values())
+    for sheet, deps in scheduler.dependencies(list(SPECS)).items():
+        assert all(finished[d] <= started[sheet] for d in deps)
+    assert abs(started["REV"] - started["OPEX"]) < 0.04          # ohne Vorgänger: gleichzeitig
+
+
+def test_run_dag_propagates_writer_errors():
+    def task(sheet):
+        if sheet == "PnL":
+            raise RuntimeError("Writer kaputt")
+    with pytest.raises(RuntimeError, match="Writer kaputt"):
+        scheduler.run_dag(list(SPECS), task, workers=2)
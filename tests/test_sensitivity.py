@@ -0,0 +1,33 @@
+import numpy as np
+
+import sensitivity
+
+DEFS = {"EBITDA": {"num": ["PnL!4:5", "-PnL!7"]},
+        "Marge":  {"num": ["PnL!4:5", "-PnL!7"], "den": ["PnL!4"]}}
+
+
+def test_coefficients():
+    names, keys, A, B, has_den = sensitivity.coefficients(DEFS)
+    assert names == ["EBITDA", "Marge"]
+    assert keys == [("PnL", 4), ("PnL", 5), ("PnL", 7)]
+    assert A.tolist() == [[1, 1, -1], [1, 1, -1]]
+    assert B.tolist() == [[0, 0, 0], [1, 0, 0]]
+    assert has_den.tolist() == [False, True]
+
+
+def test_tornado_matches_one_run_per_shock():
+    _, keys, A, B, has_den = sensitivity.coefficients(DEFS)
+    values = np.array([[100.0, 110.0, 120.0], [20.0, 20.0, 20.0], [60.0, 70.0, 80.0]])
+    mask   = np.array([True, False, True])                  # Zeile 5 ist kein Forecast-Konto
+    res    = sensitivity.tornado(values, A, B, has_den, mask, shock=0.1)
+    assert res["base"][:, 0].tolist() == [60.0, 0.6]
+    for i in range(len(keys)):
+        for name, s in (("low", -0.1), ("high", 0.1)):
+            shocked = values.copy()
+            shocked[i] *= 1 + s * mask[i]
+            np.testing.assert_allclose(res[name][:, i, :], sensitivity.kpi_values(shocked, A, B, has_den))
+
+    res["labels"] = ["Umsatz", "Sonstige", "Material"]
+    top = sensitivity.ranking(res, kpi=0, period=0)
+    assert [t[0] for t in top] == ["Umsatz", "Material"]     # ohne Wirkung entfällt
+    assert top[0][1:] == (-10.0, 10.0)
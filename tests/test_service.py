@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+import explanations
+import hierarchy
+import service
+from results import ForecastResult
+
+
+@pytest.fixture
+def svc(monkeypatch):
+    """Dienst ohne Workbook, Vorladen und Run-Store – nur Job-Verwaltung."""
+    monkeypatch.setattr(service, "WarmWorkbooks", lambda src: None)
+    monkeypatch.setattr(service.xlsx_stream, "preload", lambda *a, **k: {})
+    monkeypatch.setattr(service.impact, "warm", lambda: None)
+    monkeypatch.setattr(service.run_store, "begin_run", lambda *a, **k: "run-test")
+    monkeypatch.setattr(service.run_store, "flush", lambda: 0)
+    s = service.ForecastService()
+    yield s
+    s._pool.shutdown(wait=True)
+    s._rows.shutdown(wait=True)
+
+
+def test_row_jobs_do_not_wait_behind_a_workbook(svc, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(svc, "_workbook", lambda job_id, sheets: release.wait(5) and {"file": "x"})
+    monkeypatch.setattr(svc, "_row_job", lambda sheet, rows: {"sheet": sheet, "rows": rows})
+
+    big   = svc.submit({"kind": "workbook"})
+    small = svc.submit({"kind": "rows", "sheet": "OPEX (2)", "rows": [5, 7]})
+    assert svc.wait(small["id"], timeout=2)["result"] == {"sheet": "OPEX (2)", "rows": [5, 7]}
+    assert big["status"] == "running"
+    release.set()
+    assert svc.wait(big["id"], timeout=2)["status"] == "done"
+    assert svc.health()["done"] == 2
+
+
+def test_row_jobs_use_their_own_rollup_store(svc, monkeypatch):
+    hierarchy.remember("PnL (2)", {5: ForecastResult.of([1.0, 1.0, 1.0], "", "rollup")})
+    seen = []
+
+    def explain_rows(sheet, jobs):
+        hierarchy.reset()
+        hierarchy.remember(sheet, {7: ForecastResult.of([2.0, 2.0, 2.0], "", "llm")})
+        seen.append(sorted(k[2] for k in hierarchy._scope.get().store))
+        return {}
+    monkeypatch.setattr(service.xlsx_stream, "sheet_history", lambda sheet, src: None)
+    monkeypatch.setattr(service, "sheet_jobs", lambda sheet, hist, rows: ([], {}))
+    monkeypatch.setattr(service, "explain_rows", explain_rows)
+
+    svc.wait(svc.submit({"kind": "rows", "sheet": "OPEX (2)", "rows": [7]})["id"], timeout=2)
+    assert seen == [[7]]
+    assert [k[2] for k in hierarchy._run.store] == [5]     # Speicher des Laufs unberührt
+
+
+def test_reload_waits_for_running_jobs_and_rereads_cases(svc, monkeypatch, tmp_path):
+    release, order = threading.Event(), []
+    monkeypatch.setattr(svc, "_row_job", lambda sheet, rows: release.wait(5) and order.append("job"))
+    monkeypatch.setattr(svc, "_reload", lambda: order.append("reload"))
+    job = svc.submit({"kind": "rows", "sheet": "OPEX (2)", "rows": [7]})
+    while job["status"] != "running":
+        time.sleep(0.01)
+
+    t = threading.Thread(target=svc.reload)
+    t.start()
+    time.sleep(0.1)
+    assert order == []                                   # /reload wartet auf den Job
+    release.set()
+    t.join(2)
+    assert order == ["job", "reload"]
+
+    class Templates:
+        def reload(self):
+            order.append("templates")
+    svc.templates = Templates()
+    monkeypatch.setattr(service, "reload_contexts", lambda: order.append("cases"))
+    service.ForecastService._reload(svc)
+    assert order[2:] == ["cases", "templates"]
+
+    cases = tmp_path / "cases.csv"
+    cases.write_text("description\nNeuer Sachverhalt\n", encoding="utf-8")
+    monkeypatch.setattr(explanations, "CONTEXT_PATH", cases)
+    monkeypatch.setattr(explanations, "_contexts", list(explanations._contexts))
+    ctx = explanations._contexts
+    explanations.reload_contexts()
+    assert ctx == ["Neuer Sachverhalt"] and explanations._contexts is ctx
+
+
+def test_unknown_jobs_are_rejected(svc):
+    with pytest.raises(ValueError, match="Job-Art"):
+        svc.submit({"kind": "alles"})
+    with pytest.raises(ValueError, match="Sheet"):
+        svc.submit({"kind": "rows", "sheet": "Gibt es nicht"})
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+from openpyxl import load_workbook
+
+import sweep
+from results import ForecastResult
+
+BASE = ["Russland-Exit zum Jahresende.", "Die Kosten steigen um 10 % (Inflation).", "China schwach."]
+
+
+def test_grid_is_the_cross_product_of_all_dimensions():
+    grid = {"dimensions": {
+        "russland":  {"exit": {}, "kein_exit": {"set": {1: "Russland bleibt."}}},
+        "inflation": {"10%": {}, "5%": {"replace": {"10 %": "5 %"}}, "ohne": {"drop": [2], "add": ["Neu."]}},
+    }}
+    out = dict(sweep.expand_grid(grid, BASE))
+    assert list(out)[0] == "russland=exit / inflation=10%" and len(out) == 6
+    assert out["russland=exit / inflation=10%"] == tuple(BASE)
+    assert out["russland=kein_exit / inflation=5%"] == \
+           ("Russland bleibt.", "Die Kosten steigen um 5 % (Inflation).", "China schwach.")
+    assert out["russland=kein_exit / inflation=ohne"] == ("Russland bleibt.", "China schwach.", "Neu.")
+    assert sweep.expand_grid({}, BASE) == [("Basis", tuple(BASE))]
+
+
+def test_invalid_variants_are_rejected():
+    with pytest.raises(ValueError, match="kommt in keinem Sachverhalt vor"):
+        sweep.apply_variant(BASE, {"replace": {"Brasilien": "x"}})
+    with pytest.raises(ValueError, match="existiert nicht"):
+        sweep.apply_variant(BASE, {"set": {4: "x"}})
+    with pytest.raises(ValueError, match="existiert nicht"):
+        sweep.apply_variant(BASE, {"drop": [0]})
+
+
+def _fake_run(monkeypatch, calls):
+    """Zwei Sheets ohne Workbook; t1 = Zeile × Anzahl Sachverhalte."""
+    lock = threading.Lock()
+    jobs = {"OPEX (2)": [(7, "Miete", [1.0, 1.0, 1.0])], "PnL (2)": [(3, "Umsatz", [2.0, 2.0, 2.0])]}
+
+    def explain(sheet, sheet_jobs, contexts):
+        with lock:
+            calls.append((sheet, tuple(contexts)))
+        n = len(contexts)
+        return {r: ForecastResult.of([r * n, r * n + 1, r * n + 2], "", "llm") for r, _, _ in sheet_jobs}
+
+    monkeypatch.setattr(sweep.xlsx_stream, "preload", lambda src: dict.fromkeys(jobs))
+    monkeypatch.setattr(sweep, "sheet_jobs", lambda sheet, hist: (jobs[sheet], {}))
+    monkeypatch.setattr(sweep, "explain_rows", explain)
+    monkeypatch.setattr(sweep.impact, "warm", lambda contexts: None)
+
+
+def test_identical_case_sets_run_only_once(monkeypatch):
+    calls = []
+    _fake_run(monkeypatch, calls)
+    scenarios = [("a", ("x",)), ("b", ("x", "y")), ("c", ("x",))]
+    out = sweep.run_sweep(scenarios, ["OPEX (2)", "PnL (2)"], parallel=2)
+    assert sorted(calls) == [("OPEX (2)", ("x",)), ("OPEX (2)", ("x", "y")),
+                             ("PnL (2)", ("x",)), ("PnL (2)", ("x", "y"))]
+    assert list(out) == ["a", "b", "c"]
+    assert out["a"] is out["c"]
+    assert out["b"]["OPEX (2)"][7].t1 == 14.0 and out["a"]["PnL (2)"][3].t1 == 3.0
+
+
+def test_sheets_of_a_scenario_follow_their_dependencies(monkeypatch):
+    calls = []
+    _fake_run(monkeypatch, calls)
+    monkeypatch.setattr(sweep.scheduler, "load_sheet_specs", lambda: {"OPEX (2)": {"depends_on": ["PnL (2)"]}})
+    monkeypatch.setattr(sweep.hierarchy, "load_hierarchy", lambda: {})
+    out = sweep.run_sweep([("a", ("x",))], ["OPEX (2)", "PnL (2)"])
+    assert [s for s, _ in calls] == ["PnL (2)", "OPEX (2)"]
+    assert list(out["a"]) == ["OPEX (2)", "PnL (2)"]
+
+
+class _Hist:
+    def account(self, row):
+        return "Miete"
+
+    def values(self, row):
+        return [1.0, 1.0, 1.0]
+
+
+def test_comparison_has_one_block_per_scenario_and_the_span(monkeypatch, tmp_path):
+    monkeypatch.setattr(sweep.xlsx_stream, "sheet_history", lambda sheet, src: _Hist())
+    scenarios = [("a", ("x",)), ("b", ("x", "y"))]
+    results = {"a": {"OPEX (2)": {7: ForecastResult.of([10.0, 20.0, 30.0], "", "llm")}},
+               "b": {"OPEX (2)": {7: ForecastResult.of([12.0, None, 25.0], "", "llm")}}}
+    path = sweep.write_comparison(results, scenarios, ["OPEX (2)"], ["x"], path=tmp_path / "s.xlsx")
+
+    wb  = load_workbook(path)
+    row = [c.value for c in wb["OPEX (2)"][3]]
+    assert row == [7, "Miete", 1.0, 1.0, 1.0, 10.0, 20.0, 30.0, 12.0, None, 25.0, 2.0, 0.0, 5.0]
+    info = [[c.value for c in r] for r in wb["Szenarien"].iter_rows(min_row=2)]
+    assert info == [["a", 1, "–"], ["b", 2, "y"]]
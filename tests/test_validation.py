@@ -0,0 +1,35 @@
+import numpy as np
+
+import validation
+from results import ForecastResult
+
+CFG  = validation.DEFAULTS
+HIST = [[100.0, 105.0, 110.0]] * 5
+
+
+def test_score_codes():
+    fc = np.array([[115.0, 120.0, 126.0],              # ok
+                   [2000.0, 2100.0, 2200.0],           # Faktor ~18 → Abweichung
+                   [-50.0, -50.0, -50.0],              # Vorzeichenwechsel
+                   [115.0, np.nan, 126.0],             # nicht numerisch
+                   [0.0, 0.0, 0.0]])                   # Wegfall ist plausibel
+    s, reason = validation.score(fc, np.array(HIST), CFG)
+    assert reason.tolist() == [0, 1, 2, 3, 0]
+    assert (s[[0, 4]] <= 1).all() and (s[1:4] > 1).all()
+
+
+def test_band_widens_with_volatility():
+    calm  = np.array([[100.0, 100.0, 100.0]])
+    wild  = np.array([[40.0, 160.0, 100.0]])
+    fc    = np.array([[450.0, 450.0, 450.0]])
+    assert validation.score(fc, calm, CFG)[0][0] > validation.score(fc, wild, CFG)[0][0]
+
+
+def test_outliers_and_hint():
+    results = [ForecastResult.of([115.0, 120.0, 126.0], "", "llm"),
+               ForecastResult.of([-50.0, -50.0, -50.0], "", "llm")]
+    bad = validation.outliers("OPEX (2)", HIST[:2], results, CFG)
+    assert list(bad) == [1] and bad[1][1] == 2
+    text = validation.hint(*bad[1])
+    assert "-50.00/-50.00/-50.00" in text and "Vorzeichenwechsel" in text
+    assert validation.outliers("OPEX (2)", [], [], CFG) == {}
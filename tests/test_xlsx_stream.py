@@ -0,0 +1,72 @@
+from datetime import datetime
+
+from openpyxl import Workbook
+
+import xlsx_stream
+
+
+def _book(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Plan"
+    ws["A1"] = "Planung 2025"
+    ws.append([])
+    ws.append(["Konto", "t-2", "t-1", "t0", "t1"])
+    ws.append(["Miete", 100, 110, 121, 130])
+    ws.append(["Strom", "1.234,5", "-", 7.5, None])
+    ws.append([])
+    ws.append([None, 1, 2, 3])                         # Werte ohne Kontotext bleiben drin
+    ws.append(["Summe", None, None, "=SUM(D4:D5)"])    # Formel ohne gecachten Wert
+    other = wb.create_sheet("Personal")
+    other.append(["Name", "Jan", "Feb", "Gesamt"])
+    other.append(["Müller", 10, 20, 30])
+    wb.save(path)
+    return path
+
+
+def test_history_matches_the_sheet(tmp_path):
+    hist = xlsx_stream.read_sheet_history(_book(tmp_path / "plan.xlsx"), "Plan")
+    assert (hist.header_row, hist.acc_col, hist.cols) == (3, 1, {"t-2": 2, "t-1": 3, "t0": 4})
+    assert list(hist.rows) == [4, 5, 7, 8]
+    assert hist.values(4) == (100.0, 110.0, 121.0)
+    assert hist.values(5) == (1234.5, None, 7.5)
+    assert hist.values(8) == (None, None, None) and hist.account(8) == "Summe"
+    assert hist.values(99) == (None, None, None) and hist.account(99) == ""
+
+
+def test_alias_header_uses_columns_left_of_t0(tmp_path):
+    hist = xlsx_stream.read_sheet_history(_book(tmp_path / "plan.xlsx"), "Personal", ["Gesamt"])
+    assert hist.cols == {"t-2": 2, "t-1": 3, "t0": 4}
+    assert hist.values(2) == (10.0, 20.0, 30.0) and hist.account(2) == "Müller"
+
+
+def test_layout_and_columns(tmp_path):
+    path   = _book(tmp_path / "plan.xlsx")
+    layout = xlsx_stream.read_layout(path, "Plan", account_column="A")
+    assert len(layout) == 0 and layout.header_row == 3 and layout.acc_col == 1
+    rows, vals = xlsx_stream.read_columns(path, "Plan", ["D", 5], min_row=4)
+    assert list(rows) == [4, 5, 7, 8]
+    assert list(vals[0]) == [121.0, 130.0]
+    assert list(vals[1])[0] == 7.5 and list(vals[1])[1] != list(vals[1])[1]
+
+
+def test_to_float_handles_german_numbers_and_placeholders():
+    assert xlsx_stream._to_float(" 1.234.567,89 € ") == 1234567.89
+    assert xlsx_stream._to_float("-12,5") == -12.5
+    for v in (None, "", "-", "???", "n/a"):
+        assert xlsx_stream._to_float(v) != xlsx_stream._to_float(v)
+
+
+def test_typed_non_numeric_cells_are_skipped(tmp_path):
+    wb = Workbook()
+    wb.iso_dates = True                                # Datum als <c t="d">2024-01-31T…</c>
+    ws = wb.active
+    ws.title = "Plan"
+    ws.append(["Konto", "t-2", "t-1", "t0"])
+    ws.append(["Stichtag", datetime(2024, 1, 31), "#N/A", 5])
+    ws.append(["Miete", 1, 2, 3])
+    wb.save(tmp_path / "typed.xlsx")
+
+    hist = xlsx_stream.read_sheet_history(tmp_path / "typed.xlsx", "Plan")
+    assert hist.values(2) == (None, None, 5.0)
+    assert hist.values(3) == (1.0, 2.0, 3.0)